@@ -1,41 +1,59 @@
-from fastapi import APIRouter, Depends, status
+from fastapi import APIRouter, Depends, Query, status
 from sqlmodel import Session
-from app.schemas.cliente import ClienteCreate, ClienteUpdate, ClienteRead
+from app.schemas.cliente import ClienteCreate, ClienteUpdate, ClienteRead, ClienteFilter
 from app.db.database import get_session
 from uuid import UUID
-from typing import List
+from typing import List, Optional
 from sqlalchemy.exc import IntegrityError
 
 from app.schemas.types import ResponseSuccess
-from app.services.cliente import get_clientes, get_cliente, create_cliente, update_cliente, delete_cliente
+from app.core.config import SEARCH_MAX_LIMIT
+from app.services.cliente import suggest_clientes, get_clientes, get_cliente, create_cliente, update_cliente, delete_cliente
 from app.utils.response import response_success, response_error
+from app.utils.pagination import InvalidCursorError, InvalidSortError, next_cursor
 
 router = APIRouter(tags=["cliente"])
 
 @router.get("/", response_model=ResponseSuccess[List[ClienteRead]], status_code=status.HTTP_200_OK, summary="Obtener lista de clientes", description="Recupera una lista paginada de clientes")
-async def read_clientes(skip: int = 0, limit: int = 100, session: Session = Depends(get_session)):
+async def read_clientes(skip: int = 0, limit: int = 100, cursor: Optional[str] = None, filtros: ClienteFilter = Depends(),
+        sort: Optional[str] = Query(None, description='Campo de orden (created_at, nombre); prefijo "-" para orden descendente'), session: Session = Depends(get_session)):
     """
     Parámetros:
     - skip: Número de registros a omitir (default 0)
     - limit: Número máximo de registros a devolver (default 100)
+    - cursor: Cursor opaco devuelto en `next_cursor`; si se envía, se ignora skip
+    - nombre, created_from, created_to: Filtros opcionales
+    - sort: `created_at` (default) o `nombre`, con `-` delante para orden descendente
 
     Devuelve:
     - Lista de clientes con paginación
     """
     try:
-        resultados = await get_clientes(session, skip, limit)
-        clientes = [ClienteRead.model_validate(c, from_attributes=True) for c in resultados]
-        return response_success(data=clientes)
+        resultados = await get_clientes(session, skip, limit, cursor, filtros, sort)
+        return response_success(data=resultados, model=List[ClienteRead], next_cursor=next_cursor(resultados, limit, sort))
+    except (InvalidCursorError, InvalidSortError) as e:
+        return response_error(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     except Exception as e:
          raise e
 
+@router.get("/autocompletar", response_model=ResponseSuccess[List[ClienteRead]], summary="Autocompletar clientes por nombre", description="Clientes cuyo nombre coincide con el texto sin distinguir tildes ni mayúsculas, ordenados por relevancia")
+async def autocomplete_clientes(q: str = Query(..., min_length=1, max_length=100, description="Texto escrito por el usuario"),
+        limit: int = Query(10, ge=1, le=SEARCH_MAX_LIMIT, description="Número máximo de sugerencias"), session: Session = Depends(get_session)):
+    """
+    Parámetros:
+    - q: Texto a buscar; "jose" encuentra "José". Desde 3 letras tolera errores de escritura (en PostgreSQL)
+    - limit: Número máximo de sugerencias (default 10)
+    """
+    resultados = await suggest_clientes(session, q, limit)
+    return response_success(data=resultados, model=List[ClienteRead])
+
 @router.get("/{id}", response_model=ResponseSuccess[ClienteRead], responses={404: {"description": "Cliente no encontrado"}}, summary="Obtener un cliente por ID", description="Recupera un cliente específico por su ID")
 async def read_cliente_by_id(id: UUID, session: Session = Depends(get_session)):
     try:
         cliente = await get_cliente(session, id)
         if not cliente:
             return response_error(status_code=status.HTTP_404_NOT_FOUND, detail="Cliente no encontrado")
-        return response_success(data=cliente)
+        return response_success(data=cliente, model=ClienteRead)
     except Exception as e:
         raise e
 
@@ -43,10 +61,10 @@ async def read_cliente_by_id(id: UUID, session: Session = Depends(get_session)):
 async def create_cliente_endpoint(cliente_create: ClienteCreate, session: Session = Depends(get_session)):
     try:
         db_cliente = await create_cliente(session, cliente_create)
-        return response_success(data=ClienteRead.model_validate(db_cliente, from_attributes=True))  # Aseguramos la conversión
+        return response_success(data=db_cliente, model=ClienteRead, status_code=status.HTTP_201_CREATED)
 
     except IntegrityError:
-        return response_error(status_code=status.HTTP_409_CONFLICT, message="Error de integridad: es posible que el cliente ya exista o haya datos conflictivos.")
+        return response_error(status_code=status.HTTP_409_CONFLICT, detail="Error de integridad: es posible que el cliente ya exista o haya datos conflictivos.")
     except Exception as e:
         raise e
 
@@ -57,7 +75,7 @@ async def update_cliente_endpoint(id: UUID, cliente_update: ClienteUpdate, sessi
         db_cliente = await update_cliente(session, id, cliente_update)
         if not db_cliente:
             return response_error(status_code=status.HTTP_404_NOT_FOUND, detail="Cliente no encontrado")
-        return response_success(data=db_cliente)
+        return response_success(data=db_cliente, model=ClienteRead)
     except IntegrityError:
         return response_error(status_code=status.HTTP_409_CONFLICT, detail="Error de integridad al actualizar cliente: posible nombre duplicado o datos conflictivos.")
     except Exception as e:
@@ -69,7 +87,7 @@ async def delete_cliente_endpoint(id: UUID, session: Session = Depends(get_sessi
         cliente = await delete_cliente(session, id)
         if not cliente:
             return response_error(status_code=status.HTTP_404_NOT_FOUND, detail="Cliente no encontrado")
-        return response_success(data=cliente)
+        return response_success(data=cliente, model=ClienteRead)
     except IntegrityError:
         return response_error(status_code=status.HTTP_409_CONFLICT, detail="No se puede eliminar el cliente. Puede estar referenciado por otros datos.")
     except Exception as e:
@@ -1,23 +1,38 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
 from sqlmodel import Session
 from app.schemas.equipo_mantenimiento import (
     EquipoMantenimientoCreate,
     EquipoMantenimientoUpdate,
     EquipoMantenimientoRead,
-    EquipoMantenimientoResponse
+    EquipoMantenimientoResponse,
+    EquipoMantenimientoFilter,
+    EquipoMantenimientoReporteQuery,
+    EquipoMantenimientoBatchUpdate
 )
 from app.db.database import get_session
+from app.core.config import SEARCH_MAX_LIMIT
 from app.services.equipo_mantenimiento import (
+    suggest_equipos_mantenimiento,
     get_equipos_mantenimiento,
     get_equipo_mantenimiento,
     create_equipo_mantenimiento,
     update_equipo_mantenimiento,
-    delete_equipo_mantenimiento
+    delete_equipo_mantenimiento,
+    create_equipos_mantenimiento,
+    update_equipos_mantenimiento,
+    delete_equipos_mantenimiento,
+    equipos_mantenimiento_export_statement
 )
-from app.utils.response import response_success, response_error
-from app.schemas.types import ResponseSuccess
+from app.services.batch import BatchAbortedError, batch_result
+from app.utils.response import response_success, response_error, response_batch_aborted
+from app.utils.pagination import InvalidCursorError, InvalidSortError, next_cursor
+from app.utils.export import export_response
+from app.schemas.common import BatchDeleteRequest, BatchRequest, ExportFormat
+from app.schemas.mantenimiento_general import MantenimientoGeneralFilter
+from app.schemas.types import BatchResult, ResponseSuccess
 from uuid import UUID
-from typing import List
+from typing import List, Optional
 from sqlalchemy.exc import IntegrityError
 
 router = APIRouter(tags=["equipo_mantenimiento"])
@@ -26,28 +41,65 @@ router = APIRouter(tags=["equipo_mantenimiento"])
 async def create_equipo_mantenimiento_endpoint(equipo: EquipoMantenimientoCreate, session: Session = Depends(get_session)):
     try:
         db_equipo = await create_equipo_mantenimiento(session, equipo)
-        return response_success(data=EquipoMantenimientoResponse.model_validate(db_equipo, from_attributes=True))
+        return response_success(data=db_equipo, model=EquipoMantenimientoResponse, status_code=status.HTTP_201_CREATED)
     except IntegrityError:
         return response_error(status_code=status.HTTP_409_CONFLICT, detail="Error de integridad: es posible que el equipo ya exista o haya datos conflictivos.")
     except Exception as e:
         raise HTTPException(status_code=500, detail="Error al crear equipo")
 
 @router.get("/", response_model=ResponseSuccess[List[EquipoMantenimientoRead]], status_code=status.HTTP_200_OK, summary="Obtener lista de equipos de mantenimiento", description="Recupera una lista paginada de equipos de mantenimiento")
-async def read_equipos_mantenimiento(skip: int = 0, limit: int = 100, session: Session = Depends(get_session)):
+async def read_equipos_mantenimiento(skip: int = 0, limit: int = 100, cursor: Optional[str] = None, filtros: EquipoMantenimientoFilter = Depends(),
+        sort: Optional[str] = Query(None, description='Campo de orden (created_at, equipo); prefijo "-" para orden descendente'), session: Session = Depends(get_session)):
     try:
-        resultados = await get_equipos_mantenimiento(session, skip, limit)
-        equipos = [EquipoMantenimientoRead.model_validate(e, from_attributes=True) for e in resultados]
-        return response_success(data=equipos)
+        resultados = await get_equipos_mantenimiento(session, skip, limit, cursor, filtros, sort)
+        return response_success(data=resultados, model=List[EquipoMantenimientoRead], next_cursor=next_cursor(resultados, limit, sort))
+    except (InvalidCursorError, InvalidSortError) as e:
+        return response_error(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail="Error al obtener equipos")
 
+@router.post("/buscar", response_model=ResponseSuccess[List[EquipoMantenimientoRead]], status_code=status.HTTP_200_OK, responses={400: {"description": "Cursor u orden inválido"}}, summary="Buscar equipos por contenido del reporte", description="Filtra equipos por contención y rangos numéricos sobre el reporte, resueltos en la base de datos")
+async def search_equipos_mantenimiento(consulta: EquipoMantenimientoReporteQuery, skip: int = 0, limit: int = 100, cursor: Optional[str] = None, filtros: EquipoMantenimientoFilter = Depends(),
+        sort: Optional[str] = Query(None, description='Campo de orden (created_at, equipo); prefijo "-" para orden descendente'), session: Session = Depends(get_session)):
+    """
+    Cuerpo:
+    - contiene: Objeto que debe estar contenido en el reporte, p. ej. {"estado": "operativo"}
+    - rangos: Lista de {clave, min, max}; p. ej. {"clave": "presion", "min": 3} para presión mayor o igual a 3 bar
+
+    Acepta los mismos parámetros de paginación, filtro y orden que la lista de equipos.
+    """
+    try:
+        resultados = await get_equipos_mantenimiento(session, skip, limit, cursor, filtros, sort, consulta)
+        return response_success(data=resultados, model=List[EquipoMantenimientoRead], next_cursor=next_cursor(resultados, limit, sort))
+    except (InvalidCursorError, InvalidSortError) as e:
+        return response_error(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+@router.get("/autocompletar", response_model=ResponseSuccess[List[EquipoMantenimientoRead]], summary="Autocompletar equipos por nombre", description="Equipos cuyo nombre coincide con el texto sin distinguir tildes ni mayúsculas, ordenados por relevancia")
+async def autocomplete_equipos_mantenimiento(q: str = Query(..., min_length=1, max_length=100, description="Texto escrito por el usuario"),
+        limit: int = Query(10, ge=1, le=SEARCH_MAX_LIMIT, description="Número máximo de sugerencias"), session: Session = Depends(get_session)):
+    resultados = await suggest_equipos_mantenimiento(session, q, limit)
+    return response_success(data=resultados, model=List[EquipoMantenimientoRead])
+
+@router.get("/export", response_class=StreamingResponse, responses={200: {"content": {"application/x-ndjson": {}, "text/csv": {}}}}, summary="Exportar equipos con su mantenimiento", description="Todos los equipos de los mantenimientos que cumplen los filtros, en streaming como NDJSON o CSV")
+async def export_equipos_mantenimiento(filtros: MantenimientoGeneralFilter = Depends(),
+        format: ExportFormat = Query(ExportFormat.ndjson, description="ndjson (una fila JSON por línea) o csv")):
+    """
+    Parámetros:
+    - cliente_id, ubicacion_id, periodo, created_from, created_to: Filtros sobre el mantenimiento
+    - format: `ndjson` (default) o `csv`; en CSV el reporte va como texto JSON
+
+    Cada fila es un equipo con su reporte, el periodo del mantenimiento y los nombres de cliente
+    y ubicación, ordenadas por mantenimiento. Se leen por bloques, así que no hay límite de filas.
+    """
+    return export_response(equipos_mantenimiento_export_statement(filtros), format, "equipos_mantenimiento")
+
 @router.get("/{id}", response_model=ResponseSuccess[EquipoMantenimientoResponse], responses={404: {"description": "Equipo no encontrado"}}, summary="Obtener un equipo por ID", description="Recupera un equipo de mantenimiento específico por su ID")
 async def read_equipo_mantenimiento_by_id(id: UUID, session: Session = Depends(get_session)):
     try:
         equipo = await get_equipo_mantenimiento(session, id)
         if not equipo:
             return response_error(status_code=status.HTTP_404_NOT_FOUND, detail="Equipo de mantenimiento no encontrado")
-        return response_success(data=EquipoMantenimientoResponse.model_validate(equipo, from_attributes=True))
+        return response_success(data=equipo, model=EquipoMantenimientoResponse)
     except Exception as e:
         raise e
 
@@ -57,18 +109,50 @@ async def update_equipo_mantenimiento_endpoint(id: UUID, equipo: EquipoMantenimi
         db_equipo = await update_equipo_mantenimiento(session, id, equipo)
         if not db_equipo:
             return response_error(status_code=status.HTTP_404_NOT_FOUND, detail="Equipo de mantenimiento no encontrado")
-        return response_success(data=EquipoMantenimientoResponse.model_validate(db_equipo, from_attributes=True))
+        return response_success(data=db_equipo, model=EquipoMantenimientoResponse)
     except IntegrityError:
         return response_error(status_code=status.HTTP_409_CONFLICT, detail="Error de integridad al actualizar equipo: posible nombre duplicado o datos conflictivos.")
     except Exception as e:
         raise HTTPException(status_code=500, detail="Error al actualizar equipo")
 
-@router.delete("/{id}", response_model=ResponseSuccess[EquipoMantenimientoResponse], responses={404: {"description": "Equipo no encontrado"}, 500: {"description": "Error interno del servidor"}})
+@router.delete("/{id}", response_model=ResponseSuccess[EquipoMantenimientoResponse], responses={404: {"description": "Equipo no encontrado"}, 409: {"description": "Se añadieron fotos al equipo mientras se eliminaba"}, 500: {"description": "Error interno del servidor"}},
+               summary="Eliminar equipo", description="Elimina el equipo junto con sus fotos; los archivos sin otras referencias se borran en segundo plano")
 async def delete_equipo_mantenimiento_endpoint(id: UUID, session: Session = Depends(get_session)):
     try:
         equipo = await delete_equipo_mantenimiento(session, id)
         if not equipo:
             return response_error(status_code=status.HTTP_404_NOT_FOUND, detail="Equipo de mantenimiento no encontrado")
-        return response_success(data=EquipoMantenimientoResponse.model_validate(equipo, from_attributes=True))
+        return response_success(data=equipo, model=EquipoMantenimientoResponse)
+    except IntegrityError:
+        return response_error(status_code=status.HTTP_409_CONFLICT, detail="Se añadieron fotos al equipo mientras se eliminaba; inténtelo de nuevo")
     except Exception as e:
-        raise HTTPException(status_code=500, detail="Error al eliminar equipo")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail="Error al eliminar equipo")
+
+@router.post("/batch", response_model=ResponseSuccess[BatchResult[EquipoMantenimientoRead]], status_code=status.HTTP_201_CREATED, responses={207: {"description": "Algunos elementos fallaron; ver items"}, 409: {"description": "Modo todo o nada con elementos inválidos; no se creó ninguno"}}, summary="Crear equipos en lote", description="Inserta todos los elementos válidos en una sola transacción e informa el error de cada elemento inválido")
+async def create_equipos_mantenimiento_batch(lote: BatchRequest[EquipoMantenimientoCreate], session: Session = Depends(get_session)):
+    try:
+        created, errors = await create_equipos_mantenimiento(session, lote.items, lote.all_or_nothing)
+    except BatchAbortedError as e:
+        return response_batch_aborted(e.errors)
+    return response_success(data=batch_result(len(lote.items), created, errors), model=BatchResult[EquipoMantenimientoRead],
+                            status_code=status.HTTP_207_MULTI_STATUS if errors else status.HTTP_201_CREATED)
+
+@router.patch("/batch", response_model=ResponseSuccess[BatchResult[EquipoMantenimientoRead]], responses={207: {"description": "Algunos elementos fallaron; ver items"}, 409: {"description": "Modo todo o nada con elementos inválidos; no se actualizó ninguno"}}, summary="Actualizar equipos en lote", description="Cada elemento lleva su id y solo los campos a cambiar")
+async def update_equipos_mantenimiento_batch(lote: BatchRequest[EquipoMantenimientoBatchUpdate], session: Session = Depends(get_session)):
+    try:
+        updated, errors = await update_equipos_mantenimiento(session, lote.items, lote.all_or_nothing)
+    except BatchAbortedError as e:
+        return response_batch_aborted(e.errors)
+    return response_success(data=batch_result(len(lote.items), updated, errors), model=BatchResult[EquipoMantenimientoRead],
+                            status_code=status.HTTP_207_MULTI_STATUS if errors else status.HTTP_200_OK)
+
+@router.post("/batch/delete", response_model=ResponseSuccess[BatchResult[EquipoMantenimientoRead]], responses={207: {"description": "Algunos elementos fallaron; ver items"}, 409: {"description": "Modo todo o nada con elementos inválidos, o se añadieron hijos mientras se eliminaban; no se eliminó ninguno"}}, summary="Eliminar equipos en lote", description="Elimina cada equipo junto con sus fotos, como DELETE /{id}; los ids inexistentes o repetidos se informan como error y los archivos sin otras referencias se borran en segundo plano")
+async def delete_equipos_mantenimiento_batch(lote: BatchDeleteRequest, session: Session = Depends(get_session)):
+    try:
+        deleted, errors = await delete_equipos_mantenimiento(session, lote.ids, lote.all_or_nothing)
+    except BatchAbortedError as e:
+        return response_batch_aborted(e.errors)
+    except IntegrityError:
+        return response_error(status_code=status.HTTP_409_CONFLICT, detail="Se añadieron fotos a algún equipo mientras se eliminaba; inténtelo de nuevo")
+    return response_success(data=batch_result(len(lote.ids), deleted, errors), model=BatchResult[EquipoMantenimientoRead],
+                            status_code=status.HTTP_207_MULTI_STATUS if errors else status.HTTP_200_OK)
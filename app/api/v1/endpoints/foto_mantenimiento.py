@@ -1,52 +1,62 @@
-from fastapi import APIRouter, Depends, File, Form, HTTPException, UploadFile, status
+from fastapi import APIRouter, Depends, File, Form, HTTPException, Query, UploadFile, status
 from sqlmodel import Session
 from app.models.foto_mantenimiento import FotoMantenimiento
-from app.schemas.foto_mantenimiento import FotoMantenimientoCreate, FotoMantenimientoUpdate, FotoMantenimientoRead, FotoMantenimientoResponse, FotoUploadResponse
+from app.schemas.foto_mantenimiento import FotoMantenimientoCreate, FotoMantenimientoUpdate, FotoMantenimientoRead, FotoMantenimientoResponse, FotoUploadResponse, FotoMantenimientoFilter, FotoMantenimientoRegister, FotoUploadUrlRequest, FotoUploadUrlResponse
 from app.db.database import get_session
 from uuid import UUID
-from typing import List
+from typing import List, Optional
 
-from app.services.foto_mantenimiento import get_foto_mantenimientos, get_foto_mantenimiento, create_foto_mantenimiento, save_and_register_foto, update_foto_mantenimiento, delete_foto_mantenimiento
+from app.services.foto_mantenimiento import get_foto_mantenimientos, get_foto_mantenimiento, create_foto_mantenimiento, save_and_register_foto, save_and_register_fotos, update_foto_mantenimiento, delete_foto_mantenimiento, create_upload_url, register_foto, InvalidUploadError, UploadNotStoredError
 from app.utils.response import response_success, response_error
+from app.utils.pagination import InvalidCursorError, InvalidSortError, next_cursor
+from app.utils.save_file import UploadTooLargeError
 from app.schemas.types import ResponseSuccess
+from app.core.config import UPLOAD_BULK_MAX_FILES
 
 router = APIRouter(tags=["foto_mantenimiento"])
 
 @router.get("/", response_model=ResponseSuccess[List[FotoMantenimientoRead]], status_code=status.HTTP_200_OK, summary="Obtener lista de fotos de mantenimiento", description="Recupera una lista paginada de fotos de mantenimiento")
-async def read_foto_mantenimientos(skip: int = 0, limit: int = 100, session: Session = Depends(get_session)):
+async def read_foto_mantenimientos(skip: int = 0, limit: int = 100, cursor: Optional[str] = None, filtros: FotoMantenimientoFilter = Depends(),
+        sort: Optional[str] = Query(None, description='Campo de orden (created_at, categoria); prefijo "-" para orden descendente'), session: Session = Depends(get_session)):
     """
     Parámetros:
     - skip: Número de registros a omitir (default 0)
     - limit: Número máximo de registros a devolver (default 100)
+    - cursor: Cursor opaco devuelto en `next_cursor`; si se envía, se ignora skip
+    - equipos_mantenimiento_id, categoria, checksum, created_from, created_to: Filtros opcionales
+    - sort: `created_at` (default) o `categoria`, con `-` delante para orden descendente
 
     Devuelve:
     - Lista de fotos de mantenimiento con paginación
     """
-    resultados = await get_foto_mantenimientos(session, skip, limit)
-    return response_success(data=[FotoMantenimientoRead.model_validate(f, from_attributes=True) for f in resultados])
+    try:
+        resultados = await get_foto_mantenimientos(session, skip, limit, cursor, filtros, sort)
+    except (InvalidCursorError, InvalidSortError) as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    return response_success(data=resultados, model=List[FotoMantenimientoRead], next_cursor=next_cursor(resultados, limit, sort))
 
 @router.get("/{id}", response_model=ResponseSuccess[FotoMantenimientoResponse], responses={404: {"description": "Foto de mantenimiento no encontrada"}}, summary="Obtener una foto de mantenimiento por ID", description="Recupera una foto de mantenimiento específica por su ID")
 async def read_foto_mantenimiento_by_id(id: UUID, session: Session = Depends(get_session)):
     foto = await get_foto_mantenimiento(session, id)
     if not foto:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Foto de mantenimiento no encontrada")
-    return response_success(data=FotoMantenimientoResponse.model_validate(foto, from_attributes=True))
+    return response_success(data=foto, model=FotoMantenimientoResponse)
 
 @router.put("/{id}", response_model=ResponseSuccess[FotoMantenimientoResponse], responses={400: {"description": "Datos inválidos"}, 404: {"description": "Foto de mantenimiento no encontrada"}, 409: {"description": "Ya existe otra foto de mantenimiento con este nombre"}})
 async def update_foto_mantenimiento_endpoint(id: UUID, foto_update: FotoMantenimientoUpdate, session: Session = Depends(get_session)):
     db_foto = await update_foto_mantenimiento(session, id, foto_update)
     if not db_foto:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Foto de mantenimiento no encontrada")
-    return response_success(data=FotoMantenimientoResponse.model_validate(db_foto, from_attributes=True))
+    return response_success(data=db_foto, model=FotoMantenimientoResponse)
 
 @router.delete("/{id}", response_model=ResponseSuccess[FotoMantenimientoResponse], responses={404: {"description": "Foto de mantenimiento no encontrada"}, 409: {"description": "Conflicto al eliminar, foto referenciada"}, 500: {"description": "Error interno del servidor"}})
 async def delete_foto_mantenimiento_endpoint(id: UUID, session: Session = Depends(get_session)):
     foto = await delete_foto_mantenimiento(session, id)
     if not foto:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Foto de mantenimiento no encontrada")
-    return response_success(data=FotoMantenimientoResponse.model_validate(foto, from_attributes=True))
+    return response_success(data=foto, model=FotoMantenimientoResponse)
 
-@router.post("/upload", response_model=ResponseSuccess[FotoUploadResponse], status_code=status.HTTP_201_CREATED)
+@router.post("/upload", response_model=ResponseSuccess[FotoUploadResponse], status_code=status.HTTP_201_CREATED, responses={400: {"description": "El archivo no tiene una extensión ni un tipo reconocibles"}, 413: {"description": "El archivo supera el tamaño máximo permitido"}})
 async def upload_foto_mantenimiento(
     categoria: str = Form(...),
     equipos_mantenimiento_id: UUID = Form(...),
@@ -55,6 +65,48 @@ async def upload_foto_mantenimiento(
 ):
     try:
         db_foto = await save_and_register_foto(session, categoria, equipos_mantenimiento_id, file)
-        return response_success(data=FotoUploadResponse.model_validate(db_foto, from_attributes=True))
+        return response_success(data=db_foto, model=FotoUploadResponse, status_code=status.HTTP_201_CREATED)
+    except InvalidUploadError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except UploadTooLargeError as e:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=str(e))
     except Exception as e:
-        raise HTTPException(status_code=500, detail="Error al guardar archivo y registrar foto")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail="Error al guardar archivo y registrar foto")
+
+@router.post("/upload/bulk", response_model=ResponseSuccess[List[FotoUploadResponse]], status_code=status.HTTP_201_CREATED, responses={400: {"description": "Demasiados archivos, o alguno sin una extensión ni un tipo reconocibles"}, 413: {"description": "Algún archivo supera el tamaño máximo permitido"}}, summary="Subir varias fotos de un equipo", description="Guarda todas las fotos en una sola transacción; si alguna falla no se registra ninguna")
+async def upload_fotos_mantenimiento(
+    categoria: str = Form(...),
+    equipos_mantenimiento_id: UUID = Form(...),
+    files: List[UploadFile] = File(...),
+    session: Session = Depends(get_session)
+):
+    if len(files) > UPLOAD_BULK_MAX_FILES:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Se permiten como máximo {UPLOAD_BULK_MAX_FILES} archivos por petición")
+    try:
+        db_fotos = await save_and_register_fotos(session, categoria, equipos_mantenimiento_id, files)
+        return response_success(data=db_fotos, model=List[FotoUploadResponse], status_code=status.HTTP_201_CREATED)
+    except InvalidUploadError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except UploadTooLargeError as e:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail="Error al guardar archivos y registrar fotos")
+
+@router.post("/upload-url", response_model=ResponseSuccess[FotoUploadUrlResponse], status_code=status.HTTP_200_OK, summary="Preparar la subida directa de una foto", description="Devuelve una URL firmada para subir el archivo directamente al almacenamiento, sin pasar por la API")
+async def create_foto_upload_url(request: FotoUploadUrlRequest, session: Session = Depends(get_session)):
+    """
+    El cliente calcula el SHA-256 y el tamaño del archivo antes de pedir la URL. Pasos:
+    1. POST /upload-url: si `exists` es true el contenido ya está almacenado y se pasa al paso 3
+    2. Enviar el archivo a `upload.url` con `upload.method` y exactamente las cabeceras `upload.headers`
+    3. POST /register con el mismo checksum y extensión
+    """
+    key, upload = await create_upload_url(session, request)
+    return response_success(data={"key": key, "exists": upload is None, "upload": upload}, model=FotoUploadUrlResponse)
+
+@router.post("/register", response_model=ResponseSuccess[FotoUploadResponse], status_code=status.HTTP_201_CREATED, responses={409: {"description": "El archivo no está en el almacenamiento o no coincide con el checksum"}}, summary="Registrar una foto subida directamente", description="Crea la foto de mantenimiento de un archivo ya subido con la URL de /upload-url")
+async def register_foto_mantenimiento(data: FotoMantenimientoRegister, session: Session = Depends(get_session)):
+    try:
+        db_foto = await register_foto(session, data)
+    except UploadNotStoredError as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+    return response_success(data=db_foto, model=FotoUploadResponse, status_code=status.HTTP_201_CREATED)
@@ -0,0 +1,16 @@
+from fastapi import APIRouter, status
+
+from app.core.cache import catalog_cache
+from app.db.database import get_pool_stats
+from app.schemas.types import ResponseSuccess
+from app.utils.response import response_success
+
+router = APIRouter(tags=["health"])
+
+@router.get("/pool", response_model=ResponseSuccess[dict], status_code=status.HTTP_200_OK, summary="Estadísticas del pool de conexiones", description="Conexiones en uso, overflow y tiempo de espera del pool de la base de datos")
+async def read_pool_stats():
+    return response_success(data=get_pool_stats())
+
+@router.get("/cache", response_model=ResponseSuccess[dict], status_code=status.HTTP_200_OK, summary="Estadísticas de la caché de catálogos", description="Aciertos, fallos y tamaño de la caché de clientes y ubicaciones")
+async def read_cache_stats():
+    return response_success(data=catalog_cache.stats())
@@ -0,0 +1,41 @@
+import logging
+from typing import Optional
+from fastapi import APIRouter, File, HTTPException, Query, UploadFile, status
+from starlette.concurrency import run_in_threadpool
+
+from app.schemas.importer import ImportFormat, ImportKind, ImportReport
+from app.schemas.types import ResponseSuccess
+from app.services.importer import InvalidImportFileError, detect_format, import_records
+from app.utils.response import response_success
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(tags=["import"])
+
+@router.post("/{kind}", response_model=ResponseSuccess[ImportReport], status_code=status.HTTP_200_OK, responses={400: {"description": "Archivo ilegible o sin cabecera"}}, summary="Importar un archivo CSV o NDJSON", description="Carga masiva de clientes, ubicaciones o mantenimientos en una sola transacción")
+async def import_file(kind: ImportKind, file: UploadFile = File(...),
+        format: Optional[ImportFormat] = Query(None, description="csv o ndjson; por defecto se deduce de la extensión del archivo")):
+    """
+    Columnas esperadas:
+    - clientes: nombre
+    - ubicaciones: ubicacion
+    - mantenimientos: cliente (nombre), ubicacion (nombre), periodo
+
+    Los clientes, ubicaciones y mantenimientos (mismo cliente, ubicación y periodo) que ya existen
+    se omiten y se cuentan en `skipped`; los mantenimientos cuyo cliente o ubicación no existe se
+    cuentan en `unresolved`. Las filas inválidas no detienen la importación:
+    se devuelven (hasta IMPORT_MAX_REPORTED_ERRORS) en `errors`.
+    """
+    format = format or detect_format(file.filename, file.content_type)
+
+    def progress(report: ImportReport):
+        logger.info("Importando %s desde %s: %d filas leídas, %d inválidas", kind.value, file.filename, report.rows_read, report.rows_invalid)
+
+    try:
+        # UploadFile ya está volcado en un archivo temporal; se lee por lotes desde un hilo
+        report = await run_in_threadpool(import_records, file.file, kind, format, progress)
+    except InvalidImportFileError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    finally:
+        await file.close()
+    return response_success(data=report, model=ImportReport, message="Importación completada")
@@ -1,58 +1,125 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
 from sqlmodel import Session
 from app.db.database import get_session
 from uuid import UUID
-from typing import List
+from typing import List, Optional
 from sqlalchemy.exc import IntegrityError
 
-from app.schemas.mantenimiento_general import MantenimientoGeneralCreate, MantenimientoGeneralUpdate, MantenimientoGeneralRead
+from app.schemas.mantenimiento_general import MantenimientoGeneralCreate, MantenimientoGeneralUpdate, MantenimientoGeneralRead, MantenimientoGeneralReport, MantenimientoGeneralFilter, MantenimientoGeneralBatchUpdate
 from app.services.mantenimiento_general import (
     get_mantenimiento_general,
     get_mantenimiento_general_by_id,
+    get_mantenimiento_general_report,
     create_mantenimiento_general,
     update_mantenimiento_general,
-    delete_mantenimiento_general
+    delete_mantenimiento_general,
+    create_mantenimientos_general,
+    update_mantenimientos_general,
+    delete_mantenimientos_general,
+    mantenimiento_general_export_statement
 )
-from app.utils.response import response_success, response_error
-from app.schemas.types import ResponseSuccess
+from app.services.batch import BatchAbortedError, batch_result
+from app.utils.response import response_success, response_error, response_batch_aborted
+from app.utils.pagination import InvalidCursorError, InvalidSortError, next_cursor
+from app.utils.export import export_response
+from app.schemas.common import BatchDeleteRequest, BatchRequest, ExportFormat
+from app.schemas.types import BatchResult, ResponseSuccess
 
 router = APIRouter(tags=["mantenimiento_general"])
 
 @router.get("/", response_model=ResponseSuccess[List[MantenimientoGeneralRead]], status_code=status.HTTP_200_OK, summary="Obtener lista de mantenimiento general", description="Recupera una lista paginada de registros de mantenimiento general")
-async def read_mantenimiento_general(skip: int = 0, limit: int = 100, session: Session = Depends(get_session)):
+async def read_mantenimiento_general(skip: int = 0, limit: int = 100, cursor: Optional[str] = None, filtros: MantenimientoGeneralFilter = Depends(),
+        sort: Optional[str] = Query(None, description='Campo de orden (created_at, periodo); prefijo "-" para orden descendente'), session: Session = Depends(get_session)):
     """
     Parámetros:
     - skip: Número de registros a omitir (default 0)
     - limit: Número máximo de registros a devolver (default 100)
+    - cursor: Cursor opaco devuelto en `next_cursor`; si se envía, se ignora skip
+    - cliente_id, ubicacion_id, periodo, created_from, created_to: Filtros opcionales
+    - sort: `created_at` (default) o `periodo`, con `-` delante para orden descendente
 
     Devuelve:
     - Lista de registros de mantenimiento general con paginación
     """
-    resultados = await get_mantenimiento_general(session, skip, limit)
-    return response_success(data=[MantenimientoGeneralRead.model_validate(c, from_attributes=True) for c in resultados])
+    try:
+        resultados = await get_mantenimiento_general(session, skip, limit, cursor, filtros, sort)
+    except (InvalidCursorError, InvalidSortError) as e:
+        return response_error(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    return response_success(data=resultados, model=List[MantenimientoGeneralRead], next_cursor=next_cursor(resultados, limit, sort))
+
+@router.get("/export", response_class=StreamingResponse, responses={200: {"content": {"application/x-ndjson": {}, "text/csv": {}}}}, summary="Exportar mantenimientos", description="Todos los mantenimientos que cumplen los filtros, en streaming como NDJSON o CSV")
+async def export_mantenimiento_general(filtros: MantenimientoGeneralFilter = Depends(),
+        format: ExportFormat = Query(ExportFormat.ndjson, description="ndjson (una fila JSON por línea) o csv")):
+    """
+    Parámetros:
+    - cliente_id, ubicacion_id, periodo, created_from, created_to: Filtros opcionales
+    - format: `ndjson` (default) o `csv`
+
+    Devuelve todas las filas ordenadas por fecha de creación, sin paginar, con los nombres de
+    cliente y ubicación. Se leen de la base de datos por bloques, así que no hay límite de filas.
+    """
+    return export_response(mantenimiento_general_export_statement(filtros), format, "mantenimientos")
 
 @router.get("/{id}", response_model=ResponseSuccess[MantenimientoGeneralRead], responses={404: {"description": "MantenimientoGeneral no encontrado"}}, summary="Obtener un registro de mantenimiento general por ID", description="Recupera un registro específico de mantenimiento general por su ID")
 async def read_mantenimiento_general_by_id(id: UUID, session: Session = Depends(get_session)):
     mantenimiento = await get_mantenimiento_general_by_id(session, id)
     if not mantenimiento:
         return response_error(status_code=status.HTTP_404_NOT_FOUND, detail="MantenimientoGeneral no encontrado")
-    return response_success(data=MantenimientoGeneralRead.model_validate(mantenimiento, from_attributes=True))
+    return response_success(data=mantenimiento, model=MantenimientoGeneralRead)
+
+@router.get("/{id}/reporte", response_model=ResponseSuccess[MantenimientoGeneralReport], responses={404: {"description": "MantenimientoGeneral no encontrado"}}, summary="Obtener el reporte completo de un mantenimiento", description="Recupera el mantenimiento con su cliente, ubicación, equipos y las fotos de cada equipo")
+async def read_mantenimiento_general_report(id: UUID, session: Session = Depends(get_session)):
+    mantenimiento = await get_mantenimiento_general_report(session, id)
+    if not mantenimiento:
+        return response_error(status_code=status.HTTP_404_NOT_FOUND, detail="MantenimientoGeneral no encontrado")
+    return response_success(data=mantenimiento, model=MantenimientoGeneralReport)
 
 @router.post("/", response_model=ResponseSuccess[MantenimientoGeneralRead], status_code=status.HTTP_201_CREATED, responses={400: {"description": "Datos inválidos"}, 409: {"description": "Ya existe un registro con estos datos"}, 500: {"description": "Error interno del servidor"}})
 async def create_mantenimiento_general_endpoint(mantenimiento: MantenimientoGeneralCreate, session: Session = Depends(get_session)):
     db_mantenimiento = await create_mantenimiento_general(session, mantenimiento)
-    return response_success(data=MantenimientoGeneralRead.model_validate(db_mantenimiento, from_attributes=True))
+    return response_success(data=db_mantenimiento, model=MantenimientoGeneralRead, status_code=status.HTTP_201_CREATED)
 
 @router.put("/{id}", response_model=ResponseSuccess[MantenimientoGeneralRead], responses={400: {"description": "Datos inválidos"}, 404: {"description": "MantenimientoGeneral no encontrado"}, 409: {"description": "Ya existe otro registro con estos datos"}})
 async def update_mantenimiento_general_endpoint(id: UUID, mantenimiento: MantenimientoGeneralUpdate, session: Session = Depends(get_session)):
     db_mantenimiento = await update_mantenimiento_general(session, id, mantenimiento)
     if not db_mantenimiento:
         return response_error(status_code=status.HTTP_404_NOT_FOUND, detail="MantenimientoGeneral no encontrado")
-    return response_success(data=MantenimientoGeneralRead.model_validate(db_mantenimiento, from_attributes=True))
+    return response_success(data=db_mantenimiento, model=MantenimientoGeneralRead)
 
-@router.delete("/{id}", response_model=ResponseSuccess[MantenimientoGeneralRead], responses={404: {"description": "MantenimientoGeneral no encontrado"}, 409: {"description": "Conflicto al eliminar, registro referenciado"}, 500: {"description": "Error interno del servidor"}})
+@router.delete("/{id}", response_model=ResponseSuccess[MantenimientoGeneralRead], responses={404: {"description": "MantenimientoGeneral no encontrado"}, 409: {"description": "Se añadieron equipos o fotos mientras se eliminaba"}, 500: {"description": "Error interno del servidor"}},
+               summary="Eliminar mantenimiento", description="Elimina el mantenimiento con todos sus equipos y fotos; los archivos sin otras referencias se borran en segundo plano")
 async def delete_mantenimiento_general_endpoint(id: UUID, session: Session = Depends(get_session)):
     mantenimiento = await delete_mantenimiento_general(session, id)
     if not mantenimiento:
         return response_error(status_code=status.HTTP_404_NOT_FOUND, detail="MantenimientoGeneral no encontrado")
-    return response_success(data=MantenimientoGeneralRead.model_validate(mantenimiento, from_attributes=True))
\ No newline at end of file
+    return response_success(data=mantenimiento, model=MantenimientoGeneralRead)
+
+@router.post("/batch", response_model=ResponseSuccess[BatchResult[MantenimientoGeneralRead]], status_code=status.HTTP_201_CREATED, responses={207: {"description": "Algunos elementos fallaron; ver items"}, 409: {"description": "Modo todo o nada con elementos inválidos; no se creó ninguno"}}, summary="Crear mantenimientos en lote", description="Inserta todos los elementos válidos en una sola transacción e informa el error de cada elemento inválido")
+async def create_mantenimientos_general_batch(lote: BatchRequest[MantenimientoGeneralCreate], session: Session = Depends(get_session)):
+    try:
+        created, errors = await create_mantenimientos_general(session, lote.items, lote.all_or_nothing)
+    except BatchAbortedError as e:
+        return response_batch_aborted(e.errors)
+    return response_success(data=batch_result(len(lote.items), created, errors), model=BatchResult[MantenimientoGeneralRead],
+                            status_code=status.HTTP_207_MULTI_STATUS if errors else status.HTTP_201_CREATED)
+
+@router.patch("/batch", response_model=ResponseSuccess[BatchResult[MantenimientoGeneralRead]], responses={207: {"description": "Algunos elementos fallaron; ver items"}, 409: {"description": "Modo todo o nada con elementos inválidos; no se actualizó ninguno"}}, summary="Actualizar mantenimientos en lote", description="Cada elemento lleva su id y solo los campos a cambiar")
+async def update_mantenimientos_general_batch(lote: BatchRequest[MantenimientoGeneralBatchUpdate], session: Session = Depends(get_session)):
+    try:
+        updated, errors = await update_mantenimientos_general(session, lote.items, lote.all_or_nothing)
+    except BatchAbortedError as e:
+        return response_batch_aborted(e.errors)
+    return response_success(data=batch_result(len(lote.items), updated, errors), model=BatchResult[MantenimientoGeneralRead],
+                            status_code=status.HTTP_207_MULTI_STATUS if errors else status.HTTP_200_OK)
+
+@router.post("/batch/delete", response_model=ResponseSuccess[BatchResult[MantenimientoGeneralRead]], responses={207: {"description": "Algunos elementos fallaron; ver items"}, 409: {"description": "Modo todo o nada con elementos inválidos, o se añadieron hijos mientras se eliminaban; no se eliminó ninguno"}}, summary="Eliminar mantenimientos en lote", description="Elimina cada mantenimiento junto con sus equipos y fotos, como DELETE /{id}; los ids inexistentes o repetidos se informan como error y los archivos sin otras referencias se borran en segundo plano")
+async def delete_mantenimientos_general_batch(lote: BatchDeleteRequest, session: Session = Depends(get_session)):
+    try:
+        deleted, errors = await delete_mantenimientos_general(session, lote.ids, lote.all_or_nothing)
+    except BatchAbortedError as e:
+        return response_batch_aborted(e.errors)
+    except IntegrityError:
+        return response_error(status_code=status.HTTP_409_CONFLICT, detail="Se añadieron equipos o fotos a algún mantenimiento mientras se eliminaba; inténtelo de nuevo")
+    return response_success(data=batch_result(len(lote.ids), deleted, errors), model=BatchResult[MantenimientoGeneralRead],
+                            status_code=status.HTTP_207_MULTI_STATUS if errors else status.HTTP_200_OK)
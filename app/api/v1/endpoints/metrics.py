@@ -0,0 +1,12 @@
+from fastapi import APIRouter
+from starlette.responses import Response
+
+from app.core.metrics import render_metrics
+
+router = APIRouter(tags=["metrics"])
+
+@router.get("/metrics", include_in_schema=False)
+async def read_metrics():
+    """Métricas de la aplicación en formato de texto de Prometheus."""
+    content, media_type = render_metrics()
+    return Response(content=content, media_type=media_type)
@@ -0,0 +1,36 @@
+from typing import List
+from fastapi import APIRouter, HTTPException, Query, status
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import FileResponse, PlainTextResponse
+
+from app.core.profiling import SORT_KEYS, profile_store
+from app.schemas.types import ResponseSuccess
+from app.utils.response import response_success
+
+router = APIRouter(tags=["profiling"])
+
+@router.get("/", response_model=ResponseSuccess[List[dict]], status_code=status.HTTP_200_OK, summary="Listar perfiles guardados", description="Perfiles capturados con la cabecera X-Profile o por muestreo, del más reciente al más antiguo")
+async def read_profiles():
+    return response_success(data=await run_in_threadpool(profile_store.list))
+
+@router.get("/{profile_id}", response_class=PlainTextResponse, responses={404: {"description": "Perfil no encontrado"}}, summary="Obtener el perfil de una petición", description="Resumen de pstats de la petición, o el archivo .prof completo con raw=true")
+async def read_profile(profile_id: str, sort: str = Query("cumulative", description="cumulative, tottime o calls"),
+        limit: int = Query(50, gt=0, le=1000, description="Número de funciones del resumen"), raw: bool = False):
+    """
+    Parámetros:
+    - profile_id: Id del perfil, al final de la cabecera X-Profile-URL de la respuesta perfilada
+    - sort: Orden del resumen
+    - limit: Número de funciones a mostrar
+    - raw: Descargar el .prof para abrirlo con snakeviz o `python -m pstats`
+    """
+    if sort not in SORT_KEYS:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"sort debe ser uno de: {', '.join(SORT_KEYS)}")
+    if raw:
+        path = profile_store.raw_path(profile_id)
+        if path is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Perfil no encontrado")
+        return FileResponse(path, media_type="application/octet-stream", filename=f"{profile_id}.prof")
+    report = await run_in_threadpool(profile_store.report, profile_id, sort, limit)
+    if report is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Perfil no encontrado")
+    return PlainTextResponse(report)
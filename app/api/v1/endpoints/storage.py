@@ -0,0 +1,42 @@
+from fastapi import APIRouter, HTTPException, Query, Request, status
+from fastapi.responses import RedirectResponse
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import STORAGE_PRESIGN_EXPIRES_SECONDS
+from app.core.storage import storage
+from app.utils.response import response_success
+from app.utils.save_file import UploadTooLargeError, discard_file, stream_to_temp
+
+# Subida directa al almacenamiento local (solo con STORAGE_BACKEND=local): el equivalente al PUT
+# firmado de S3 para las URLs de /foto_mantenimiento/upload-url
+router = APIRouter(tags=["storage"])
+
+# Con STORAGE_BACKEND=s3, /media/<clave> redirige al objeto del bucket
+media_router = APIRouter(tags=["media"])
+
+
+@router.put("/upload/{key:path}", status_code=status.HTTP_201_CREATED, responses={400: {"description": "El contenido no coincide con el checksum o el tamaño firmados"}, 403: {"description": "Firma inválida o caducada"}, 413: {"description": "El cuerpo supera el tamaño firmado"}}, summary="Subir un archivo con una URL firmada", description="Destino de las URLs de subida que devuelve /foto_mantenimiento/upload-url con almacenamiento local")
+async def upload_object(key: str, request: Request, checksum: str = Query(...), size: int = Query(...), expires: int = Query(...), signature: str = Query(...)):
+    if not storage.verify_upload(key, checksum, size, expires, signature):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Firma inválida o caducada")
+    try:
+        stored = await stream_to_temp(request.stream(), storage.temp_directory, max_bytes=size)
+    except UploadTooLargeError as e:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=str(e))
+    if stored.size != size or stored.checksum != checksum:
+        await run_in_threadpool(discard_file, stored.path)
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="El contenido no coincide con el checksum o el tamaño firmados")
+    # Si el contenido ya estaba solo se toca; la fila se crea después en /foto_mantenimiento/register
+    await run_in_threadpool(storage.promote, stored.path, key)
+    return response_success(data={"key": key, "size": stored.size, "checksum": stored.checksum}, status_code=status.HTTP_201_CREATED)
+
+
+@media_router.api_route("/{key:path}", methods=["GET", "HEAD"], status_code=status.HTTP_307_TEMPORARY_REDIRECT, include_in_schema=False)
+async def redirect_media(key: str):
+    # Las URLs guardadas en la base de datos (/media/...) siguen funcionando sin servir los bytes.
+    # La redirección se cachea la mitad de lo que dura la firma
+    return RedirectResponse(
+        storage.presign_download(key, STORAGE_PRESIGN_EXPIRES_SECONDS),
+        status_code=status.HTTP_307_TEMPORARY_REDIRECT,
+        headers={"Cache-Control": f"private, max-age={STORAGE_PRESIGN_EXPIRES_SECONDS // 2}"},
+    )
@@ -1,13 +1,15 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlmodel import Session
 from app.models.ubicacion import Ubicacion
-from app.schemas.ubicacion import UbicacionCreate, UbicacionUpdate, UbicacionRead
+from app.schemas.ubicacion import UbicacionCreate, UbicacionUpdate, UbicacionRead, UbicacionFilter
 from app.db.database import get_session
 from uuid import UUID
-from typing import List
+from typing import List, Optional
 from sqlalchemy.exc import IntegrityError
 
+from app.core.config import SEARCH_MAX_LIMIT
 from app.services.ubicacion import (
+    suggest_ubicaciones,
     get_ubicaciones,
     get_ubicacion,
     create_ubicacion,
@@ -15,6 +17,7 @@ from app.services.ubicacion import (
     delete_ubicacion
 )
 from app.utils.response import response_success, response_error
+from app.utils.pagination import InvalidCursorError, InvalidSortError, next_cursor
 from app.schemas.types import ResponseSuccess
 
 router = APIRouter(tags=["ubicacion"])
@@ -29,15 +32,33 @@ router = APIRouter(tags=["ubicacion"])
 async def read_ubicaciones(
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
+    filtros: UbicacionFilter = Depends(),
+    sort: Optional[str] = Query(None, description='Campo de orden (created_at, ubicacion); prefijo "-" para orden descendente'),
     session: Session = Depends(get_session)
 ):
     try:
-        resultados = await get_ubicaciones(session, skip, limit)
-        ubicaciones = [UbicacionRead.model_validate(u, from_attributes=True) for u in resultados]
-        return response_success(data=ubicaciones)
+        resultados = await get_ubicaciones(session, skip, limit, cursor, filtros, sort)
+        return response_success(data=resultados, model=List[UbicacionRead], next_cursor=next_cursor(resultados, limit, sort))
+    except (InvalidCursorError, InvalidSortError) as e:
+        return response_error(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Error al obtener ubicaciones")
 
+@router.get(
+    "/autocompletar",
+    response_model=ResponseSuccess[List[UbicacionRead]],
+    summary="Autocompletar ubicaciones",
+    description="Ubicaciones cuyo nombre coincide con el texto sin distinguir tildes ni mayúsculas, ordenadas por relevancia"
+)
+async def autocomplete_ubicaciones(
+    q: str = Query(..., min_length=1, max_length=100, description="Texto escrito por el usuario"),
+    limit: int = Query(10, ge=1, le=SEARCH_MAX_LIMIT, description="Número máximo de sugerencias"),
+    session: Session = Depends(get_session)
+):
+    resultados = await suggest_ubicaciones(session, q, limit)
+    return response_success(data=resultados, model=List[UbicacionRead])
+
 @router.get(
     "/{id}",
     response_model=ResponseSuccess[UbicacionRead],
@@ -50,7 +71,7 @@ async def read_ubicacion_by_id(id: UUID, session: Session = Depends(get_session)
         ubicacion = await get_ubicacion(session, id)
         if not ubicacion:
             return response_error(status_code=status.HTTP_404_NOT_FOUND, detail="Ubicación no encontrada")
-        return response_success(data=UbicacionRead.model_validate(ubicacion, from_attributes=True))
+        return response_success(data=ubicacion, model=UbicacionRead)
     except Exception as e:
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Error al obtener ubicación")
 
@@ -72,9 +93,9 @@ async def create_ubicacion_endpoint(
 ):
     try:
         db_ubicacion = await create_ubicacion(session, ubicacion_create)
-        return response_success(data=UbicacionRead.model_validate(db_ubicacion, from_attributes=True))
+        return response_success(data=db_ubicacion, model=UbicacionRead, status_code=status.HTTP_201_CREATED)
     except IntegrityError:
-        return response_error(status_code=status.HTTP_409_CONFLICT, message="Error de integridad: es posible que la ubicación ya exista o haya datos conflictivos.")
+        return response_error(status_code=status.HTTP_409_CONFLICT, detail="Error de integridad: es posible que la ubicación ya exista o haya datos conflictivos.")
     except Exception as e:
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Error interno del servidor al crear ubicación")
 
@@ -98,7 +119,7 @@ async def update_ubicacion_endpoint(
         db_ubicacion = await update_ubicacion(session, id, ubicacion_update)
         if not db_ubicacion:
             return response_error(status_code=status.HTTP_404_NOT_FOUND, detail="Ubicación no encontrada")
-        return response_success(data=UbicacionRead.model_validate(db_ubicacion, from_attributes=True))
+        return response_success(data=db_ubicacion, model=UbicacionRead)
     except IntegrityError:
         return response_error(status_code=status.HTTP_409_CONFLICT, detail="Error de integridad al actualizar ubicación: posible nombre duplicado o datos conflictivos.")
     except Exception as e:
@@ -120,7 +141,7 @@ async def delete_ubicacion_endpoint(id: UUID, session: Session = Depends(get_ses
         ubicacion = await delete_ubicacion(session, id)
         if not ubicacion:
             return response_error(status_code=status.HTTP_404_NOT_FOUND, detail="Ubicación no encontrada")
-        return response_success(data=UbicacionRead.model_validate(ubicacion, from_attributes=True))
+        return response_success(data=ubicacion, model=UbicacionRead)
     except IntegrityError:
         return response_error(status_code=status.HTTP_409_CONFLICT, detail="No se puede eliminar la ubicación. Puede estar referenciada por otros datos.")
     except Exception as e:
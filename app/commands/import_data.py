@@ -0,0 +1,39 @@
+"""
+Importación masiva desde la línea de comandos, sin pasar por la API:
+
+    python -m app.commands.import_data clientes clientes.csv
+    python -m app.commands.import_data mantenimientos historico.ndjson --format ndjson
+"""
+import argparse
+import json
+import sys
+
+from app.schemas.importer import ImportFormat, ImportKind, ImportReport
+from app.services.importer import InvalidImportFileError, detect_format, import_records
+
+
+def _print_progress(report: ImportReport):
+    print(f"\r{report.rows_read} filas leídas, {report.rows_invalid} inválidas", end="", file=sys.stderr, flush=True)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Importa clientes, ubicaciones o mantenimientos desde CSV o NDJSON")
+    parser.add_argument("kind", choices=[kind.value for kind in ImportKind])
+    parser.add_argument("path", help="Archivo a importar")
+    parser.add_argument("--format", choices=[format.value for format in ImportFormat], help="Por defecto se deduce de la extensión")
+    args = parser.parse_args(argv)
+
+    format = ImportFormat(args.format) if args.format else detect_format(args.path)
+    try:
+        with open(args.path, "rb") as stream:
+            report = import_records(stream, ImportKind(args.kind), format, progress=_print_progress)
+    except InvalidImportFileError as e:
+        print(f"\nError: {e}", file=sys.stderr)
+        return 1
+    print(file=sys.stderr)
+    print(json.dumps(report.model_dump(mode="json"), ensure_ascii=False, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,82 @@
+"""
+Tareas de arranque que deben ejecutarse una vez por despliegue y no una vez por worker:
+
+    python -m app.commands.prestart
+
+gunicorn.conf.py las ejecuta en el proceso maestro antes de crear los workers. Este comando sirve
+para lanzarlas como paso separado (job de migración, init container) junto con SERVER_PRESTART=false.
+"""
+import logging
+import os
+import sys
+
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import text
+from sqlmodel import SQLModel
+
+from app.core.config import DB_AUTO_CREATE
+from app.db.database import engine
+# Importar los modelos para registrar sus tablas en SQLModel.metadata
+from app.models import cliente, equipo_mantenimiento, foto_mantenimiento, mantenimiento_general, media_blob, ubicacion  # noqa: F401
+
+logger = logging.getLogger(__name__)
+
+ALEMBIC_CONFIG = os.getenv("ALEMBIC_CONFIG") or os.path.join(os.path.dirname(__file__), "..", "..", "alembic.ini")
+
+# Clave del bloqueo asesor de PostgreSQL que serializa las migraciones entre réplicas que arrancan a la vez
+MIGRATION_LOCK_KEY = 0x6D616E74
+
+
+def migrate():
+    """alembic upgrade head y, si DB_AUTO_CREATE, create_all para las tablas sin migración."""
+    config = Config(ALEMBIC_CONFIG)
+    config.attributes["configure_logger"] = False
+    with engine.connect() as connection:
+        postgres = connection.dialect.name == "postgresql"
+        if postgres:
+            connection.execute(text("SELECT pg_advisory_lock(:key)"), {"key": MIGRATION_LOCK_KEY})
+            # El bloqueo es de sesión; Alembic tiene que recibir la conexión fuera de una transacción
+            # para gestionar las suyas (autocommit_block en los CREATE INDEX CONCURRENTLY)
+            connection.commit()
+        try:
+            config.attributes["connection"] = connection
+            command.upgrade(config, "head")
+            if DB_AUTO_CREATE:
+                SQLModel.metadata.create_all(connection)
+            connection.commit()
+        finally:
+            if postgres:
+                # Si la migración falló la transacción está abortada; el bloqueo sobrevive al rollback
+                connection.rollback()
+                connection.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": MIGRATION_LOCK_KEY})
+                connection.commit()
+
+
+def reset_multiprocess_metrics():
+    """Borra los archivos de métricas de workers de un arranque anterior (PROMETHEUS_MULTIPROC_DIR)."""
+    directory = os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+    if not directory:
+        return
+    os.makedirs(directory, exist_ok=True)
+    for entry in os.scandir(directory):
+        if entry.name.endswith(".db"):
+            os.remove(entry.path)
+
+
+def run_prestart():
+    migrate()
+    reset_multiprocess_metrics()
+    # El maestro no debe pasar conexiones abiertas a los workers al hacer fork
+    engine.dispose()
+
+
+def main() -> int:
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s %(name)s: %(message)s")
+    run_prestart()
+    logger.info("Tareas de arranque completadas")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
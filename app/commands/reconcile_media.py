@@ -0,0 +1,49 @@
+"""
+Pasada completa del reconciliador de media (app.workers.media_reconciler) sin esperar al ciclo
+periódico, por ejemplo tras restaurar una copia de la base de datos o del almacenamiento de media:
+
+    python -m app.commands.reconcile_media
+    python -m app.commands.reconcile_media --shard ab --keep-rows
+"""
+import argparse
+import asyncio
+import json
+import sys
+from dataclasses import asdict
+
+from app.core.config import MEDIA_RECONCILE_DELETE_ROWS, MEDIA_RECONCILE_GRACE_SECONDS
+# Importar los modelos para que SQLAlchemy resuelva las relaciones entre ellos
+from app.models import cliente, equipo_mantenimiento, foto_mantenimiento, mantenimiento_general, media_blob, ubicacion  # noqa: F401
+from app.workers.media_reconciler import SHARDS, reconcile_shard
+
+
+async def reconcile(shards, grace: int, delete_rows: bool):
+    totals = {"files_removed": 0, "rows_removed": 0, "missing_variants": 0, "skipped": []}
+    for shard in shards:
+        result = await reconcile_shard(shard, grace, delete_rows)
+        if result is None:
+            totals["skipped"].append(shard)
+            continue
+        for key, value in asdict(result).items():
+            if key in totals:
+                totals[key] += value
+        print(f"\r{shard}", end="", file=sys.stderr, flush=True)
+    print(file=sys.stderr)
+    return totals
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Borra archivos de media sin fila y fotos sin archivo")
+    parser.add_argument("--shard", action="append", choices=SHARDS, help="Directorio de prefijo (repetible; por defecto todos)")
+    parser.add_argument("--grace", type=int, default=MEDIA_RECONCILE_GRACE_SECONDS, help="Segundos durante los que se respeta lo reciente")
+    parser.add_argument("--keep-rows", action="store_true", default=not MEDIA_RECONCILE_DELETE_ROWS, help="Solo borrar archivos, no fotos sin archivo")
+    args = parser.parse_args(argv)
+
+    # Las variantes perdidas solo se regeneran dentro de la aplicación (pool de image_variants); aquí se cuentan
+    totals = asyncio.run(reconcile(args.shard or SHARDS, args.grace, not args.keep_rows))
+    print(json.dumps(totals, indent=2))
+    return 1 if totals["skipped"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,197 @@
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from app.core.config import CACHE_BACKEND, CACHE_MAX_ENTRIES, CACHE_TOMBSTONE_SECONDS, CACHE_TTL_SECONDS, REDIS_URL
+
+# Valor que deja una invalidación; se lee como un fallo
+TOMBSTONE = "__tombstone__"
+
+
+class MemoryBackend:
+    """LRU en memoria del proceso con expiración por entrada."""
+
+    name = "memory"
+
+    def __init__(self, max_entries: int = CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    async def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    async def set(self, key: str, value: Any, ttl: int):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    async def add(self, key: str, value: Any, ttl: int) -> bool:
+        """Guarda `value` solo si no hay una entrada vigente (valor o marca de invalidación)."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                return False
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            return True
+
+    async def delete(self, key: str):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    async def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def size(self) -> Optional[int]:
+        return len(self._entries)
+
+    async def close(self):
+        pass
+
+
+class RedisBackend:
+    """
+    Backend sobre un cliente compatible con redis.asyncio (get, set con ex, delete, scan_iter).
+    Acepta cualquier cliente con esa interfaz, p. ej. fakeredis en pruebas.
+    """
+
+    name = "redis"
+
+    def __init__(self, client, prefix: str = "cache:"):
+        self.client = client
+        self.prefix = prefix
+
+    async def get(self, key: str) -> Optional[Any]:
+        raw = await self.client.get(self.prefix + key)
+        return json.loads(raw) if raw is not None else None
+
+    async def set(self, key: str, value: Any, ttl: int):
+        await self.client.set(self.prefix + key, json.dumps(value), ex=ttl)
+
+    async def add(self, key: str, value: Any, ttl: int) -> bool:
+        """SET NX: atómico frente a una invalidación concurrente desde otro worker."""
+        return bool(await self.client.set(self.prefix + key, json.dumps(value), ex=ttl, nx=True))
+
+    async def delete(self, key: str):
+        await self.client.delete(self.prefix + key)
+
+    async def clear(self):
+        async for key in self.client.scan_iter(match=self.prefix + "*"):
+            await self.client.delete(key)
+
+    def size(self) -> Optional[int]:
+        return None
+
+    async def close(self):
+        await self.client.aclose()
+
+
+class Cache:
+    """
+    Caché de lectura con contadores de aciertos y fallos por espacio de nombres.
+    Los valores deben ser serializables a JSON (p. ej. model_dump(mode="json")).
+
+    Una lectura que falla consulta la base de datos y luego llama a set; si entretanto otra petición
+    actualizó la fila e invalidó la clave, ese set guardaría el valor antiguo. Por eso invalidate deja
+    una marca durante `tombstone_ttl` segundos y set solo escribe si la clave está libre.
+    """
+
+    def __init__(self, backend=None, ttl: int = CACHE_TTL_SECONDS, tombstone_ttl: int = CACHE_TOMBSTONE_SECONDS):
+        self.backend = backend
+        self.ttl = ttl
+        self.tombstone_ttl = tombstone_ttl
+        self._lock = threading.Lock()
+        self._hits: Dict[str, int] = {}
+        self._misses: Dict[str, int] = {}
+
+    @property
+    def enabled(self) -> bool:
+        return self.backend is not None
+
+    def _count(self, counters: Dict[str, int], namespace: str):
+        with self._lock:
+            counters[namespace] = counters.get(namespace, 0) + 1
+
+    async def get(self, namespace: str, key: Any) -> Optional[Any]:
+        if not self.enabled:
+            return None
+        value = await self.backend.get(f"{namespace}:{key}")
+        if value == TOMBSTONE:
+            value = None
+        self._count(self._hits if value is not None else self._misses, namespace)
+        return value
+
+    async def set(self, namespace: str, key: Any, value: Any) -> bool:
+        """Guarda el valor leído de la base de datos salvo que la clave tenga un valor o una invalidación reciente."""
+        if not self.enabled:
+            return False
+        return await self.backend.add(f"{namespace}:{key}", value, self.ttl)
+
+    async def invalidate(self, namespace: str, key: Any):
+        """Llamar después del commit de la escritura."""
+        if not self.enabled:
+            return
+        if self.tombstone_ttl > 0:
+            await self.backend.set(f"{namespace}:{key}", TOMBSTONE, self.tombstone_ttl)
+        else:
+            await self.backend.delete(f"{namespace}:{key}")
+
+    async def clear(self):
+        if self.enabled:
+            await self.backend.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            hits, misses = dict(self._hits), dict(self._misses)
+        total_hits, total_misses = sum(hits.values()), sum(misses.values())
+        lookups = total_hits + total_misses
+        return {
+            "backend": self.backend.name if self.enabled else "none",
+            "ttl_seconds": self.ttl,
+            "size": self.backend.size() if self.enabled else None,
+            "hits": total_hits,
+            "misses": total_misses,
+            "hit_ratio": round(total_hits / lookups, 4) if lookups else 0.0,
+            "namespaces": {
+                namespace: {"hits": hits.get(namespace, 0), "misses": misses.get(namespace, 0)}
+                for namespace in sorted(set(hits) | set(misses))
+            },
+        }
+
+    async def close(self):
+        if self.enabled:
+            await self.backend.close()
+
+
+def _build_backend(kind: str):
+    if kind == "none":
+        return None
+    if kind == "memory":
+        return MemoryBackend()
+    if kind == "redis":
+        try:
+            from redis import asyncio as redis_asyncio
+        except ImportError as e:
+            raise RuntimeError("CACHE_BACKEND=redis requiere el paquete 'redis'") from e
+        return RedisBackend(redis_asyncio.from_url(REDIS_URL))
+    raise ValueError(f"CACHE_BACKEND inválido: {kind!r} (opciones: memory, redis, none)")
+
+
+catalog_cache = Cache(_build_backend(CACHE_BACKEND))
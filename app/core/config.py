@@ -1,6 +1,184 @@
 import os
+import secrets
 from dotenv import load_dotenv
 
 load_dotenv()
 
-SQLMODEL_DATABASE_URL = os.getenv("DATABASE_URL")
\ No newline at end of file
+SQLMODEL_DATABASE_URL = os.getenv("DATABASE_URL")
+
+
+def _env_bool(name: str, default: bool = False) -> bool:
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+def _env_int(name: str, default: int) -> int:
+    value = os.getenv(name)
+    return int(value) if value not in (None, "") else default
+
+
+def _env_float(name: str, default: float) -> float:
+    value = os.getenv(name)
+    return float(value) if value not in (None, "") else default
+
+
+def _to_async_url(url):
+    """Deriva la URL del driver async (asyncpg / aiosqlite) a partir de DATABASE_URL."""
+    if not url:
+        return url
+    for prefix in ("postgresql+psycopg2://", "postgresql://", "postgres://"):
+        if url.startswith(prefix):
+            return "postgresql+asyncpg://" + url[len(prefix):]
+    if url.startswith("sqlite://"):
+        return "sqlite+aiosqlite://" + url[len("sqlite://"):]
+    return url
+
+
+# Modo de base de datos: "sync" (Session de SQLModel) o "async" (AsyncSession sobre asyncpg)
+DB_ASYNC = _env_bool("DB_ASYNC")
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL") or _to_async_url(SQLMODEL_DATABASE_URL)
+
+
+# Perfil del motor de base de datos: "dev" o "prod". Cada valor puede sobreescribirse con su variable DB_*
+DB_PROFILE = os.getenv("DB_PROFILE", "dev").strip().lower()
+
+DB_PROFILES = {
+    "dev": {
+        "pool_size": 5,
+        "max_overflow": 5,
+        "pool_timeout": 30,
+        "pool_recycle": 1800,
+        "pool_pre_ping": True,
+        "statement_timeout_ms": 0,
+        "echo": False,
+    },
+    "prod": {
+        "pool_size": 10,
+        "max_overflow": 20,
+        "pool_timeout": 10,
+        "pool_recycle": 1800,
+        "pool_pre_ping": True,
+        "statement_timeout_ms": 15000,
+        "echo": False,
+    },
+}
+
+if DB_PROFILE not in DB_PROFILES:
+    raise ValueError(f"DB_PROFILE inválido: {DB_PROFILE!r} (opciones: {', '.join(DB_PROFILES)})")
+
+_db_preset = DB_PROFILES[DB_PROFILE]
+DB_ENGINE_SETTINGS = {
+    "pool_size": _env_int("DB_POOL_SIZE", _db_preset["pool_size"]),
+    "max_overflow": _env_int("DB_MAX_OVERFLOW", _db_preset["max_overflow"]),
+    "pool_timeout": _env_int("DB_POOL_TIMEOUT", _db_preset["pool_timeout"]),
+    "pool_recycle": _env_int("DB_POOL_RECYCLE", _db_preset["pool_recycle"]),
+    "pool_pre_ping": _env_bool("DB_POOL_PRE_PING", _db_preset["pool_pre_ping"]),
+    "statement_timeout_ms": _env_int("DB_STATEMENT_TIMEOUT_MS", _db_preset["statement_timeout_ms"]),
+    "echo": _env_bool("DB_ECHO", _db_preset["echo"]),
+}
+
+# Crear tablas con create_all al arrancar. En producción el esquema lo gestiona Alembic (alembic upgrade head)
+DB_AUTO_CREATE = _env_bool("DB_AUTO_CREATE", DB_PROFILE == "dev")
+
+# Archivos subidos
+MEDIA_ROOT = os.getenv("MEDIA_ROOT", "media")
+UPLOAD_MAX_BYTES = _env_int("UPLOAD_MAX_BYTES", 20 * 1024 * 1024)
+UPLOAD_CHUNK_SIZE = _env_int("UPLOAD_CHUNK_SIZE", 1024 * 1024)
+UPLOAD_BULK_MAX_FILES = _env_int("UPLOAD_BULK_MAX_FILES", 50)
+
+# Variantes de imagen (miniatura y tamaño medio) generadas en un pool de procesos
+IMAGE_VARIANT_WORKERS = _env_int("IMAGE_VARIANT_WORKERS", 2)
+IMAGE_VARIANT_SIZES = {
+    "thumbnail": _env_int("IMAGE_THUMBNAIL_SIZE", 256),
+    "medium": _env_int("IMAGE_MEDIUM_SIZE", 1024),
+}
+
+# Almacenamiento de los archivos de media: "local" (MEDIA_ROOT, servido en /media) o "s3" (AWS S3, MinIO u
+# otro compatible; requiere el paquete boto3 y toma las credenciales de la cadena estándar de AWS). Con "s3"
+# /media/<clave> redirige a una URL firmada. Las URLs firmadas de subida y descarga caducan a los
+# STORAGE_PRESIGN_EXPIRES_SECONDS. En local la subida directa va a /api/v1/storage/upload con una firma HMAC
+# hecha con STORAGE_SIGNING_SECRET: definirlo con varias réplicas o con workers sin SERVER_PRELOAD, si no
+# cada proceso genera el suyo y solo acepta sus propias firmas
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "local").strip().lower()
+STORAGE_PRESIGN_EXPIRES_SECONDS = _env_int("STORAGE_PRESIGN_EXPIRES_SECONDS", 900)
+STORAGE_SIGNING_SECRET = os.getenv("STORAGE_SIGNING_SECRET") or secrets.token_hex(32)
+S3_BUCKET = os.getenv("S3_BUCKET", "media")
+S3_ENDPOINT_URL = os.getenv("S3_ENDPOINT_URL") or None
+S3_REGION = os.getenv("S3_REGION") or None
+# "path" para MinIO y la mayoría de servicios compatibles sin DNS por bucket
+S3_ADDRESSING_STYLE = os.getenv("S3_ADDRESSING_STYLE", "auto")
+# Base pública (CDN o bucket público) para descargas sin firmar; sin valor se firman
+S3_PUBLIC_URL = os.getenv("S3_PUBLIC_URL") or None
+
+# Borrado de archivos de media: las peticiones solo los renombran a la papelera (.trash-*) y un recolector
+# en segundo plano los elimina (con S3, sin renombrado atómico, se borran dentro de la petición). El reconciliador revisa cada MEDIA_RECONCILE_INTERVAL_SECONDS un solo
+# directorio de prefijo (blobs/ab y variants/ab) o los archivos anteriores a los blobs, así que un ciclo
+# completo son 257 intervalos (unas 21 h con 300 s); 0 lo desactiva. Borra archivos sin fila y, con
+# MEDIA_RECONCILE_DELETE_ROWS, fotos cuyo archivo falta. Lo más reciente que el margen se respeta: puede
+# ser una subida en curso o una subida directa aún sin registrar (el margen debe superar
+# STORAGE_PRESIGN_EXPIRES_SECONDS)
+MEDIA_RECONCILE_INTERVAL_SECONDS = _env_int("MEDIA_RECONCILE_INTERVAL_SECONDS", 300)
+MEDIA_RECONCILE_GRACE_SECONDS = _env_int("MEDIA_RECONCILE_GRACE_SECONDS", 3600)
+MEDIA_RECONCILE_DELETE_ROWS = _env_bool("MEDIA_RECONCILE_DELETE_ROWS", True)
+
+# Caché de lectura para catálogos (cliente, ubicación). "memory": LRU por proceso; "redis": compartida
+# entre workers (requiere el paquete redis). "none" la desactiva. Con "memory" cada worker invalida
+# solo su copia, así que otro worker puede servir un valor antiguo como mucho CACHE_TTL_SECONDS.
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "memory").strip().lower()
+CACHE_TTL_SECONDS = _env_int("CACHE_TTL_SECONDS", 300)
+CACHE_MAX_ENTRIES = _env_int("CACHE_MAX_ENTRIES", 1024)
+# Una invalidación deja una marca durante estos segundos: una lectura que leyó la base de datos antes
+# de la escritura no puede volver a guardar el valor antiguo (debe superar la duración de esa lectura)
+CACHE_TOMBSTONE_SECONDS = _env_int("CACHE_TOMBSTONE_SECONDS", 5)
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+
+# Cache-Control de /media: los blobs y variantes se nombran por su hash, así que nunca cambian
+MEDIA_IMMUTABLE_MAX_AGE = _env_int("MEDIA_IMMUTABLE_MAX_AGE", 365 * 24 * 3600)
+
+# Tamaño máximo de los lotes de creación/actualización/borrado
+BATCH_MAX_ITEMS = _env_int("BATCH_MAX_ITEMS", 1000)
+
+# Máximo de sugerencias por petición en los endpoints de autocompletado
+SEARCH_MAX_LIMIT = _env_int("SEARCH_MAX_LIMIT", 50)
+
+# Importación masiva (CSV/NDJSON): filas validadas y enviadas a la tabla de staging por lote
+IMPORT_BATCH_SIZE = _env_int("IMPORT_BATCH_SIZE", 5000)
+IMPORT_MAX_REPORTED_ERRORS = _env_int("IMPORT_MAX_REPORTED_ERRORS", 100)
+
+# Exportación en streaming: filas leídas por bloque del cursor del lado del servidor
+EXPORT_CHUNK_SIZE = _env_int("EXPORT_CHUNK_SIZE", 1000)
+
+# Métricas de Prometheus en /metrics (con varios workers, definir también PROMETHEUS_MULTIPROC_DIR)
+METRICS_ENABLED = _env_bool("METRICS_ENABLED", True)
+
+# Consultas más lentas que este umbral se registran en el logger app.db.slow_query (0 lo desactiva)
+SLOW_QUERY_MS = _env_int("SLOW_QUERY_MS", 500)
+
+# Perfilado con cProfile bajo demanda: cabecera X-Profile (con PROFILING_TOKEN como valor si está
+# definido) o una fracción aleatoria de las peticiones. Los perfiles se guardan por id de petición
+PROFILING_ENABLED = _env_bool("PROFILING_ENABLED")
+PROFILING_SAMPLE_RATE = _env_float("PROFILING_SAMPLE_RATE", 0.0)
+PROFILING_TOKEN = os.getenv("PROFILING_TOKEN") or None
+PROFILE_DIR = os.getenv("PROFILE_DIR", "profiles")
+PROFILE_MAX_STORED = _env_int("PROFILE_MAX_STORED", 200)
+
+# Servidor de producción (gunicorn.conf.py): workers uvicorn, app precargada en el maestro, reciclado
+# de cada worker tras SERVER_MAX_REQUESTS peticiones (con jitter para que no se reinicien a la vez) y
+# tiempo de gracia para terminar las peticiones en curso. Cada worker abre su propio pool de conexiones
+# (hasta DB_POOL_SIZE + DB_MAX_OVERFLOW), así que el total escala con WEB_CONCURRENCY
+WEB_CONCURRENCY = _env_int("WEB_CONCURRENCY", os.cpu_count() or 1)
+SERVER_BIND = os.getenv("SERVER_BIND", "0.0.0.0:8000")
+SERVER_PRELOAD = _env_bool("SERVER_PRELOAD", True)
+SERVER_MAX_REQUESTS = _env_int("SERVER_MAX_REQUESTS", 10000)
+SERVER_MAX_REQUESTS_JITTER = _env_int("SERVER_MAX_REQUESTS_JITTER", 1000)
+SERVER_TIMEOUT = _env_int("SERVER_TIMEOUT", 120)
+SERVER_GRACEFUL_TIMEOUT = _env_int("SERVER_GRACEFUL_TIMEOUT", 30)
+SERVER_KEEPALIVE = _env_int("SERVER_KEEPALIVE", 5)
+
+# Tareas de arranque únicas (migraciones, create_all, limpieza de métricas multiproceso). Con gunicorn
+# las ejecuta el maestro una vez antes de crear los workers (SERVER_PRESTART=false si ya las hace otro
+# paso del despliegue) y el lifespan de cada worker las omite; con uvicorn solo, create_all sigue en el lifespan
+SERVER_PRESTART = _env_bool("SERVER_PRESTART", True)
+LIFESPAN_STARTUP_TASKS = _env_bool("LIFESPAN_STARTUP_TASKS", True)
@@ -0,0 +1,103 @@
+import os
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Optional
+
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, generate_latest
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.db.database import get_pool_stats
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+HTTP_REQUESTS = Counter("http_requests_total", "Peticiones HTTP atendidas", ["method", "route", "status"])
+HTTP_REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds", "Duración de las peticiones HTTP", ["method", "route", "status"], buckets=LATENCY_BUCKETS
+)
+HTTP_REQUESTS_IN_PROGRESS = Gauge(
+    "http_requests_in_progress", "Peticiones HTTP en curso", ["method"], multiprocess_mode="livesum"
+)
+
+DB_QUERY_DURATION = Histogram("db_query_duration_seconds", "Duración de cada consulta SQL", buckets=LATENCY_BUCKETS)
+HTTP_REQUEST_DB_QUERIES = Histogram(
+    "http_request_db_queries", "Consultas SQL por petición", ["method", "route"], buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100)
+)
+HTTP_REQUEST_DB_DURATION = Histogram(
+    "http_request_db_duration_seconds", "Tiempo en la base de datos por petición", ["method", "route"], buckets=LATENCY_BUCKETS
+)
+
+UPLOAD_SIZE = Histogram(
+    "upload_size_bytes", "Tamaño de los archivos subidos",
+    buckets=(64 * 1024, 256 * 1024, 1024 ** 2, 4 * 1024 ** 2, 10 * 1024 ** 2, 20 * 1024 ** 2, 50 * 1024 ** 2),
+)
+UPLOAD_DURATION = Histogram("upload_duration_seconds", "Tiempo de copia de cada archivo subido a disco", buckets=LATENCY_BUCKETS)
+
+MEDIA_FILES_REMOVED = Counter("media_files_removed_total", "Archivos de media borrados", ["source"])
+MEDIA_FILE_REMOVE_FAILURES = Counter("media_file_remove_failures_total", "Archivos de media que no se pudieron borrar")
+MEDIA_ORPHAN_ROWS_REMOVED = Counter("media_orphan_rows_removed_total", "Fotos eliminadas por el reconciliador porque su archivo no existe")
+
+
+@dataclass
+class RequestDbStats:
+    queries: int = 0
+    seconds: float = 0.0
+
+
+# Contadores de la petición en curso; run_in_threadpool copia el contexto, así que también
+# se cuentan las consultas de la sesión sync que se ejecutan en el threadpool
+request_db_stats: ContextVar[Optional[RequestDbStats]] = ContextVar("request_db_stats", default=None)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    context._metrics_started = time.perf_counter()
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - context._metrics_started
+    DB_QUERY_DURATION.observe(elapsed)
+    stats = request_db_stats.get()
+    if stats is not None:
+        stats.queries += 1
+        stats.seconds += elapsed
+
+
+class PoolCollector:
+    """Estado del pool de conexiones en el momento del scrape (ver get_pool_stats)."""
+
+    def collect(self):
+        stats = get_pool_stats()
+        for key, description in (
+            ("size", "Conexiones permanentes del pool"),
+            ("checked_out", "Conexiones en uso"),
+            ("checked_in", "Conexiones libres en el pool"),
+            ("overflow", "Conexiones abiertas por encima de pool_size"),
+        ):
+            if key in stats:
+                yield GaugeMetricFamily(f"db_pool_{key}", description, value=stats[key])
+        yield CounterMetricFamily("db_pool_checkouts", "Conexiones obtenidas del pool", value=stats["checkouts"])
+        yield CounterMetricFamily("db_pool_wait_seconds", "Tiempo total esperando una conexión del pool", value=stats["wait_total_ms"] / 1000)
+
+
+pool_collector = PoolCollector()
+REGISTRY.register(pool_collector)
+
+
+def render_metrics():
+    """
+    Métricas en formato de texto de Prometheus. Con varios workers (PROMETHEUS_MULTIPROC_DIR
+    definido) se agregan los archivos de todos los procesos; el pool es el del worker que responde.
+    """
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        from prometheus_client import multiprocess
+
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        registry.register(pool_collector)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
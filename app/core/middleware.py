@@ -0,0 +1,262 @@
+import cProfile
+import hashlib
+import random
+import time
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.responses import JSONResponse
+from starlette.concurrency import run_in_threadpool
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import PROFILING_SAMPLE_RATE, PROFILING_TOKEN, UPLOAD_BULK_MAX_FILES, UPLOAD_MAX_BYTES
+from app.core.metrics import (
+    HTTP_REQUEST_DB_DURATION,
+    HTTP_REQUEST_DB_QUERIES,
+    HTTP_REQUEST_DURATION,
+    HTTP_REQUESTS,
+    HTTP_REQUESTS_IN_PROGRESS,
+    RequestDbStats,
+    request_db_stats,
+)
+from app.core.profiling import ProfileStore, profile_store
+from app.core.request_context import REQUEST_ID_PATTERN, RequestInfo, current_request, route_label
+
+# Margen para los campos del formulario y las cabeceras multipart
+MULTIPART_OVERHEAD_BYTES = 64 * 1024
+
+
+class UploadSizeLimitMiddleware:
+    """
+    Rechaza con 413 las subidas cuyo Content-Length ya supera el límite, antes de que
+    el parser multipart lea el cuerpo. Las subidas sin Content-Length (chunked) se
+    controlan al copiar el archivo en stream_to_temp.
+    """
+
+    def __init__(self, app: ASGIApp, max_bytes: int = UPLOAD_MAX_BYTES, max_files: int = UPLOAD_BULK_MAX_FILES):
+        self.app = app
+        # Límite del cuerpo completo según el sufijo de la ruta
+        self.limits = {
+            "/upload": max_bytes + MULTIPART_OVERHEAD_BYTES,
+            "/upload/bulk": max_bytes * max_files + MULTIPART_OVERHEAD_BYTES,
+        }
+
+    def _limit_for(self, path: str):
+        path = path.rstrip("/")
+        for suffix, limit in self.limits.items():
+            if path.endswith(suffix):
+                return limit
+        return None
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] == "http" and scope["method"] == "POST":
+            limit = self._limit_for(scope["path"])
+            content_length = dict(scope["headers"]).get(b"content-length")
+            if limit is not None and content_length is not None and content_length.isdigit() and int(content_length) > limit:
+                response = JSONResponse(
+                    status_code=413,
+                    content={"message": "Error HTTP", "details": "El archivo supera el tamaño máximo permitido"},
+                )
+                await response(scope, receive, send)
+                return
+        await self.app(scope, receive, send)
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    # Comparación débil (RFC 9110 13.1.2): se ignora el prefijo W/
+    if if_none_match.strip() == "*":
+        return True
+    candidates = (tag.strip() for tag in if_none_match.split(","))
+    return any(tag.removeprefix("W/") == etag for tag in candidates)
+
+
+class ConditionalGetMiddleware:
+    """
+    Añade un ETag (hash del cuerpo) a las respuestas JSON 200 de GET bajo `prefix` y responde
+    304 sin cuerpo cuando coincide con If-None-Match. La respuesta se sigue generando, pero
+    el cliente no vuelve a descargarla. If-Modified-Since no se aplica a JSON porque los
+    registros no guardan fecha de modificación.
+    """
+
+    def __init__(self, app: ASGIApp, prefix: str = "/api/"):
+        self.app = app
+        self.prefix = prefix
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or scope["method"] != "GET" or not scope["path"].startswith(self.prefix):
+            await self.app(scope, receive, send)
+            return
+
+        if_none_match = Headers(scope=scope).get("if-none-match")
+        start: Message = {}
+        body = []
+
+        async def send_with_etag(message: Message):
+            nonlocal start
+            if message["type"] == "http.response.start":
+                headers = Headers(raw=message["headers"])
+                buffering = (
+                    message["status"] == 200
+                    and "etag" not in headers
+                    and headers.get("content-type", "").startswith("application/json")
+                )
+                if not buffering:
+                    await send(message)
+                    return
+                start = message
+                return
+            if not start:
+                await send(message)
+                return
+
+            body.append(message.get("body", b""))
+            if message.get("more_body", False):
+                return
+            content = b"".join(body)
+            etag = f'"{hashlib.sha256(content).hexdigest()[:32]}"'
+            headers = MutableHeaders(raw=start["headers"])
+            headers["ETag"] = etag
+            # El cliente puede guardar la respuesta, pero debe revalidarla en cada uso
+            headers.setdefault("Cache-Control", "private, no-cache")
+            if if_none_match and _etag_matches(if_none_match, etag):
+                del headers["content-length"]
+                del headers["content-type"]
+                await send({"type": "http.response.start", "status": 304, "headers": headers.raw})
+                await send({"type": "http.response.body", "body": b""})
+                return
+            await send(start)
+            await send({"type": "http.response.body", "body": content})
+
+        await self.app(scope, receive, send_with_etag)
+
+
+class MetricsMiddleware:
+    """
+    Número y duración de las peticiones por método, plantilla de ruta y estado, peticiones en curso
+    y consultas SQL por petición. Debe ser el middleware más externo para medir también a los demás.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status_code = 500
+        stats = RequestDbStats()
+        token = request_db_stats.set(stats)
+
+        async def send_with_status(message: Message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        in_progress = HTTP_REQUESTS_IN_PROGRESS.labels(method)
+        in_progress.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - start
+            in_progress.dec()
+            request_db_stats.reset(token)
+            route = route_label(scope)
+            HTTP_REQUESTS.labels(method, route, status_code).inc()
+            HTTP_REQUEST_DURATION.labels(method, route, status_code).observe(elapsed)
+            HTTP_REQUEST_DB_QUERIES.labels(method, route).observe(stats.queries)
+            HTTP_REQUEST_DB_DURATION.labels(method, route).observe(stats.seconds)
+
+
+class RequestContextMiddleware:
+    """
+    Asigna un id a cada petición (el X-Request-ID recibido si es válido) y lo devuelve en la
+    respuesta. La petición queda en `current_request` para el log de consultas lentas y el perfilado.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        info = RequestInfo(method=scope["method"], scope=scope)
+        incoming = Headers(scope=scope).get("x-request-id")
+        if incoming and REQUEST_ID_PATTERN.match(incoming):
+            info.request_id = incoming
+        token = current_request.set(info)
+
+        async def send_with_request_id(message: Message):
+            if message["type"] == "http.response.start":
+                MutableHeaders(scope=message)["X-Request-ID"] = info.request_id
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_request_id)
+        finally:
+            current_request.reset(token)
+
+
+class ProfilingMiddleware:
+    """
+    Perfila con cProfile las peticiones con la cabecera X-Profile (cuyo valor debe ser
+    PROFILING_TOKEN si está definido) o una fracción `sample_rate` de ellas, y guarda el perfil
+    con un id generado en el servidor (X-Profile-URL) junto al id de la petición. cProfile mide el hilo del event loop: el trabajo enviado al
+    threadpool aparece como espera, y con peticiones concurrentes el perfil incluye también lo
+    que ejecutaron las demás. Solo se perfila una petición a la vez por worker.
+    """
+
+    def __init__(self, app: ASGIApp, sample_rate: float = PROFILING_SAMPLE_RATE, token=PROFILING_TOKEN,
+            store: ProfileStore = profile_store, url_prefix: str = "/api/v1/profiles"):
+        self.app = app
+        self.sample_rate = sample_rate
+        self.token = token
+        self.store = store
+        self.url_prefix = url_prefix
+        self._active = False
+
+    def _requested(self, scope: Scope) -> bool:
+        header = Headers(scope=scope).get("x-profile")
+        if header is not None:
+            return header == self.token if self.token else True
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or self._active or scope["path"].startswith(self.url_prefix) or not self._requested(scope):
+            await self.app(scope, receive, send)
+            return
+
+        info = current_request.get()
+        request_id = info.request_id if info is not None else RequestInfo(method=scope["method"], scope=scope).request_id
+        profile_id = self.store.new_id()
+        status_code = 500
+
+        async def send_with_profile_url(message: Message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                MutableHeaders(scope=message)["X-Profile-URL"] = f"{self.url_prefix}/{profile_id}"
+            await send(message)
+
+        self._active = True
+        profiler = cProfile.Profile()
+        start = time.perf_counter()
+        profiler.enable()
+        try:
+            await self.app(scope, receive, send_with_profile_url)
+        finally:
+            profiler.disable()
+            self._active = False
+            meta = {
+                "request_id": request_id,
+                "method": scope["method"],
+                "path": scope["path"],
+                "route": route_label(scope),
+                "status": status_code,
+                "duration_ms": round((time.perf_counter() - start) * 1000, 3),
+            }
+            await run_in_threadpool(self.store.save, profile_id, profiler, meta)
@@ -0,0 +1,90 @@
+import cProfile
+import io
+import json
+import os
+import pstats
+import re
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+from uuid import uuid4
+
+from app.core.config import PROFILE_DIR, PROFILE_MAX_STORED
+
+# Los perfiles se nombran con un id generado en el servidor: el X-Request-ID lo elige el cliente
+# y puede repetirse, lo que sobrescribiría perfiles anteriores
+PROFILE_ID_PATTERN = re.compile(r"^[0-9a-f]{32}$")
+
+SORT_KEYS = ("cumulative", "tottime", "calls")
+
+
+class ProfileStore:
+    """
+    Perfiles guardados en disco con un id propio: <id>.prof (formato de pstats, se abre con
+    snakeviz o python -m pstats) y <id>.json con el id de la petición, la ruta, el estado y la
+    duración. Al superar `max_stored` se borran los más antiguos. El directorio puede
+    compartirse entre workers.
+    """
+
+    def __init__(self, directory: str = PROFILE_DIR, max_stored: int = PROFILE_MAX_STORED):
+        self.directory = directory
+        self.max_stored = max_stored
+
+    @staticmethod
+    def new_id() -> str:
+        return uuid4().hex
+
+    def _path(self, profile_id: str, ext: str) -> Optional[str]:
+        if not PROFILE_ID_PATTERN.match(profile_id):
+            return None
+        return os.path.join(self.directory, f"{profile_id}.{ext}")
+
+    def save(self, profile_id: str, profiler: cProfile.Profile, meta: Dict[str, Any]):
+        if self._path(profile_id, "prof") is None:
+            raise ValueError(f"Id de perfil inválido: {profile_id!r}")
+        os.makedirs(self.directory, exist_ok=True)
+        profiler.dump_stats(self._path(profile_id, "prof"))
+        with open(self._path(profile_id, "json"), "w") as f:
+            json.dump({"profile_id": profile_id, "created_at": datetime.now().isoformat(), **meta}, f)
+        self._prune()
+
+    def _prune(self):
+        profiles = sorted(
+            (entry for entry in os.scandir(self.directory) if entry.name.endswith(".prof")),
+            key=lambda entry: entry.stat().st_mtime,
+        )
+        for entry in profiles[: max(len(profiles) - self.max_stored, 0)]:
+            for ext in ("prof", "json"):
+                try:
+                    os.remove(os.path.join(self.directory, f"{entry.name[:-5]}.{ext}"))
+                except FileNotFoundError:
+                    pass
+
+    def list(self) -> List[Dict[str, Any]]:
+        if not os.path.isdir(self.directory):
+            return []
+        items = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(".json"):
+                try:
+                    with open(entry.path) as f:
+                        items.append(json.load(f))
+                except (OSError, ValueError):
+                    continue
+        return sorted(items, key=lambda item: item["created_at"], reverse=True)
+
+    def raw_path(self, profile_id: str) -> Optional[str]:
+        path = self._path(profile_id, "prof")
+        return path if path and os.path.exists(path) else None
+
+    def report(self, profile_id: str, sort: str = "cumulative", limit: int = 50) -> Optional[str]:
+        """Resumen de texto de pstats con las `limit` funciones más costosas según `sort`."""
+        path = self.raw_path(profile_id)
+        if path is None:
+            return None
+        output = io.StringIO()
+        stats = pstats.Stats(path, stream=output)
+        stats.strip_dirs().sort_stats(sort).print_stats(limit)
+        return output.getvalue()
+
+
+profile_store = ProfileStore()
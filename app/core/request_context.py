@@ -0,0 +1,35 @@
+import re
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Optional
+from uuid import uuid4
+
+from starlette.types import Scope
+
+# Ids aceptados desde X-Request-ID; también se usan como nombre de archivo de los perfiles
+REQUEST_ID_PATTERN = re.compile(r"^[A-Za-z0-9._-]{1,64}$")
+
+
+def route_label(scope: Scope) -> str:
+    # Plantilla de la ruta (/api/v1/cliente/{id}), no la URL: así el número de valores está acotado
+    route = scope.get("route")
+    if route is not None:
+        return route.path_format
+    # Las aplicaciones montadas (/media) dejan su prefijo en root_path
+    return scope.get("root_path") or "<unmatched>"
+
+
+@dataclass
+class RequestInfo:
+    method: str
+    scope: Scope = field(repr=False)
+    request_id: str = field(default_factory=lambda: uuid4().hex)
+
+    @property
+    def route(self) -> str:
+        # La ruta solo se conoce una vez que el router ha resuelto la petición
+        return route_label(self.scope)
+
+
+# Petición en curso, para atribuir consultas lentas y perfiles a su ruta e id
+current_request: ContextVar[Optional[RequestInfo]] = ContextVar("current_request", default=None)
@@ -0,0 +1,22 @@
+from fastapi.staticfiles import StaticFiles
+
+from app.core.config import MEDIA_IMMUTABLE_MAX_AGE
+
+# Subdirectorios direccionados por contenido: una URL siempre apunta a los mismos bytes
+IMMUTABLE_PREFIXES = ("blobs/", "variants/")
+
+
+class MediaStaticFiles(StaticFiles):
+    """
+    StaticFiles con Cache-Control. StaticFiles ya envía ETag y Last-Modified y responde 304
+    a If-None-Match / If-Modified-Since; aquí solo se indica cuánto puede guardarse cada archivo.
+    """
+
+    def file_response(self, full_path, stat_result, scope, status_code=200):
+        response = super().file_response(full_path, stat_result, scope, status_code)
+        if self.get_path(scope).startswith(IMMUTABLE_PREFIXES):
+            response.headers["Cache-Control"] = f"public, max-age={MEDIA_IMMUTABLE_MAX_AGE}, immutable"
+        else:
+            # Archivos subidos antes del almacenamiento por contenido: pueden reemplazarse, se revalidan
+            response.headers["Cache-Control"] = "public, no-cache"
+        return response
@@ -0,0 +1,381 @@
+import base64
+import hashlib
+import hmac
+import logging
+import mimetypes
+import os
+import shutil
+import tempfile
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urlencode
+from uuid import uuid4
+
+from app.core.config import (
+    MEDIA_ROOT,
+    S3_ADDRESSING_STYLE,
+    S3_BUCKET,
+    S3_ENDPOINT_URL,
+    S3_PUBLIC_URL,
+    S3_REGION,
+    STORAGE_BACKEND,
+    STORAGE_SIGNING_SECRET,
+)
+from app.core.metrics import MEDIA_FILE_REMOVE_FAILURES
+from app.utils.save_file import discard_file
+
+logger = logging.getLogger(__name__)
+
+MEDIA_URL_PREFIX = "/media/"
+TRASH_PREFIX = ".trash-"
+
+
+def media_key(url: str) -> str:
+    """Clave de almacenamiento de una URL pública /media/...: /media/blobs/ab/x.jpg -> blobs/ab/x.jpg."""
+    relative = url.lstrip("/")
+    if relative.startswith("media/"):
+        relative = relative[len("media/"):]
+    return relative
+
+
+def _content_type(key: str) -> str:
+    return mimetypes.guess_type(key)[0] or "application/octet-stream"
+
+
+@dataclass
+class StoredObject:
+    key: str
+    size: int
+    modified: float  # última modificación (timestamp); lo más reciente que el margen no se borra
+    version: str  # cambia si el objeto se reescribe o se toca (touch)
+    checksum: Optional[str] = None  # SHA-256 en hexadecimal, si el almacenamiento lo conoce
+
+
+@dataclass
+class PresignedUpload:
+    url: str
+    method: str
+    expires_at: datetime
+    headers: Dict[str, str] = field(default_factory=dict)
+
+
+class LocalStorage:
+    """
+    Archivos bajo MEDIA_ROOT, servidos por MediaStaticFiles en /media. La subida directa es un PUT
+    a /api/v1/storage/upload/<clave> firmado con HMAC (clave, checksum, tamaño y caducidad).
+    """
+
+    name = "local"
+
+    def __init__(self, root: str = MEDIA_ROOT, secret: str = STORAGE_SIGNING_SECRET, upload_path: str = "/api/v1/storage/upload"):
+        self.root = root
+        self.secret = secret.encode()
+        self.upload_path = upload_path
+        # Los temporales de subida quedan en el mismo sistema de archivos: se mueven con un rename atómico
+        self.temp_directory = os.path.join(root, "blobs")
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.root, key)
+
+    def local_path(self, key: str) -> Optional[str]:
+        """Ruta local del objeto, para leerlo sin descargarlo (None si el almacenamiento es remoto)."""
+        return self.path(key)
+
+    def available(self) -> bool:
+        return os.path.isdir(self.temp_directory)
+
+    def _signature(self, key: str, checksum: str, size: int, expires: int) -> str:
+        return hmac.new(self.secret, f"{key}\n{checksum}\n{size}\n{expires}".encode(), hashlib.sha256).hexdigest()
+
+    def presign_upload(self, key: str, checksum: str, size: int, expires_in: int) -> PresignedUpload:
+        expires = int(time.time()) + expires_in
+        query = urlencode({"checksum": checksum, "size": size, "expires": expires, "signature": self._signature(key, checksum, size, expires)})
+        return PresignedUpload(
+            url=f"{self.upload_path}/{key}?{query}",
+            method="PUT",
+            expires_at=datetime.fromtimestamp(expires, timezone.utc),
+            headers={"Content-Type": _content_type(key)},
+        )
+
+    def verify_upload(self, key: str, checksum: str, size: int, expires: int, signature: str) -> bool:
+        if expires < time.time():
+            return False
+        return hmac.compare_digest(self._signature(key, checksum, size, expires), signature)
+
+    def presign_download(self, key: str, expires_in: int) -> str:
+        # /media es público: no hace falta firmar
+        return MEDIA_URL_PREFIX + key
+
+    def stat(self, key: str) -> Optional[StoredObject]:
+        try:
+            stat = os.stat(self.path(key))
+        except FileNotFoundError:
+            return None
+        # ctime cubre también los renombrados (papelera) y os.utime
+        return StoredObject(key=key, size=stat.st_size, modified=max(stat.st_mtime, stat.st_ctime), version=str(stat.st_mtime_ns))
+
+    def touch(self, key: str) -> bool:
+        """Marca el objeto como en uso (ver delete_if_unchanged). False si no existe."""
+        try:
+            os.utime(self.path(key))
+        except FileNotFoundError:
+            return False
+        return True
+
+    def promote(self, tmp_path: str, key: str):
+        """Guarda el temporal `tmp_path` como `key` si ese contenido no estaba ya almacenado."""
+        if self.touch(key):
+            discard_file(tmp_path)
+            return
+        target = self.path(key)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        os.replace(tmp_path, target)
+
+    def upload_file(self, path: str, key: str):
+        target = self.path(key)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        shutil.copyfile(path, target)
+
+    def download_file(self, key: str, path: str):
+        shutil.copyfile(self.path(key), path)
+
+    def stage_delete(self, keys: Iterable[str]) -> List[Tuple[str, str]]:
+        """
+        Renombra cada archivo a .trash-<uuid>-<nombre> en su mismo directorio (atómico, no copia
+        datos) y devuelve los pares (clave, clave en la papelera). Los que no existen se omiten.
+        """
+        staged = []
+        for key in keys:
+            trash = f"{os.path.dirname(key)}/{TRASH_PREFIX}{uuid4().hex}-{os.path.basename(key)}".lstrip("/")
+            try:
+                os.replace(self.path(key), self.path(trash))
+            except FileNotFoundError:
+                continue
+            staged.append((key, trash))
+        return staged
+
+    def restore(self, staged: List[Tuple[str, str]]):
+        """Deshace stage_delete."""
+        for key, trash in staged:
+            try:
+                os.replace(self.path(trash), self.path(key))
+            except FileNotFoundError:
+                pass
+
+    def delete(self, keys: Iterable[str]) -> int:
+        """Borra los archivos; los errores se registran y cuentan, el reconciliador los reintentará."""
+        removed = 0
+        for key in keys:
+            try:
+                os.remove(self.path(key))
+            except FileNotFoundError:
+                continue
+            except OSError:
+                MEDIA_FILE_REMOVE_FAILURES.inc()
+                logger.warning("No se pudo borrar %s", key, exc_info=True)
+                continue
+            removed += 1
+        return removed
+
+    def delete_if_unchanged(self, versions: Dict[str, str]) -> int:
+        """
+        Borra los archivos cuya versión sigue siendo la observada al listarlos. Se renombran antes
+        de comprobarlo: una subida concurrente del mismo contenido o lo tocó antes (vuelve a su
+        sitio) o ya no lo encuentra y escribe el suyo.
+        """
+        remove, changed = [], []
+        for key, trash in self.stage_delete(versions):
+            try:
+                version = str(os.stat(self.path(trash)).st_mtime_ns)
+            except FileNotFoundError:
+                continue
+            (remove if version == versions[key] else changed).append((key, trash))
+        self.restore(changed)
+        return self.delete(trash for _, trash in remove)
+
+    def list(self, prefix: str) -> Dict[str, StoredObject]:
+        """Objetos cuya clave empieza por el directorio `prefix` (p. ej. "blobs/ab/")."""
+        objects = {}
+        for directory, _, names in os.walk(self.path(prefix)):
+            relative = os.path.relpath(directory, self.root).replace(os.sep, "/")
+            for name in names:
+                stored = self.stat(f"{relative}/{name}")
+                if stored is not None:
+                    objects[stored.key] = stored
+        return objects
+
+    def top_level_prefixes(self) -> List[str]:
+        try:
+            entries = list(os.scandir(self.root))
+        except FileNotFoundError:
+            return []
+        return [f"{entry.name}/" for entry in entries if entry.is_dir()]
+
+
+def _s3_version(etag: str, modified: datetime) -> str:
+    # El ETag no cambia al tocar un objeto (mismo contenido), LastModified sí. Al segundo: HeadObject
+    # no da más precisión que esa y ListObjects sí
+    return f"{etag}@{int(modified.timestamp())}"
+
+
+class S3Storage:
+    """
+    Bucket compatible con S3 a través de un cliente de boto3 (AWS, MinIO, o moto en pruebas). Las
+    subidas directas son PUT firmados que incluyen el SHA-256: S3 rechaza un cuerpo que no coincide.
+    """
+
+    name = "s3"
+
+    def __init__(self, client, bucket: str = S3_BUCKET, public_url: Optional[str] = S3_PUBLIC_URL):
+        self.client = client
+        self.bucket = bucket
+        self.public_url = public_url.rstrip("/") + "/" if public_url else None
+        # Las subidas a través de la API se copian primero a un temporal local
+        self.temp_directory = os.path.join(tempfile.gettempdir(), "media-uploads")
+
+    def local_path(self, key: str) -> Optional[str]:
+        return None
+
+    def available(self) -> bool:
+        try:
+            self.client.head_bucket(Bucket=self.bucket)
+        except Exception:
+            return False
+        return True
+
+    def presign_upload(self, key: str, checksum: str, size: int, expires_in: int) -> PresignedUpload:
+        digest = base64.b64encode(bytes.fromhex(checksum)).decode()
+        content_type = _content_type(key)
+        url = self.client.generate_presigned_url(
+            "put_object",
+            Params={"Bucket": self.bucket, "Key": key, "ContentType": content_type, "ContentLength": size, "ChecksumSHA256": digest},
+            ExpiresIn=expires_in,
+        )
+        return PresignedUpload(
+            url=url,
+            method="PUT",
+            expires_at=datetime.fromtimestamp(time.time() + expires_in, timezone.utc),
+            headers={"Content-Type": content_type, "x-amz-checksum-sha256": digest},
+        )
+
+    def presign_download(self, key: str, expires_in: int) -> str:
+        if self.public_url:
+            return self.public_url + key
+        return self.client.generate_presigned_url("get_object", Params={"Bucket": self.bucket, "Key": key}, ExpiresIn=expires_in)
+
+    def stat(self, key: str) -> Optional[StoredObject]:
+        from botocore.exceptions import ClientError
+
+        try:
+            head = self.client.head_object(Bucket=self.bucket, Key=key, ChecksumMode="ENABLED")
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                return None
+            raise
+        checksum = head.get("ChecksumSHA256")
+        return StoredObject(
+            key=key,
+            size=head["ContentLength"],
+            modified=head["LastModified"].timestamp(),
+            version=_s3_version(head["ETag"], head["LastModified"]),
+            # Solo el checksum del objeto completo; el de una subida multiparte termina en "-<partes>"
+            checksum=base64.b64decode(checksum).hex() if checksum and "-" not in checksum else None,
+        )
+
+    def touch(self, key: str) -> bool:
+        # Copiarlo sobre sí mismo es la forma de actualizar LastModified sin volver a subirlo
+        if self.stat(key) is None:
+            return False
+        self.client.copy_object(
+            Bucket=self.bucket, Key=key, CopySource={"Bucket": self.bucket, "Key": key},
+            MetadataDirective="REPLACE", ContentType=_content_type(key), ChecksumAlgorithm="SHA256",
+        )
+        return True
+
+    def promote(self, tmp_path: str, key: str):
+        try:
+            if not self.touch(key):
+                self.upload_file(tmp_path, key)
+        finally:
+            discard_file(tmp_path)
+
+    def upload_file(self, path: str, key: str):
+        self.client.upload_file(path, self.bucket, key, ExtraArgs={"ContentType": _content_type(key), "ChecksumAlgorithm": "SHA256"})
+
+    def download_file(self, key: str, path: str):
+        self.client.download_file(self.bucket, key, path)
+
+    def stage_delete(self, keys: Iterable[str]) -> List[Tuple[str, str]]:
+        # S3 no tiene renombrado atómico: se borra ya, con las filas de los blobs aún bloqueadas
+        # (DeleteObjects, una llamada por cada 1000 claves) y no queda nada para el recolector
+        self.delete(keys)
+        return []
+
+    def restore(self, staged: List[Tuple[str, str]]):
+        pass
+
+    def delete(self, keys: Iterable[str]) -> int:
+        keys = list(keys)
+        removed = 0
+        for offset in range(0, len(keys), 1000):
+            response = self.client.delete_objects(
+                Bucket=self.bucket,
+                Delete={"Objects": [{"Key": key} for key in keys[offset:offset + 1000]], "Quiet": True},
+            )
+            errors = response.get("Errors", [])
+            for error in errors:
+                MEDIA_FILE_REMOVE_FAILURES.inc()
+                logger.warning("No se pudo borrar %s: %s", error.get("Key"), error.get("Message"))
+            removed += len(keys[offset:offset + 1000]) - len(errors)
+        return removed
+
+    def delete_if_unchanged(self, versions: Dict[str, str]) -> int:
+        # Sin renombrado atómico, la comprobación y el borrado no son una sola operación; el margen
+        # del reconciliador y el touch de las subidas que reutilizan el objeto dejan la ventana en
+        # lo que tarda la petición de borrado
+        unchanged = []
+        for key, version in versions.items():
+            stored = self.stat(key)
+            if stored is not None and stored.version == version:
+                unchanged.append(key)
+        return self.delete(unchanged)
+
+    def list(self, prefix: str) -> Dict[str, StoredObject]:
+        objects = {}
+        for page in self.client.get_paginator("list_objects_v2").paginate(Bucket=self.bucket, Prefix=prefix):
+            for item in page.get("Contents", []):
+                objects[item["Key"]] = StoredObject(
+                    key=item["Key"],
+                    size=item["Size"],
+                    modified=item["LastModified"].timestamp(),
+                    version=_s3_version(item["ETag"], item["LastModified"]),
+                )
+        return objects
+
+    def top_level_prefixes(self) -> List[str]:
+        response = self.client.list_objects_v2(Bucket=self.bucket, Delimiter="/")
+        return [prefix["Prefix"] for prefix in response.get("CommonPrefixes", [])]
+
+
+def _build_storage(kind: str):
+    if kind == "local":
+        return LocalStorage()
+    if kind == "s3":
+        try:
+            import boto3
+            from botocore.config import Config
+        except ImportError as e:
+            raise RuntimeError("STORAGE_BACKEND=s3 requiere el paquete 'boto3'") from e
+        client = boto3.client(
+            "s3",
+            endpoint_url=S3_ENDPOINT_URL,
+            region_name=S3_REGION,
+            config=Config(signature_version="s3v4", s3={"addressing_style": S3_ADDRESSING_STYLE}),
+        )
+        return S3Storage(client)
+    raise ValueError(f"STORAGE_BACKEND inválido: {kind!r} (opciones: local, s3)")
+
+
+storage = _build_storage(STORAGE_BACKEND)
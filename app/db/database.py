@@ -1,14 +1,254 @@
+import asyncio
+import anyio
+import hashlib
+import inspect
+import logging
+from contextlib import asynccontextmanager
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, TypeVar, Union
 from sqlmodel import SQLModel, create_engine, Session
-from app.core.config import SQLMODEL_DATABASE_URL
+from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlalchemy import event
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+from starlette.concurrency import run_in_threadpool
+from app.core.config import SQLMODEL_DATABASE_URL, ASYNC_DATABASE_URL, DB_ASYNC, DB_PROFILE, DB_ENGINE_SETTINGS, SLOW_QUERY_MS
+from app.core.request_context import current_request
+from app.utils.search import unaccent_lower
 
-engine = create_engine(SQLMODEL_DATABASE_URL, echo=True)
+slow_query_logger = logging.getLogger("app.db.slow_query")
 
-def get_session():
-    with Session(engine) as session:
+
+class PoolWaitStats:
+    """Tiempo que las peticiones esperan para obtener una conexión del pool."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.count = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+
+    def observe(self, seconds: float):
+        with self._lock:
+            self.count += 1
+            self.total_seconds += seconds
+            self.max_seconds = max(self.max_seconds, seconds)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "checkouts": self.count,
+                "wait_total_ms": round(self.total_seconds * 1000, 3),
+                "wait_avg_ms": round(self.total_seconds * 1000 / self.count, 3) if self.count else 0.0,
+                "wait_max_ms": round(self.max_seconds * 1000, 3),
+            }
+
+
+pool_wait_stats = PoolWaitStats()
+
+
+class _TimedCheckoutMixin:
+    # _do_get incluye la espera por una conexión libre y, si hay overflow, la apertura de una nueva
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            pool_wait_stats.observe(time.perf_counter() - start)
+
+
+class TimedQueuePool(_TimedCheckoutMixin, QueuePool):
+    pass
+
+
+class TimedAsyncAdaptedQueuePool(_TimedCheckoutMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+def _engine_options(url: str, is_async: bool) -> Dict[str, Any]:
+    settings = DB_ENGINE_SETTINGS
+    options: Dict[str, Any] = {"echo": settings["echo"]}
+    backend = make_url(url).get_backend_name()
+    if backend == "sqlite":
+        return options
+
+    options.update(
+        poolclass=TimedAsyncAdaptedQueuePool if is_async else TimedQueuePool,
+        pool_size=settings["pool_size"],
+        max_overflow=settings["max_overflow"],
+        pool_timeout=settings["pool_timeout"],
+        pool_recycle=settings["pool_recycle"],
+        pool_pre_ping=settings["pool_pre_ping"],
+    )
+    timeout_ms = settings["statement_timeout_ms"]
+    if backend == "postgresql" and timeout_ms > 0:
+        if is_async:
+            options["connect_args"] = {"server_settings": {"statement_timeout": str(timeout_ms)}}
+        else:
+            options["connect_args"] = {"options": f"-c statement_timeout={timeout_ms}"}
+    return options
+
+
+engine = create_engine(SQLMODEL_DATABASE_URL, **_engine_options(SQLMODEL_DATABASE_URL, is_async=False))
+
+# Solo se crea cuando DB_ASYNC está activo; el motor sync sigue disponible para
+# tareas de mantenimiento (migraciones, scripts) en ambos modos.
+async_engine = create_async_engine(ASYNC_DATABASE_URL, **_engine_options(ASYNC_DATABASE_URL, is_async=True)) if DB_ASYNC else None
+
+
+def _log_slow_queries(sync_engine, threshold_ms: int = SLOW_QUERY_MS):
+    """
+    Registra las consultas que superan `threshold_ms` con su duración, la ruta y el id de la
+    petición que las lanzó y un hash de los parámetros (agrupa ejecuciones idénticas sin
+    escribir los valores en el log).
+    """
+    if threshold_ms <= 0:
+        return
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _start(conn, cursor, statement, parameters, context, executemany):
+        context._slow_query_started = time.perf_counter()
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _check(conn, cursor, statement, parameters, context, executemany):
+        duration_ms = (time.perf_counter() - context._slow_query_started) * 1000
+        if duration_ms < threshold_ms:
+            return
+        request = current_request.get()
+        route = f"{request.method} {request.route}" if request is not None else "<sin petición>"
+        request_id = request.request_id if request is not None else None
+        params_hash = hashlib.sha256(repr(parameters).encode()).hexdigest()[:16]
+        slow_query_logger.warning(
+            "Consulta lenta (%.1f ms) en %s [request_id=%s params=%s]: %s",
+            duration_ms, route, request_id, params_hash, statement,
+            extra={"duration_ms": round(duration_ms, 3), "route": route, "request_id": request_id, "params_hash": params_hash, "statement": statement},
+        )
+
+
+def _register_sqlite_functions(sync_engine):
+    """unaccent_lower de app.utils.search en cada conexión SQLite; en PostgreSQL la crea la migración 0006."""
+    if sync_engine.dialect.name != "sqlite":
+        return
+
+    @event.listens_for(sync_engine, "connect")
+    def _connect(dbapi_connection, connection_record):
+        dbapi_connection.create_function("unaccent_lower", 1, unaccent_lower, deterministic=True)
+
+
+_log_slow_queries(engine)
+_register_sqlite_functions(engine)
+if async_engine is not None:
+    _log_slow_queries(async_engine.sync_engine)
+    _register_sqlite_functions(async_engine.sync_engine)
+
+AnySession = Union[Session, AsyncSession]
+
+T = TypeVar("T")
+
+async def maybe_await(value: Any) -> Any:
+    """Permite que los servicios usen la misma llamada con Session y AsyncSession."""
+    if inspect.isawaitable(value):
+        return await value
+    return value
+
+async def run_transaction(session: AnySession, work: Callable[..., Awaitable[T]], *args: Any) -> T:
+    """
+    Ejecuta `work(session, *args)`, una transacción que toma bloqueos y espera al almacenamiento
+    (run_in_threadpool) antes de su commit o rollback.
+
+    Con Session sync cada consulta bloquea el hilo que la lanza. En el event loop, una petición
+    que espera un bloqueo lo detendría, también para la que lo tiene y necesita el loop para
+    llegar al commit: el worker queda parado hasta el timeout. Por eso la transacción entera se
+    ejecuta en un hilo del threadpool con su propio event loop, y la espera de un bloqueo solo
+    ocupa ese hilo. Con AsyncSession se espera sin más. `work` no debe usar objetos ligados al
+    loop principal (tareas, colas): lo que haya que encolar se hace al volver.
+    """
+    if isinstance(session, AsyncSession):
+        return await work(session, *args)
+    return await run_in_threadpool(lambda: asyncio.run(work(session, *args)))
+
+# Hilos para esperar una conexión del pool sync, aparte de los de run_in_threadpool: las
+# peticiones que esperan no dejan sin hilos a las que ya tienen conexión y deben terminar
+_connect_limiter = anyio.CapacityLimiter(40)
+
+@asynccontextmanager
+async def _sync_session():
+    """
+    Session sync ligada a una conexión que se saca del pool en un hilo. Con el pool agotado la
+    espera ocuparía el event loop, y las peticiones que tienen las conexiones lo necesitan para
+    terminar y devolverlas: todo quedaría parado hasta pool_timeout. La conexión se devuelve al
+    cerrar, no tras cada commit, así que la petición no vuelve a esperar al pool.
+    """
+    connection = await anyio.to_thread.run_sync(engine.connect, limiter=_connect_limiter)
+    try:
+        with Session(bind=connection) as session:
+            yield session
+    finally:
+        connection.close()
+
+async def get_sync_session():
+    async with _sync_session() as session:
+        yield session
+
+async def get_async_session():
+    # expire_on_commit=False: en modo async no se puede recargar atributos de forma perezosa
+    async with AsyncSession(async_engine, expire_on_commit=False) as session:
         yield session
 
-def create_db_and_tables():
-    SQLModel.metadata.create_all(engine)
+get_session = get_async_session if DB_ASYNC else get_sync_session
+
+@asynccontextmanager
+async def session_scope():
+    """Sesión para trabajo fuera de una petición (tareas en segundo plano, scripts)."""
+    if async_engine is not None:
+        async with AsyncSession(async_engine, expire_on_commit=False) as session:
+            yield session
+    else:
+        async with _sync_session() as session:
+            yield session
+
+def dialect_insert(session: AnySession, table):
+    """INSERT con soporte de ON CONFLICT según el dialecto de la sesión (PostgreSQL o SQLite)."""
+    dialect = session.bind.dialect.name
+    if dialect == "postgresql":
+        return postgresql.insert(table)
+    if dialect == "sqlite":
+        return sqlite.insert(table)
+    raise NotImplementedError(f"ON CONFLICT no soportado para el dialecto {dialect}")
+
+def get_pool_stats() -> Dict[str, Any]:
+    """Estado del pool del motor activo, para dimensionarlo frente al número de workers."""
+    pool = (async_engine.sync_engine if async_engine is not None else engine).pool
+    stats: Dict[str, Any] = {
+        "profile": DB_PROFILE,
+        "mode": "async" if async_engine is not None else "sync",
+        "pool_class": type(pool).__name__,
+    }
+    if isinstance(pool, QueuePool):
+        stats.update(
+            size=pool.size(),
+            checked_in=pool.checkedin(),
+            checked_out=pool.checkedout(),
+            overflow=max(pool.overflow(), 0),
+            max_overflow=DB_ENGINE_SETTINGS["max_overflow"],
+        )
+    stats.update(pool_wait_stats.snapshot())
+    return stats
+
+async def create_db_and_tables():
+    if async_engine is not None:
+        async with async_engine.begin() as conn:
+            await conn.run_sync(SQLModel.metadata.create_all)
+    else:
+        SQLModel.metadata.create_all(engine)
+
+async def dispose_engines():
+    if async_engine is not None:
+        await async_engine.dispose()
+    engine.dispose()
 
 # Add SessionLocal for backward compatibility
-SessionLocal = Session
\ No newline at end of file
+SessionLocal = Session
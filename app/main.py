@@ -1,32 +1,69 @@
 from contextlib import asynccontextmanager
 from fastapi import FastAPI, HTTPException
+from fastapi.responses import ORJSONResponse
 from sqlalchemy.exc import IntegrityError
 from fastapi.exceptions import RequestValidationError
-from fastapi.staticfiles import StaticFiles
 
 from app.core import error_handlers
-from app.db.database import create_db_and_tables
+from app.core.cache import catalog_cache
+from app.core.config import DB_AUTO_CREATE, LIFESPAN_STARTUP_TASKS, MEDIA_ROOT, METRICS_ENABLED, PROFILING_ENABLED
+from app.core.middleware import ConditionalGetMiddleware, MetricsMiddleware, ProfilingMiddleware, RequestContextMiddleware, UploadSizeLimitMiddleware
+from app.core.static_files import MediaStaticFiles
+from app.core.storage import storage
+from app.db.database import create_db_and_tables, dispose_engines
+from app.workers.image_variants import image_variant_worker
+from app.workers.media_collector import media_collector
+from app.workers.media_reconciler import media_reconciler
 
 from app.api.v1.endpoints.foto_mantenimiento import router as foto_mantenimiento_router
 from app.api.v1.endpoints.equipo_mantenimiento import router as equipo_mantenimiento_router
 from app.api.v1.endpoints.ubicacion import router as ubicacion_router
 from app.api.v1.endpoints.mantenimiento_general import router as mantenimiento_general_router
 from app.api.v1.endpoints.cliente import router as cliente_router
+from app.api.v1.endpoints.health import router as health_router
+from app.api.v1.endpoints.importer import router as import_router
+from app.api.v1.endpoints.metrics import router as metrics_router
+from app.api.v1.endpoints.profiling import router as profiling_router
+from app.api.v1.endpoints.storage import media_router, router as storage_router
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    create_db_and_tables()
+    # Con gunicorn, create_all lo hace una sola vez el maestro (app.commands.prestart)
+    if DB_AUTO_CREATE and LIFESPAN_STARTUP_TASKS:
+        await create_db_and_tables()
+    image_variant_worker.start()
+    media_collector.start()
+    media_reconciler.start()
     yield
+    await media_reconciler.shutdown()
+    await media_collector.shutdown()
+    await image_variant_worker.shutdown()
+    await catalog_cache.close()
+    await dispose_engines()
 
 app = FastAPI(
     title="Mantenimiento API",
     version="1.0.0",
     description="API para la gestión de mantenimiento de equipos y ubicaciones",
     lifespan=lifespan,
+    default_response_class=ORJSONResponse,
 )
 
-# Configurar StaticFiles para servir archivos de media
-app.mount("/media", StaticFiles(directory="media"), name="media")
+# Configurar StaticFiles para servir archivos de media; con S3 /media redirige al bucket
+if storage.name == "local":
+    app.mount("/media", MediaStaticFiles(directory=MEDIA_ROOT), name="media")
+else:
+    app.include_router(media_router, prefix="/media")
+
+app.add_middleware(UploadSizeLimitMiddleware)
+app.add_middleware(ConditionalGetMiddleware)
+# El último en añadirse es el más externo
+if PROFILING_ENABLED:
+    app.add_middleware(ProfilingMiddleware)
+app.add_middleware(RequestContextMiddleware)
+# Métricas por fuera de todos: mide también el tiempo de los demás middlewares
+if METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
 
 # Registrar handlers personalizados
 app.add_exception_handler(HTTPException, error_handlers.http_exception_handler)
@@ -40,3 +77,11 @@ app.include_router(foto_mantenimiento_router, prefix="/api/v1/foto_mantenimiento
 app.include_router(equipo_mantenimiento_router, prefix="/api/v1/equipo_mantenimiento", tags=["equipo_mantenimiento"])
 app.include_router(ubicacion_router, prefix="/api/v1/ubicacion", tags=["ubicacion"])
 app.include_router(cliente_router, prefix="/api/v1/cliente", tags=["cliente"])
+app.include_router(health_router, prefix="/api/v1/health", tags=["health"])
+app.include_router(import_router, prefix="/api/v1/import", tags=["import"])
+if storage.name == "local":
+    app.include_router(storage_router, prefix="/api/v1/storage", tags=["storage"])
+if METRICS_ENABLED:
+    app.include_router(metrics_router)
+if PROFILING_ENABLED:
+    app.include_router(profiling_router, prefix="/api/v1/profiles", tags=["profiling"])
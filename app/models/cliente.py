@@ -1,9 +1,14 @@
 from typing import Optional
 from sqlmodel import SQLModel, Field
+from sqlalchemy import Index
 from uuid import UUID, uuid4
 from datetime import datetime
 
 class Cliente(SQLModel, table=True):
+    __table_args__ = (
+        Index("ix_cliente_created_at_id", "created_at", "id"),
+    )
+
     id: Optional[UUID] = Field(default_factory=uuid4, primary_key=True, index=True)
     nombre: str = Field(unique=True)
     created_at: datetime = Field(default_factory=datetime.now)
\ No newline at end of file
@@ -1,22 +1,37 @@
 from typing import Optional, List, TYPE_CHECKING
 from sqlmodel import SQLModel, Field, Relationship
-from sqlalchemy.dialects.postgresql import JSON
-from sqlalchemy import Column
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy import JSON, Column, Index
 from uuid import UUID, uuid4
 from datetime import datetime
 
 if TYPE_CHECKING:
     from .foto_mantenimiento import FotoMantenimiento
+    from .mantenimiento_general import MantenimientoGeneral
 
 class EquipoMantenimiento(SQLModel, table=True):
     __tablename__ = "equipomantenimiento"
+    __table_args__ = (
+        Index("ix_equipomantenimiento_mantenimiento_general_id_created_at", "mantenimiento_general_id", "created_at"),
+        Index("ix_equipomantenimiento_created_at_id", "created_at", "id"),
+        Index("ix_equipomantenimiento_equipo_id", "equipo", "id"),
+        # GIN con jsonb_ops: sirve para contención (@>) y existencia de clave (?)
+        Index("ix_equipomantenimiento_reporte", "reporte", postgresql_using="gin"),
+    )
 
     id: Optional[UUID] = Field(default_factory=uuid4, primary_key=True, index=True)
     equipo: str
     created_at: datetime = Field(default_factory=datetime.now)
     mantenimiento_general_id: UUID = Field(foreign_key="mantenimientogeneral.id")
-    reporte: Optional[dict] = Field(sa_column=Column(JSON), default=None)
+    # JSONB en PostgreSQL; JSON genérico en otros motores (SQLite en desarrollo)
+    reporte: Optional[dict] = Field(sa_column=Column(JSON().with_variant(JSONB(), "postgresql")), default=None)
 
-    fotos: List["FotoMantenimiento"] = Relationship(back_populates="equipos_mantenimiento")
+    mantenimiento_general: Optional["MantenimientoGeneral"] = Relationship(back_populates="equipos")
+    # passive_deletes: el borrado no carga las fotos, la base de datos aplica la FK
+    fotos: List["FotoMantenimiento"] = Relationship(
+        back_populates="equipos_mantenimiento",
+        passive_deletes=True,
+        sa_relationship_kwargs={"order_by": "FotoMantenimiento.created_at"},
+    )
 
     model_config = {"arbitrary_types_allowed": True}
\ No newline at end of file
@@ -1,5 +1,6 @@
 from typing import Optional, TYPE_CHECKING
 from sqlmodel import SQLModel, Field, Relationship
+from sqlalchemy import Index
 from datetime import datetime
 from uuid import UUID, uuid4
 
@@ -7,11 +8,20 @@ if TYPE_CHECKING:
     from .equipo_mantenimiento import EquipoMantenimiento
 
 class FotoMantenimiento(SQLModel, table=True):
+    __table_args__ = (
+        Index("ix_fotomantenimiento_equipos_mantenimiento_id_created_at", "equipos_mantenimiento_id", "created_at"),
+        Index("ix_fotomantenimiento_created_at_id", "created_at", "id"),
+        Index("ix_fotomantenimiento_categoria_id", "categoria", "id"),
+    )
+
     id: Optional[UUID] = Field(default_factory=uuid4, primary_key=True, index=True)
     created_at: datetime = Field(default_factory=datetime.now)
     categoria: str
     url: str
     nombre: str
+    checksum: Optional[str] = Field(default=None, index=True)  # SHA-256 del contenido
+    thumbnail_url: Optional[str] = None
+    medium_url: Optional[str] = None
     equipos_mantenimiento_id: UUID = Field(foreign_key="equipomantenimiento.id")
 
     equipos_mantenimiento: Optional["EquipoMantenimiento"] = Relationship(back_populates="fotos")
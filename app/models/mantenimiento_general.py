@@ -1,13 +1,36 @@
-from typing import Optional
-from sqlmodel import SQLModel, Field
+from typing import Optional, List, TYPE_CHECKING
+from sqlmodel import SQLModel, Field, Relationship
+from sqlalchemy import Index
 from uuid import UUID, uuid4
 from datetime import datetime
 
+if TYPE_CHECKING:
+    from .cliente import Cliente
+    from .ubicacion import Ubicacion
+    from .equipo_mantenimiento import EquipoMantenimiento
+
 class MantenimientoGeneral(SQLModel, table=True):
+    # Los índices compuestos empiezan por la FK, así también sirven para buscar por cliente/ubicación
+    __table_args__ = (
+        Index("ix_mantenimientogeneral_cliente_id_created_at", "cliente_id", "created_at"),
+        Index("ix_mantenimientogeneral_ubicacion_id_created_at", "ubicacion_id", "created_at"),
+        Index("ix_mantenimientogeneral_created_at_id", "created_at", "id"),
+        Index("ix_mantenimientogeneral_periodo_id", "periodo", "id"),
+    )
+
     id: Optional[UUID] = Field(default_factory=uuid4, primary_key=True, index=True)
     cliente_id: UUID = Field(foreign_key="cliente.id")
     ubicacion_id: UUID = Field(foreign_key="ubicacion.id")
     periodo: str
     created_at: datetime = Field(default_factory=datetime.now)
 
-    model_config = {"arbitrary_types_allowed": True}
\ No newline at end of file
+    cliente: Optional["Cliente"] = Relationship()
+    ubicacion: Optional["Ubicacion"] = Relationship()
+    # passive_deletes: el borrado no carga los equipos, la base de datos aplica la FK
+    equipos: List["EquipoMantenimiento"] = Relationship(
+        back_populates="mantenimiento_general",
+        passive_deletes=True,
+        sa_relationship_kwargs={"order_by": "EquipoMantenimiento.created_at"},
+    )
+
+    model_config = {"arbitrary_types_allowed": True}
@@ -0,0 +1,15 @@
+from typing import Optional
+from sqlmodel import SQLModel, Field
+from datetime import datetime
+
+class MediaBlob(SQLModel, table=True):
+    """Archivo de media almacenado por contenido; varias fotos pueden compartirlo."""
+    __tablename__ = "mediablob"
+
+    checksum: str = Field(primary_key=True)  # SHA-256 del contenido
+    url: str
+    size: int
+    ref_count: int = Field(default=0)
+    thumbnail_url: Optional[str] = None
+    medium_url: Optional[str] = None
+    created_at: datetime = Field(default_factory=datetime.now)
@@ -1,9 +1,14 @@
 from uuid import uuid4, UUID
 from typing import Optional
 from sqlmodel import SQLModel, Field
+from sqlalchemy import Index
 from datetime import datetime
 
 class Ubicacion(SQLModel, table=True):
+    __table_args__ = (
+        Index("ix_ubicacion_created_at_id", "created_at", "id"),
+    )
+
     id: Optional[UUID] = Field(default_factory=uuid4, primary_key=True, index=True)
     ubicacion: str = Field(unique=True, index=True)
     created_at: datetime = Field(default_factory=datetime.now)
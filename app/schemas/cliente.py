@@ -2,6 +2,7 @@ from typing import Optional
 from pydantic import BaseModel, Field, UUID4
 from datetime import datetime
 from app.schemas.types import NombreCliente
+from app.schemas.common import CreatedAtRangeFilter
 
 class ClienteCreate(BaseModel):
     nombre: str  = Field(..., json_schema_extra={"example": "Juan Pérez"}, description="Nombre único del cliente. No se permiten duplicados")
@@ -22,4 +23,7 @@ class ClienteRead(BaseModel):
 class ClienteResponse(BaseModel):
     status: str = "success"
     data: ClienteRead
-    message: str = "Success"
\ No newline at end of file
+    message: str = "Success"
+
+class ClienteFilter(CreatedAtRangeFilter):
+    nombre: Optional[str] = Field(None, description="Nombre exacto del cliente")
@@ -1,4 +1,9 @@
+from datetime import datetime
+from enum import Enum
+from typing import Generic, List, Optional, TypeVar
+from uuid import UUID
 from pydantic import BaseModel, Field, field_validator, ConfigDict
+from app.core.config import BATCH_MAX_ITEMS
 
 class PaginationParams(BaseModel):
     skip: int = Field(default=0, description="Number of items to skip for pagination", ge=0)
@@ -11,4 +16,25 @@ class PaginationParams(BaseModel):
             raise ValueError(f"{info.field_name} must be positive")
         return v
 
-    model_config = ConfigDict(from_attributes=True)
\ No newline at end of file
+    model_config = ConfigDict(from_attributes=True)
+
+
+class CreatedAtRangeFilter(BaseModel):
+    created_from: Optional[datetime] = Field(default=None, description="Solo registros creados desde esta fecha (inclusive)")
+    created_to: Optional[datetime] = Field(default=None, description="Solo registros creados antes de esta fecha (exclusivo)")
+
+
+class ExportFormat(str, Enum):
+    ndjson = "ndjson"
+    csv = "csv"
+
+
+T = TypeVar("T")
+
+class BatchRequest(BaseModel, Generic[T]):
+    items: List[T] = Field(..., min_length=1, max_length=BATCH_MAX_ITEMS)
+    all_or_nothing: bool = Field(default=False, description="Si algún elemento falla no se aplica ninguno")
+
+class BatchDeleteRequest(BaseModel):
+    ids: List[UUID] = Field(..., min_length=1, max_length=BATCH_MAX_ITEMS)
+    all_or_nothing: bool = Field(default=False, description="Si algún elemento falla no se elimina ninguno")
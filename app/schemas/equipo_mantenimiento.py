@@ -1,7 +1,9 @@
 from pydantic import BaseModel, Field, UUID4, ConfigDict
-from typing import Optional, Dict
+from typing import Any, Optional, Dict, List
 from uuid import UUID
 from datetime import datetime
+from app.schemas.common import CreatedAtRangeFilter
+from app.schemas.foto_mantenimiento import FotoMantenimientoRead
 
 class EquipoMantenimientoCreate(BaseModel):
     equipo: str = Field(..., min_length=3, max_length=50, json_schema_extra={"example": "Bomba centrífuga"})
@@ -17,6 +19,22 @@ class EquipoMantenimientoUpdate(BaseModel):
 
     model_config = ConfigDict(arbitrary_types_allowed=True)
 
+class EquipoMantenimientoBatchUpdate(EquipoMantenimientoUpdate):
+    id: UUID4
+
+class EquipoMantenimientoFilter(CreatedAtRangeFilter):
+    mantenimiento_general_id: Optional[UUID] = Field(None, description="Solo equipos de este mantenimiento")
+    equipo: Optional[str] = Field(None, description="Nombre exacto del equipo")
+
+class ReporteRango(BaseModel):
+    clave: str = Field(..., description="Clave del reporte; las claves anidadas se separan con punto", json_schema_extra={"example": "presion"})
+    min: Optional[float] = Field(None, description="Valor mínimo (inclusive)", json_schema_extra={"example": 3})
+    max: Optional[float] = Field(None, description="Valor máximo (inclusive)")
+
+class EquipoMantenimientoReporteQuery(BaseModel):
+    contiene: Optional[Dict[str, Any]] = Field(None, description="Objeto que debe estar contenido en el reporte", json_schema_extra={"example": {"estado": "operativo"}})
+    rangos: List[ReporteRango] = Field(default_factory=list, description="Rangos numéricos sobre claves del reporte; se usa el número al inicio del valor (\"2.5 bar\" -> 2.5)")
+
 class EquipoMantenimientoRead(BaseModel):
     id: UUID4
     equipo: str
@@ -33,4 +51,9 @@ class EquipoMantenimientoResponse(BaseModel):
     mantenimiento_general_id: UUID4
     reporte: Optional[Dict] = None
 
-    model_config = ConfigDict(arbitrary_types_allowed=True)
\ No newline at end of file
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+class EquipoMantenimientoWithFotos(EquipoMantenimientoRead):
+    fotos: List[FotoMantenimientoRead] = []
+
+    model_config = ConfigDict(arbitrary_types_allowed=True, from_attributes=True)
\ No newline at end of file
@@ -1,7 +1,12 @@
-from pydantic import BaseModel
-from typing import Optional
+from pydantic import BaseModel, Field
+from typing import Dict, Optional
 from uuid import UUID
 from datetime import datetime
+from app.core.config import UPLOAD_MAX_BYTES
+from app.schemas.common import CreatedAtRangeFilter
+
+CHECKSUM_PATTERN = r"^[0-9a-f]{64}$"
+EXTENSION_PATTERN = r"^[A-Za-z0-9]{1,10}$"
 
 class FotoMantenimientoCreate(BaseModel):
     categoria: str
@@ -15,12 +20,20 @@ class FotoMantenimientoUpdate(BaseModel):
     nombre: Optional[str] = None
     equipos_mantenimiento_id: Optional[UUID] = None
 
+class FotoMantenimientoFilter(CreatedAtRangeFilter):
+    equipos_mantenimiento_id: Optional[UUID] = Field(None, description="Solo fotos de este equipo")
+    categoria: Optional[str] = Field(None, description="Categoría exacta de la foto")
+    checksum: Optional[str] = Field(None, description="SHA-256 del contenido")
+
 class FotoMantenimientoRead(BaseModel):
     id: UUID
     created_at: datetime
     categoria: str
     url: str
     nombre: str
+    checksum: Optional[str] = None
+    thumbnail_url: Optional[str] = None
+    medium_url: Optional[str] = None
     equipos_mantenimiento_id: UUID
 
 class FotoMantenimientoResponse(BaseModel):
@@ -29,10 +42,38 @@ class FotoMantenimientoResponse(BaseModel):
     categoria: str
     url: str
     nombre: str
+    checksum: Optional[str] = None
+    thumbnail_url: Optional[str] = None
+    medium_url: Optional[str] = None
     equipos_mantenimiento_id: UUID
 
 class FotoUploadResponse(BaseModel):
     id: UUID
     url: str
     categoria: str
-    nombre: str
\ No newline at end of file
+    nombre: str
+    checksum: Optional[str] = None
+    thumbnail_url: Optional[str] = None
+    medium_url: Optional[str] = None
+
+class FotoUploadUrlRequest(BaseModel):
+    checksum: str = Field(..., pattern=CHECKSUM_PATTERN, description="SHA-256 del archivo en hexadecimal (minúsculas)")
+    size: int = Field(..., gt=0, le=UPLOAD_MAX_BYTES, description="Tamaño del archivo en bytes")
+    extension: str = Field(..., pattern=EXTENSION_PATTERN, description="Extensión del archivo, sin punto")
+
+class PresignedUploadRead(BaseModel):
+    url: str
+    method: str
+    expires_at: datetime
+    headers: Dict[str, str] = Field(default_factory=dict, description="Cabeceras que la subida debe incluir tal cual")
+
+class FotoUploadUrlResponse(BaseModel):
+    key: str
+    exists: bool = Field(..., description="El contenido ya está almacenado: no hace falta subirlo")
+    upload: Optional[PresignedUploadRead] = None
+
+class FotoMantenimientoRegister(BaseModel):
+    categoria: str
+    equipos_mantenimiento_id: UUID
+    checksum: str = Field(..., pattern=CHECKSUM_PATTERN, description="SHA-256 del archivo subido")
+    extension: str = Field(..., pattern=EXTENSION_PATTERN, description="La misma extensión pedida en /upload-url")
@@ -0,0 +1,31 @@
+from enum import Enum
+from typing import List
+from pydantic import BaseModel
+
+
+class ImportKind(str, Enum):
+    clientes = "clientes"
+    ubicaciones = "ubicaciones"
+    mantenimientos = "mantenimientos"
+
+
+class ImportFormat(str, Enum):
+    csv = "csv"
+    ndjson = "ndjson"
+
+
+class ImportRowError(BaseModel):
+    line: int
+    error: str
+
+
+class ImportReport(BaseModel):
+    kind: ImportKind
+    rows_read: int = 0
+    rows_invalid: int = 0
+    inserted: int = 0
+    # Filas válidas que no se insertaron porque la clave natural ya existía (o se repetía en el archivo)
+    skipped: int = 0
+    # Mantenimientos cuyo cliente o ubicación no existe
+    unresolved: int = 0
+    errors: List[ImportRowError] = []
@@ -1,7 +1,11 @@
-from pydantic import BaseModel
-from typing import Optional
+from pydantic import BaseModel, Field
+from typing import Optional, List
 from uuid import UUID
 from datetime import datetime
+from app.schemas.common import CreatedAtRangeFilter
+from app.schemas.cliente import ClienteRead
+from app.schemas.ubicacion import UbicacionRead
+from app.schemas.equipo_mantenimiento import EquipoMantenimientoWithFotos
 
 class MantenimientoGeneralCreate(BaseModel):
     cliente_id: UUID
@@ -13,6 +17,14 @@ class MantenimientoGeneralUpdate(BaseModel):
     ubicacion_id: Optional[UUID] = None
     periodo: Optional[str] = None
 
+class MantenimientoGeneralBatchUpdate(MantenimientoGeneralUpdate):
+    id: UUID
+
+class MantenimientoGeneralFilter(CreatedAtRangeFilter):
+    cliente_id: Optional[UUID] = Field(None, description="Solo mantenimientos de este cliente")
+    ubicacion_id: Optional[UUID] = Field(None, description="Solo mantenimientos de esta ubicación")
+    periodo: Optional[str] = Field(None, description="Periodo exacto")
+
 class MantenimientoGeneralRead(BaseModel):
     id: UUID
     cliente_id: UUID
@@ -31,4 +43,15 @@ class MantenimientoGeneralResponse(BaseModel):
     created_at: datetime
 
     class Config:
-        orm_mode = True
\ No newline at end of file
+        orm_mode = True
+
+class MantenimientoGeneralReport(MantenimientoGeneralRead):
+    cliente: ClienteRead
+    ubicacion: UbicacionRead
+    equipos: List[EquipoMantenimientoWithFotos] = []
+
+class MantenimientoGeneralImport(BaseModel):
+    """Fila de importación: cliente y ubicación por su nombre, que es único."""
+    cliente: str
+    ubicacion: str
+    periodo: str
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, EmailStr, PositiveInt, Field, constr, field_validator, model_validator
-from typing import Generic, TypeVar, Optional
+from typing import Generic, List, TypeVar, Optional
 import re
 
 # Reusable types
@@ -23,3 +23,15 @@ class ResponseSuccess(BaseModel, Generic[T]):
     status: str
     data: Optional[T]
     message: str
+    next_cursor: Optional[str] = None
+
+class BatchItemResult(BaseModel, Generic[T]):
+    index: int
+    ok: bool
+    data: Optional[T] = None
+    error: Optional[str] = None
+
+class BatchResult(BaseModel, Generic[T]):
+    succeeded: int
+    failed: int
+    items: List[BatchItemResult[T]]
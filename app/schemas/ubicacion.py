@@ -1,7 +1,8 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import Optional
 from uuid import UUID
 from datetime import datetime
+from app.schemas.common import CreatedAtRangeFilter
 
 class UbicacionCreate(BaseModel):
     ubicacion: str
@@ -12,4 +13,7 @@ class UbicacionUpdate(BaseModel):
 class UbicacionRead(BaseModel):
     id: UUID
     ubicacion: str
-    created_at: datetime
\ No newline at end of file
+    created_at: datetime
+
+class UbicacionFilter(CreatedAtRangeFilter):
+    ubicacion: Optional[str] = Field(None, description="Nombre exacto de la ubicación")
@@ -0,0 +1,172 @@
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Set
+from uuid import UUID
+from sqlmodel import delete, insert, select, update
+from app.db.database import AnySession, maybe_await, run_transaction
+from app.services.media_blob import commit_and_collect
+
+# Borra los hijos de las filas `ids` antes de eliminarlas y devuelve las claves de los archivos que
+# quedaron sin referencias (ver foto_mantenimiento.delete_fotos_where). No hace commit
+Cascade = Callable[[AnySession, List[UUID]], Awaitable[List[str]]]
+
+
+class BatchAbortedError(Exception):
+    """Un lote en modo todo o nada tenía errores; no se aplicó ningún cambio."""
+
+    def __init__(self, errors: Dict[int, str]):
+        super().__init__(f"{len(errors)} elementos con error")
+        self.errors = errors
+
+
+async def existing_ids(session: AnySession, column, ids: Iterable[UUID], lock: Optional[str] = None) -> Set[UUID]:
+    """
+    Ids de `ids` que existen en la tabla de `column`, con una sola consulta.
+    lock="key_share" (FOR KEY SHARE) impide que se borren las filas padre hasta el commit;
+    lock="update" (FOR UPDATE) además impide que se les añadan hijos. SQLite lo ignora.
+    """
+    ids = set(ids)
+    if not ids:
+        return set()
+    statement = select(column).where(column.in_(ids))
+    if lock == "key_share":
+        statement = statement.with_for_update(key_share=True)
+    elif lock == "update":
+        statement = statement.with_for_update()
+    result = await maybe_await(session.exec(statement))
+    return set(result.all())
+
+
+async def abort_if_needed(session: AnySession, errors: Dict[int, str], all_or_nothing: bool):
+    if errors and all_or_nothing:
+        await maybe_await(session.rollback())
+        raise BatchAbortedError(errors)
+
+
+def duplicate_errors(ids: Iterable[UUID]) -> Dict[int, str]:
+    """Errores para los ids repetidos dentro del mismo lote (se aplica solo la primera aparición)."""
+    seen, errors = set(), {}
+    for index, id in enumerate(ids):
+        if id in seen:
+            errors[index] = "id repetido en el lote"
+        seen.add(id)
+    return errors
+
+
+def null_errors(model, items) -> Dict[int, str]:
+    """Errores para los campos enviados como null que la tabla no admite (NOT NULL)."""
+    columns = model.__table__.columns
+    errors = {}
+    for index, item in enumerate(items):
+        for field, value in item.model_dump(exclude_unset=True).items():
+            if value is None and field in columns and not columns[field].nullable:
+                errors[index] = f"{field} no puede ser null"
+                break
+    return errors
+
+
+async def reference_errors(session: AnySession, items, references: Dict[str, object]) -> Dict[int, str]:
+    """Comprueba las claves foráneas de todo el lote con una consulta por tabla referenciada."""
+    errors: Dict[int, str] = {}
+    for field, parent_column in references.items():
+        values = [getattr(item, field, None) for item in items]
+        found = await existing_ids(session, parent_column, (v for v in values if v is not None), lock="key_share")
+        for index, value in enumerate(values):
+            if value is not None and value not in found:
+                errors.setdefault(index, f"{field} no existe")
+    return errors
+
+
+async def batch_create(session: AnySession, model, items, references: Dict[str, object], all_or_nothing: bool = False):
+    """
+    Inserta los elementos válidos con un único INSERT ... RETURNING y un commit.
+    Devuelve (creados por índice, errores por índice).
+    """
+    errors = await reference_errors(session, items, references)
+    await abort_if_needed(session, errors, all_or_nothing)
+    valid = [index for index in range(len(items)) if index not in errors]
+    created = {}
+    if valid:
+        rows = [model.model_validate(items[index].model_dump()).model_dump() for index in valid]
+        result = await maybe_await(session.exec(insert(model).returning(model, sort_by_parameter_order=True), params=rows))
+        instances = result.scalars().all()
+        # RETURNING trae las filas completas; fuera de la sesión el commit no las expira
+        for instance in instances:
+            session.expunge(instance)
+        created = dict(zip(valid, instances))
+    await maybe_await(session.commit())
+    return created, errors
+
+
+async def batch_update(session: AnySession, model, items, references: Dict[str, object], all_or_nothing: bool = False):
+    """
+    Actualiza por clave primaria en un solo executemany y recarga las filas con un SELECT.
+    Cada elemento lleva `id` y solo los campos enviados. Devuelve (actualizados, errores) por índice.
+    """
+    ids = [item.id for item in items]
+    errors = duplicate_errors(ids)
+    found = await existing_ids(session, model.id, ids, lock="update")
+    for index, id in enumerate(ids):
+        if id not in found:
+            errors.setdefault(index, "no encontrado")
+    # Un null explícito en una columna NOT NULL haría fallar el UPDATE de todo el lote
+    for index, message in null_errors(model, items).items():
+        errors.setdefault(index, message)
+    for index, message in (await reference_errors(session, items, references)).items():
+        errors.setdefault(index, message)
+    await abort_if_needed(session, errors, all_or_nothing)
+
+    valid = [index for index in range(len(items)) if index not in errors]
+    params = [items[index].model_dump(exclude_unset=True) for index in valid]
+    params = [values for values in params if len(values) > 1]
+    if params:
+        await maybe_await(session.exec(update(model), params=params))
+    updated = {}
+    if valid:
+        result = await maybe_await(session.exec(select(model).where(model.id.in_([ids[index] for index in valid]))))
+        by_id = {instance.id: instance for instance in result.all()}
+        for instance in by_id.values():
+            session.expunge(instance)
+        updated = {index: by_id[ids[index]] for index in valid}
+    await maybe_await(session.commit())
+    return updated, errors
+
+
+async def batch_delete(session: AnySession, model, ids, cascade: Optional[Cascade] = None, all_or_nothing: bool = False):
+    """
+    Elimina con un único DELETE ... RETURNING, después de que `cascade` borre en bloque los hijos
+    de todo el lote, igual que el borrado individual. Las filas se bloquean antes (FOR UPDATE):
+    nadie puede añadirles hijos entre medias. Los archivos sin referencias se borran en segundo
+    plano tras el commit. Devuelve (eliminados, errores) por índice.
+    """
+    return await run_transaction(session, _batch_delete, model, ids, cascade, all_or_nothing)
+
+
+async def _batch_delete(session: AnySession, model, ids, cascade: Optional[Cascade], all_or_nothing: bool):
+    errors = duplicate_errors(ids)
+    found = await existing_ids(session, model.id, ids, lock="update")
+    for index, id in enumerate(ids):
+        if id not in found:
+            errors.setdefault(index, "no encontrado")
+    await abort_if_needed(session, errors, all_or_nothing)
+
+    valid = [index for index in range(len(ids)) if index not in errors]
+    deleted, keys = {}, []
+    if valid:
+        valid_ids = [ids[index] for index in valid]
+        if cascade is not None:
+            keys = await cascade(session, valid_ids)
+        result = await maybe_await(session.exec(delete(model).where(model.id.in_(valid_ids)).returning(model)))
+        by_id = {instance.id: instance for instance in result.scalars().all()}
+        for instance in by_id.values():
+            session.expunge(instance)
+        deleted = {index: by_id[ids[index]] for index in valid}
+    await commit_and_collect(session, keys)
+    return deleted, errors
+
+
+def batch_result(total: int, done: Dict[int, object], errors: Dict[int, str]) -> dict:
+    """Contenido de BatchResult: un resultado por elemento, en el orden del lote."""
+    items = [
+        {"index": index, "ok": index in done, "data": done.get(index), "error": errors.get(index)}
+        for index in range(total)
+    ]
+    return {"succeeded": len(done), "failed": len(errors), "items": items}
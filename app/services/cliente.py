@@ -1,46 +1,58 @@
-from sqlmodel import Session, select
+from sqlmodel import select
+from app.core.cache import catalog_cache
+from app.db.database import AnySession, maybe_await
 from app.models.cliente import Cliente
-from app.schemas.cliente import ClienteCreate, ClienteUpdate
+from app.schemas.cliente import ClienteCreate, ClienteUpdate, ClienteFilter
 from uuid import UUID
 from typing import List, Optional
+from app.services.returning import delete_returning, update_returning
+from app.utils.filters import apply_filters
+from app.utils.pagination import paginate
+from app.utils.search import search_statement
+
+CLIENTE_SORT_FIELDS = {"created_at": Cliente.created_at, "nombre": Cliente.nombre}
+
+async def get_clientes(session: AnySession, skip: int = 0, limit: int = 100, cursor: Optional[str] = None,
+        filters: Optional[ClienteFilter] = None, sort: Optional[str] = None) -> List[Cliente]:
+    """Get a list of clients, filtered and sorted, with offset or keyset (cursor) pagination."""
+    statement = apply_filters(select(Cliente), Cliente, filters)
+    result = await maybe_await(session.exec(paginate(statement, Cliente, skip, limit, cursor, sort, CLIENTE_SORT_FIELDS)))
+    return result.all()
+
+async def suggest_clientes(session: AnySession, q: str, limit: int = 10) -> List[Cliente]:
+    """Autocomplete clients by name, accent- and case-insensitive, best matches first."""
+    statement = search_statement(session.bind.dialect.name, Cliente, Cliente.nombre, q, limit)
+    result = await maybe_await(session.exec(statement))
+    return result.all()
+
+async def get_cliente(session: AnySession, id: UUID) -> Optional[Cliente]:
+    """Get a single client by ID, read through the catalog cache (returns a detached instance on a hit)."""
+    cached = await catalog_cache.get("cliente", id)
+    if cached is not None:
+        return Cliente.model_validate(cached)
+    db_cliente = await maybe_await(session.get(Cliente, id))
+    if db_cliente is not None:
+        await catalog_cache.set("cliente", id, db_cliente.model_dump(mode="json"))
+    return db_cliente
 
-async def get_clientes(session: Session, skip: int = 0, limit: int = 100) -> List[Cliente]:
-    """Get a list of clients with pagination."""
-    return session.exec(select(Cliente).offset(skip).limit(limit)).all()
-
-async def get_cliente(session: Session, id: UUID) -> Optional[Cliente]:
-    """Get a single client by ID."""
-    return session.get(Cliente, id)
-
-async def create_cliente(session: Session, cliente_create: ClienteCreate) -> Cliente:
+async def create_cliente(session: AnySession, cliente_create: ClienteCreate) -> Cliente:
     """Create a new client."""
     db_cliente = Cliente(nombre=cliente_create.nombre)
     session.add(db_cliente)
-    session.commit()
-    session.refresh(db_cliente)
+    await maybe_await(session.commit())
+    await maybe_await(session.refresh(db_cliente))
     return db_cliente
 
-async def update_cliente(session: Session, id: UUID, cliente_update: ClienteUpdate) -> Optional[Cliente]:
-    """Update an existing client."""
-    db_cliente = await get_cliente(session, id)
-    if not db_cliente:
-        return None
-
-    update_data = cliente_update.model_dump(exclude_unset=True)
-    for key, value in update_data.items():
-        setattr(db_cliente, key, value)
-
-    session.add(db_cliente)
-    session.commit()
-    session.refresh(db_cliente)
+async def update_cliente(session: AnySession, id: UUID, cliente_update: ClienteUpdate) -> Optional[Cliente]:
+    """Update an existing client with a single UPDATE ... RETURNING."""
+    db_cliente = await update_returning(session, Cliente, id, cliente_update.model_dump(exclude_unset=True))
+    if db_cliente is not None:
+        await catalog_cache.invalidate("cliente", id)
     return db_cliente
 
-async def delete_cliente(session: Session, id: UUID) -> Optional[Cliente]:
-    """Delete a client by ID."""
-    db_cliente = await get_cliente(session, id)
-    if not db_cliente:
-        return None
-
-    session.delete(db_cliente)
-    session.commit()
+async def delete_cliente(session: AnySession, id: UUID) -> Optional[Cliente]:
+    """Delete a client by ID with a single DELETE ... RETURNING."""
+    db_cliente = await delete_returning(session, Cliente, id)
+    if db_cliente is not None:
+        await catalog_cache.invalidate("cliente", id)
     return db_cliente
\ No newline at end of file
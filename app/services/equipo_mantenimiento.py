@@ -1,46 +1,171 @@
-from sqlmodel import Session, select
+import json
+from sqlmodel import select
+from sqlalchemy import Float, Numeric, and_, case, cast, func, or_, type_coerce
+from sqlalchemy.dialects.postgresql import JSONB
+from app.db.database import AnySession, maybe_await, run_transaction
 from app.models.equipo_mantenimiento import EquipoMantenimiento
-from app.schemas.equipo_mantenimiento import EquipoMantenimientoCreate, EquipoMantenimientoUpdate
+from app.models.foto_mantenimiento import FotoMantenimiento
+from app.models.mantenimiento_general import MantenimientoGeneral
+from app.models.cliente import Cliente
+from app.models.ubicacion import Ubicacion
+from app.schemas.equipo_mantenimiento import EquipoMantenimientoCreate, EquipoMantenimientoUpdate, EquipoMantenimientoFilter, EquipoMantenimientoReporteQuery, EquipoMantenimientoBatchUpdate
+from app.schemas.mantenimiento_general import MantenimientoGeneralFilter
 from uuid import UUID
-from typing import List, Optional
+from typing import Any, Dict, List, Optional, Tuple
+from app.services.batch import batch_create, batch_delete, batch_update
+from app.services.foto_mantenimiento import delete_fotos_where
+from app.services.media_blob import commit_and_collect
+from app.services.returning import delete_returning, update_returning
+from app.utils.filters import apply_filters
+from app.utils.pagination import paginate
+from app.utils.search import search_statement
 
-async def get_equipos_mantenimiento(session: Session, skip: int = 0, limit: int = 100) -> List[EquipoMantenimiento]:
-    """Get a list of maintenance equipment with pagination."""
-    return session.exec(select(EquipoMantenimiento).offset(skip).limit(limit)).all()
+EQUIPO_MANTENIMIENTO_SORT_FIELDS = {"created_at": EquipoMantenimiento.created_at, "equipo": EquipoMantenimiento.equipo}
 
-async def get_equipo_mantenimiento(session: Session, id: UUID) -> Optional[EquipoMantenimiento]:
+# Número al inicio del valor: "2.5 bar" -> 2.5, "-10 C" -> -10
+NUMERIC_PREFIX = r"^\s*(-?[0-9]+(?:\.[0-9]+)?)"
+
+def _json_path(clave: str) -> str:
+    return "$" + "".join(f'."{part}"' for part in clave.split("."))
+
+def _flatten(prefix: str, value: Dict[str, Any]):
+    for key, item in value.items():
+        path = f"{prefix}.{key}" if prefix else key
+        if isinstance(item, dict):
+            yield from _flatten(path, item)
+        else:
+            yield path, item
+
+def _reporte_conditions(session: AnySession, query: EquipoMantenimientoReporteQuery) -> list:
+    """
+    Translate a reporte query into SQL predicates.
+    On PostgreSQL containment uses @> and ranges check the key with ? first, both served by the GIN index.
+    """
+    conditions = []
+    if session.bind.dialect.name == "postgresql":
+        reporte = type_coerce(EquipoMantenimiento.reporte, JSONB)
+        if query.contiene:
+            conditions.append(reporte.contains(query.contiene))
+        for rango in query.rangos:
+            path = tuple(rango.clave.split("."))
+            value = cast(func.substring(reporte[path].astext, NUMERIC_PREFIX), Numeric)
+            conditions.append(reporte.has_key(path[0]))
+            conditions.append(value.isnot(None))
+            if rango.min is not None:
+                conditions.append(value >= rango.min)
+            if rango.max is not None:
+                conditions.append(value <= rango.max)
+        return conditions
+
+    # Otros motores (SQLite en desarrollo): json_extract sin índice; las listas se comparan como JSON compacto
+    for clave, expected in _flatten("", query.contiene or {}):
+        if isinstance(expected, list):
+            expected = json.dumps(expected, separators=(",", ":"))
+        conditions.append(func.json_extract(EquipoMantenimiento.reporte, _json_path(clave)) == expected)
+    for rango in query.rangos:
+        path = _json_path(rango.clave)
+        raw = func.json_extract(EquipoMantenimiento.reporte, path)
+        text = func.ltrim(raw, " \t\n\r")
+        # CAST a REAL en SQLite convierte en 0 lo que no empieza por un número ("n/a" -> 0.0) y los
+        # booleanos JSON llegan como 0/1: solo se convierte si el valor empieza por un dígito o por
+        # "-" y un dígito, como NUMERIC_PREFIX en PostgreSQL (que además ignora exponentes: "1e3")
+        numeric = and_(
+            func.json_type(EquipoMantenimiento.reporte, path).in_(("integer", "real", "text")),
+            or_(text.op("GLOB")("[0-9]*"), text.op("GLOB")("-[0-9]*")),
+        )
+        value = case((numeric, cast(raw, Float)), else_=None)
+        conditions.append(value.isnot(None))
+        if rango.min is not None:
+            conditions.append(value >= rango.min)
+        if rango.max is not None:
+            conditions.append(value <= rango.max)
+    return conditions
+
+async def get_equipos_mantenimiento(session: AnySession, skip: int = 0, limit: int = 100, cursor: Optional[str] = None,
+        filters: Optional[EquipoMantenimientoFilter] = None, sort: Optional[str] = None,
+        reporte: Optional[EquipoMantenimientoReporteQuery] = None) -> List[EquipoMantenimiento]:
+    """Get a list of maintenance equipment, filtered and sorted, with offset or keyset (cursor) pagination."""
+    statement = apply_filters(select(EquipoMantenimiento), EquipoMantenimiento, filters)
+    if reporte is not None:
+        statement = statement.where(*_reporte_conditions(session, reporte))
+    result = await maybe_await(session.exec(paginate(statement, EquipoMantenimiento, skip, limit, cursor, sort, EQUIPO_MANTENIMIENTO_SORT_FIELDS)))
+    return result.all()
+
+async def suggest_equipos_mantenimiento(session: AnySession, q: str, limit: int = 10) -> List[EquipoMantenimiento]:
+    """Autocomplete maintenance equipment by name, accent- and case-insensitive, best matches first."""
+    statement = search_statement(session.bind.dialect.name, EquipoMantenimiento, EquipoMantenimiento.equipo, q, limit)
+    result = await maybe_await(session.exec(statement))
+    return result.all()
+
+def equipos_mantenimiento_export_statement(filters: Optional[MantenimientoGeneralFilter] = None):
+    """
+    Columns for the streaming export: each equipo with its mantenimiento, cliente and ubicacion.
+    Filters apply to the mantenimiento (cliente, ubicacion, periodo, created_at range).
+    """
+    statement = (
+        select(
+            EquipoMantenimiento.id,
+            EquipoMantenimiento.equipo,
+            EquipoMantenimiento.reporte,
+            EquipoMantenimiento.created_at,
+            EquipoMantenimiento.mantenimiento_general_id,
+            MantenimientoGeneral.periodo,
+            MantenimientoGeneral.cliente_id,
+            Cliente.nombre.label("cliente"),
+            MantenimientoGeneral.ubicacion_id,
+            Ubicacion.ubicacion,
+        )
+        .join(MantenimientoGeneral, MantenimientoGeneral.id == EquipoMantenimiento.mantenimiento_general_id)
+        .join(Cliente, Cliente.id == MantenimientoGeneral.cliente_id)
+        .join(Ubicacion, Ubicacion.id == MantenimientoGeneral.ubicacion_id)
+    )
+    statement = apply_filters(statement, MantenimientoGeneral, filters)
+    return statement.order_by(MantenimientoGeneral.created_at, MantenimientoGeneral.id, EquipoMantenimiento.created_at, EquipoMantenimiento.id)
+
+async def get_equipo_mantenimiento(session: AnySession, id: UUID) -> Optional[EquipoMantenimiento]:
     """Get a single maintenance equipment by ID."""
-    return session.get(EquipoMantenimiento, id)
+    return await maybe_await(session.get(EquipoMantenimiento, id))
 
-async def create_equipo_mantenimiento(session: Session, equipo_create: EquipoMantenimientoCreate) -> EquipoMantenimiento:
+async def create_equipo_mantenimiento(session: AnySession, equipo_create: EquipoMantenimientoCreate) -> EquipoMantenimiento:
     """Create a new maintenance equipment."""
     db_equipo = EquipoMantenimiento.model_validate(equipo_create.model_dump())
     session.add(db_equipo)
-    session.commit()
-    session.refresh(db_equipo)
+    await maybe_await(session.commit())
+    await maybe_await(session.refresh(db_equipo))
     return db_equipo
 
-async def update_equipo_mantenimiento(session: Session, id: UUID, equipo_update: EquipoMantenimientoUpdate) -> Optional[EquipoMantenimiento]:
-    """Update an existing maintenance equipment."""
-    db_equipo = await get_equipo_mantenimiento(session, id)
-    if not db_equipo:
-        return None
+async def update_equipo_mantenimiento(session: AnySession, id: UUID, equipo_update: EquipoMantenimientoUpdate) -> Optional[EquipoMantenimiento]:
+    """Update an existing maintenance equipment with a single UPDATE ... RETURNING."""
+    return await update_returning(session, EquipoMantenimiento, id, equipo_update.model_dump(exclude_unset=True))
 
-    update_data = equipo_update.model_dump(exclude_unset=True)
-    for key, value in update_data.items():
-        setattr(db_equipo, key, value)
+async def delete_equipos_children(session: AnySession, ids: List[UUID]) -> List[str]:
+    """Delete the fotos of the given equipos in bulk (no commit); returns the media keys left unreferenced."""
+    _, keys = await delete_fotos_where(session, FotoMantenimiento.equipos_mantenimiento_id.in_(ids))
+    return keys
 
-    session.add(db_equipo)
-    session.commit()
-    session.refresh(db_equipo)
-    return db_equipo
+async def delete_equipo_mantenimiento(session: AnySession, id: UUID) -> Optional[EquipoMantenimiento]:
+    """Delete a maintenance equipment and its fotos with bulk DELETEs; unreferenced media files are removed in the background."""
+    return await run_transaction(session, _delete_equipo, id)
 
-async def delete_equipo_mantenimiento(session: Session, id: UUID) -> Optional[EquipoMantenimiento]:
-    """Delete a maintenance equipment by ID."""
-    db_equipo = await get_equipo_mantenimiento(session, id)
-    if not db_equipo:
+async def _delete_equipo(session: AnySession, id: UUID) -> Optional[EquipoMantenimiento]:
+    keys = await delete_equipos_children(session, [id])
+    db_equipo = await delete_returning(session, EquipoMantenimiento, id, commit=False)
+    if db_equipo is None:
+        await maybe_await(session.rollback())
         return None
+    await commit_and_collect(session, keys)
+    return db_equipo
+
+EQUIPO_MANTENIMIENTO_REFERENCES = {"mantenimiento_general_id": MantenimientoGeneral.id}
+
+async def create_equipos_mantenimiento(session: AnySession, items: List[EquipoMantenimientoCreate], all_or_nothing: bool = False) -> Tuple[Dict[int, EquipoMantenimiento], Dict[int, str]]:
+    """Create many equipment rows in one INSERT ... RETURNING; items with an unknown mantenimiento_general_id are reported per index."""
+    return await batch_create(session, EquipoMantenimiento, items, EQUIPO_MANTENIMIENTO_REFERENCES, all_or_nothing)
+
+async def update_equipos_mantenimiento(session: AnySession, items: List[EquipoMantenimientoBatchUpdate], all_or_nothing: bool = False) -> Tuple[Dict[int, EquipoMantenimiento], Dict[int, str]]:
+    """Update many equipment rows by ID in one transaction; missing rows and unknown references are reported per index."""
+    return await batch_update(session, EquipoMantenimiento, items, EQUIPO_MANTENIMIENTO_REFERENCES, all_or_nothing)
 
-    session.delete(db_equipo)
-    session.commit()
-    return db_equipo
\ No newline at end of file
+async def delete_equipos_mantenimiento(session: AnySession, ids: List[UUID], all_or_nothing: bool = False) -> Tuple[Dict[int, EquipoMantenimiento], Dict[int, str]]:
+    """Delete many equipment rows and all their fotos with one bulk DELETE per table; missing rows are reported per index."""
+    return await batch_delete(session, EquipoMantenimiento, ids, delete_equipos_children, all_or_nothing)
@@ -1,91 +1,242 @@
+import asyncio
+import mimetypes
 import os
+import re
+import time
 from fastapi import UploadFile
-from sqlmodel import Session, select
+from sqlmodel import delete, insert, select
+from app.db.database import AnySession, maybe_await, run_transaction
 from app.models.foto_mantenimiento import FotoMantenimiento
-from app.schemas.foto_mantenimiento import FotoMantenimientoCreate, FotoMantenimientoUpdate
-from uuid import UUID, uuid4
-from typing import List, Optional
-
-async def get_foto_mantenimientos(session: Session, skip: int = 0, limit: int = 100) -> List[FotoMantenimiento]:
-    """Get a list of foto_mantenimientos with pagination."""
-    return session.exec(select(FotoMantenimiento).offset(skip).limit(limit)).all()
-
-async def get_foto_mantenimiento(session: Session, id: UUID) -> Optional[FotoMantenimiento]:
+from app.models.media_blob import MediaBlob
+from app.schemas.foto_mantenimiento import EXTENSION_PATTERN, FotoMantenimientoCreate, FotoMantenimientoUpdate, FotoMantenimientoFilter, FotoMantenimientoRegister, FotoUploadUrlRequest
+from uuid import UUID
+from typing import List, Optional, Tuple
+from app.core.config import MEDIA_RECONCILE_GRACE_SECONDS, STORAGE_PRESIGN_EXPIRES_SECONDS
+from app.core.storage import PresignedUpload, media_key, storage
+from app.services.media_blob import BlobRef, acquire_blobs, blob_url, commit_and_collect, register_blob, release_blobs
+from app.services.returning import update_returning
+from app.utils.save_file import StoredFile, discard_file, stream_upload_to_temp
+from app.workers.image_variants import image_variant_worker
+from starlette.concurrency import run_in_threadpool
+from app.utils.filters import apply_filters
+from app.utils.pagination import paginate
+
+class UploadNotStoredError(Exception):
+    """El archivo que se quiere registrar no está en el almacenamiento o no coincide con lo declarado."""
+
+class InvalidUploadError(Exception):
+    """Ni el nombre ni el tipo del archivo dan una extensión válida para su clave."""
+
+def upload_extension(file: UploadFile) -> str:
+    """
+    Extensión de la clave de un archivo subido: la del nombre si cumple EXTENSION_PATTERN (como en
+    /upload-url), si no la que corresponde a su Content-Type. El nombre lo elige el cliente.
+    """
+    candidates = [os.path.splitext(file.filename or "")[1][1:]]
+    if file.content_type:
+        candidates.append((mimetypes.guess_extension(file.content_type.split(";")[0].strip()) or "")[1:])
+    for ext in candidates:
+        if re.match(EXTENSION_PATTERN, ext):
+            return ext
+    raise InvalidUploadError(f"No se puede deducir la extensión de {file.filename!r}")
+
+FOTO_MANTENIMIENTO_SORT_FIELDS = {"created_at": FotoMantenimiento.created_at, "categoria": FotoMantenimiento.categoria}
+
+async def get_foto_mantenimientos(session: AnySession, skip: int = 0, limit: int = 100, cursor: Optional[str] = None,
+        filters: Optional[FotoMantenimientoFilter] = None, sort: Optional[str] = None) -> List[FotoMantenimiento]:
+    """Get a list of foto_mantenimientos, filtered and sorted, with offset or keyset (cursor) pagination."""
+    statement = apply_filters(select(FotoMantenimiento), FotoMantenimiento, filters)
+    result = await maybe_await(session.exec(paginate(statement, FotoMantenimiento, skip, limit, cursor, sort, FOTO_MANTENIMIENTO_SORT_FIELDS)))
+    return result.all()
+
+async def get_foto_mantenimiento(session: AnySession, id: UUID) -> Optional[FotoMantenimiento]:
     """Get a single foto_mantenimiento by ID."""
-    return session.get(FotoMantenimiento, id)
+    return await maybe_await(session.get(FotoMantenimiento, id))
 
-async def create_foto_mantenimiento(session: Session, foto_create: FotoMantenimientoCreate) -> FotoMantenimiento:
+async def create_foto_mantenimiento(session: AnySession, foto_create: FotoMantenimientoCreate) -> FotoMantenimiento:
     """Create a new foto_mantenimiento."""
     db_foto = FotoMantenimiento.model_validate(foto_create.model_dump())
     session.add(db_foto)
-    session.commit()
-    session.refresh(db_foto)
+    await maybe_await(session.commit())
+    await maybe_await(session.refresh(db_foto))
     return db_foto
 
-async def update_foto_mantenimiento(session: Session, id: UUID, foto_update: FotoMantenimientoUpdate) -> Optional[FotoMantenimiento]:
-    """Update an existing foto_mantenimiento."""
-    db_foto = await get_foto_mantenimiento(session, id)
-    if not db_foto:
-        return None
-
-    update_data = foto_update.model_dump(exclude_unset=True)
-    for key, value in update_data.items():
-        setattr(db_foto, key, value)
-
-    session.add(db_foto)
-    session.commit()
-    session.refresh(db_foto)
-    return db_foto
+async def update_foto_mantenimiento(session: AnySession, id: UUID, foto_update: FotoMantenimientoUpdate) -> Optional[FotoMantenimiento]:
+    """Update an existing foto_mantenimiento with a single UPDATE ... RETURNING."""
+    return await update_returning(session, FotoMantenimiento, id, foto_update.model_dump(exclude_unset=True))
 
 
 
 async def save_and_register_foto(
-    session: Session,
+    session: AnySession,
     categoria: str,
     equipos_mantenimiento_id: UUID,
     file: UploadFile
 ) -> FotoMantenimiento:
-    ext = file.filename.split(".")[-1]
-    filename = f"{uuid4()}.{ext}"
-
-    directory = f"media/{categoria}"
-    os.makedirs(directory, exist_ok=True)
-    file_path = os.path.join(directory, filename)
-
-    with open(file_path, "wb") as buffer:
-        buffer.write(await file.read())
-
-    public_url = f"/media/{categoria}/{filename}"
-
-    foto_create = FotoMantenimientoCreate(
-        categoria=categoria,
-        url=public_url,
-        nombre=filename,
-        equipos_mantenimiento_id=equipos_mantenimiento_id
+    """
+    Guarda la foto por contenido (SHA-256): si los mismos bytes ya existen se reutiliza
+    el archivo y solo se incrementa su contador de referencias.
+    """
+    fotos = await save_and_register_fotos(session, categoria, equipos_mantenimiento_id, [file])
+    return fotos[0]
+
+async def _insert_fotos(session: AnySession, categoria: str, equipos_mantenimiento_id: UUID,
+        files: List[Tuple[StoredFile, str]]) -> Tuple[List[BlobRef], List[FotoMantenimiento]]:
+    """Transacción de save_and_register_fotos, de la referencia a los blobs al commit (ver run_transaction)."""
+    promoted = []
+    try:
+        blobs = await acquire_blobs(session, files, promoted)
+        rows = [
+            FotoMantenimiento.model_validate({
+                **FotoMantenimientoCreate(
+                    categoria=categoria,
+                    url=blob.url,
+                    nombre=os.path.basename(blob.url),
+                    equipos_mantenimiento_id=equipos_mantenimiento_id
+                ).model_dump(),
+                "checksum": blob.checksum,
+                "thumbnail_url": blob.thumbnail_url,
+                "medium_url": blob.medium_url,
+            }).model_dump()
+            for blob in blobs
+        ]
+        result = await maybe_await(session.exec(
+            insert(FotoMantenimiento).returning(FotoMantenimiento, sort_by_parameter_order=True),
+            params=rows,
+        ))
+        db_fotos = result.scalars().all()
+        # RETURNING ya trae las filas completas: se separan de la sesión para que el commit
+        # no las expire y no haga falta un SELECT por foto
+        for db_foto in db_fotos:
+            session.expunge(db_foto)
+        await maybe_await(session.commit())
+    except Exception:
+        # Los blobs que esta operación creó quedarían huérfanos tras el rollback. Se borran antes,
+        # con sus filas aún bloqueadas: una subida concurrente del mismo contenido espera y escribe el suyo
+        await run_in_threadpool(storage.delete, promoted)
+        await maybe_await(session.rollback())
+        raise
+    return blobs, db_fotos
+
+async def save_and_register_fotos(
+    session: AnySession,
+    categoria: str,
+    equipos_mantenimiento_id: UUID,
+    files: List[UploadFile]
+) -> List[FotoMantenimiento]:
+    """
+    Guarda varias fotos de un mismo equipo: los archivos se escriben en paralelo y todas
+    las filas se insertan con un único INSERT ... RETURNING y un solo commit. Si algo
+    falla se hace rollback y se borran los archivos que esta operación creó.
+    """
+    extensions = [upload_extension(file) for file in files]
+    results = await asyncio.gather(
+        *(stream_upload_to_temp(file, storage.temp_directory) for file in files),
+        return_exceptions=True,
     )
-
-    db_foto = FotoMantenimiento.model_validate(foto_create.model_dump())
-    session.add(db_foto)
-    session.commit()
-    session.refresh(db_foto)
+    errors = [r for r in results if isinstance(r, BaseException)]
+    if errors:
+        for r in results:
+            if not isinstance(r, BaseException):
+                await run_in_threadpool(discard_file, r.path)
+        raise errors[0]
+
+    # La transacción bloquea las filas de los blobs mientras mueve los archivos a su clave definitiva
+    blobs, db_fotos = await run_transaction(session, _insert_fotos, categoria, equipos_mantenimiento_id, list(zip(results, extensions)))
+
+    # Las variantes se generan fuera de la petición; las URLs aparecen cuando estén listas
+    for blob in {blob.checksum: blob for blob in blobs if blob.created}.values():
+        image_variant_worker.submit(blob.checksum, media_key(blob.url))
+
+    return db_fotos
+
+async def create_upload_url(session: AnySession, request: FotoUploadUrlRequest) -> Tuple[str, Optional[PresignedUpload]]:
+    """
+    Prepara la subida directa de una foto al almacenamiento: devuelve su clave (por contenido) y
+    la subida firmada, o None si esos bytes ya están almacenados y basta con registrarlos.
+    """
+    blob = await maybe_await(session.get(MediaBlob, request.checksum))
+    # Un contenido ya almacenado conserva la extensión con la que se subió la primera vez
+    key = media_key(blob.url if blob else blob_url(request.checksum, request.extension))
+    if blob and await run_in_threadpool(storage.stat, key) is not None:
+        return key, None
+    upload = await run_in_threadpool(storage.presign_upload, key, request.checksum, request.size, STORAGE_PRESIGN_EXPIRES_SECONDS)
+    return key, upload
+
+async def _insert_registered_foto(session: AnySession, data: FotoMantenimientoRegister, size: int) -> Tuple[BlobRef, FotoMantenimiento]:
+    """Transacción de register_foto, de la referencia al blob al commit (ver run_transaction)."""
+    try:
+        ref = await register_blob(session, data.checksum, data.extension, size)
+        # Con la fila del blob ya bloqueada: si un borrado concurrente se llevó el archivo desde el
+        # stat no hay nada que registrar. Lo subido hace poco ya está a salvo del reconciliador por
+        # el margen; un contenido antiguo que se reutiliza se toca (en S3, una copia sobre sí mismo)
+        current = await run_in_threadpool(storage.stat, media_key(ref.url))
+        if current is not None and current.modified < time.time() - MEDIA_RECONCILE_GRACE_SECONDS / 2:
+            current = current if await run_in_threadpool(storage.touch, current.key) else None
+        if current is None:
+            raise UploadNotStoredError("El archivo ya no está en el almacenamiento")
+        row = FotoMantenimiento.model_validate({
+            **FotoMantenimientoCreate(
+                categoria=data.categoria,
+                url=ref.url,
+                nombre=os.path.basename(ref.url),
+                equipos_mantenimiento_id=data.equipos_mantenimiento_id
+            ).model_dump(),
+            "checksum": ref.checksum,
+            "thumbnail_url": ref.thumbnail_url,
+            "medium_url": ref.medium_url,
+        }).model_dump()
+        result = await maybe_await(session.exec(insert(FotoMantenimiento).returning(FotoMantenimiento), params=[row]))
+        db_foto = result.scalars().one()
+        session.expunge(db_foto)
+        await maybe_await(session.commit())
+    except Exception:
+        # El objeto lo subió el cliente y puede volver a registrarlo: no se borra
+        await maybe_await(session.rollback())
+        raise
+    return ref, db_foto
+
+async def register_foto(session: AnySession, data: FotoMantenimientoRegister) -> FotoMantenimiento:
+    """
+    Registra la fila de una foto que el cliente ya subió directamente al almacenamiento (ver
+    create_upload_url). Lanza UploadNotStoredError si el archivo no está o no es el declarado.
+    """
+    blob = await maybe_await(session.get(MediaBlob, data.checksum))
+    key = media_key(blob.url if blob else blob_url(data.checksum, data.extension))
+    stored = await run_in_threadpool(storage.stat, key)
+    if stored is None:
+        raise UploadNotStoredError("El archivo no se ha subido o la subida no terminó")
+    if stored.checksum is not None and stored.checksum != data.checksum:
+        raise UploadNotStoredError("El archivo almacenado no coincide con el checksum")
+
+    ref, db_foto = await run_transaction(session, _insert_registered_foto, data, stored.size)
+
+    if ref.created:
+        image_variant_worker.submit(ref.checksum, media_key(ref.url))
     return db_foto
 
-async def delete_foto_mantenimiento(session: Session, id: UUID) -> FotoMantenimiento | None:
-    """Elimina el registro de foto y borra el archivo físico si existe."""
-    db_foto = session.get(FotoMantenimiento, id)
-    if not db_foto:
+async def delete_fotos_where(session: AnySession, condition) -> Tuple[List[FotoMantenimiento], List[str]]:
+    """
+    Elimina en bloque las fotos que cumplen `condition` con un DELETE ... RETURNING y libera sus
+    blobs. Devuelve las fotos eliminadas y las claves de los archivos que ya no referencia ninguna foto. No hace commit.
+    """
+    result = await maybe_await(session.exec(delete(FotoMantenimiento).where(condition).returning(FotoMantenimiento)))
+    fotos = result.scalars().all()
+    for db_foto in fotos:
+        session.expunge(db_foto)
+    blobs, keys = await release_blobs(session, [db_foto.checksum for db_foto in fotos if db_foto.checksum])
+    # Fotos guardadas antes del almacenamiento por contenido: un archivo por foto
+    keys += [media_key(db_foto.url) for db_foto in fotos if db_foto.checksum not in blobs]
+    return fotos, keys
+
+async def delete_foto_mantenimiento(session: AnySession, id: UUID) -> FotoMantenimiento | None:
+    """Elimina el registro de foto; el archivo se borra en segundo plano cuando ya no lo referencia ninguna foto."""
+    return await run_transaction(session, _delete_foto, id)
+
+async def _delete_foto(session: AnySession, id: UUID) -> FotoMantenimiento | None:
+    fotos, keys = await delete_fotos_where(session, FotoMantenimiento.id == id)
+    if not fotos:
+        await maybe_await(session.rollback())
         return None
-
-    # Eliminar archivo físico
-    file_path = db_foto.url.lstrip("/")  # elimina el "/" inicial de /media/...
-    if os.path.exists(file_path):
-        try:
-            os.remove(file_path)
-        except Exception as e:
-            # Log opcional: el archivo ya puede no existir o tener permisos
-            pass
-
-    # Eliminar de la base de datos
-    session.delete(db_foto)
-    session.commit()
-    return db_foto
\ No newline at end of file
+    await commit_and_collect(session, keys)
+    return fotos[0]
@@ -0,0 +1,247 @@
+import csv
+import io
+import json
+from dataclasses import dataclass
+from datetime import datetime
+from itertools import islice
+from typing import BinaryIO, Callable, Dict, Iterator, List, Optional, Tuple, Type, Union
+from uuid import uuid4
+from pydantic import BaseModel, ValidationError
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, Uuid, func, or_, select
+from sqlmodel import Session, insert
+from app.core.config import IMPORT_BATCH_SIZE, IMPORT_MAX_REPORTED_ERRORS
+from app.db.database import dialect_insert, engine
+from app.models.cliente import Cliente
+from app.models.ubicacion import Ubicacion
+from app.models.mantenimiento_general import MantenimientoGeneral
+from app.schemas.cliente import ClienteCreate
+from app.schemas.ubicacion import UbicacionCreate
+from app.schemas.mantenimiento_general import MantenimientoGeneralImport
+from app.schemas.importer import ImportFormat, ImportKind, ImportReport, ImportRowError
+
+ProgressCallback = Callable[[ImportReport], None]
+
+# Tablas temporales de staging: cada importación las crea en su conexión y las borra al terminar
+_staging_metadata = MetaData()
+
+
+def _staging_table(name: str, *columns: str) -> Table:
+    return Table(
+        name,
+        _staging_metadata,
+        Column("line", Integer, nullable=False),
+        Column("id", Uuid, nullable=False),
+        *(Column(column, String) for column in columns),
+        Column("created_at", DateTime, nullable=False),
+        prefixes=["TEMPORARY"],
+    )
+
+
+class InvalidImportFileError(Exception):
+    """El archivo no se puede leer en el formato indicado (codificación, cabecera CSV)."""
+
+
+def _csv_rows(text: io.TextIOBase) -> Iterator[Tuple[int, Union[dict, str]]]:
+    reader = csv.DictReader(text)
+    if not reader.fieldnames:
+        raise InvalidImportFileError("El CSV no tiene fila de cabecera")
+    for row in reader:
+        # Las columnas sobrantes quedan bajo la clave None; el esquema ignora los campos extra
+        row.pop(None, None)
+        yield reader.line_num, row
+
+
+def _ndjson_rows(text: io.TextIOBase) -> Iterator[Tuple[int, Union[dict, str]]]:
+    for line_number, line in enumerate(text, start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except json.JSONDecodeError as e:
+            yield line_number, f"JSON inválido: {e.msg}"
+            continue
+        yield line_number, row if isinstance(row, dict) else "Se esperaba un objeto JSON"
+
+
+def iter_rows(stream: BinaryIO, format: ImportFormat) -> Iterator[Tuple[int, Union[dict, str]]]:
+    """
+    Lee el archivo fila a fila sin cargarlo entero en memoria. Devuelve (línea, fila) o
+    (línea, mensaje de error) para las filas que ni siquiera se pueden parsear.
+    """
+    text = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+    try:
+        rows = _csv_rows(text) if format == ImportFormat.csv else _ndjson_rows(text)
+        yield from rows
+    except UnicodeDecodeError:
+        raise InvalidImportFileError("El archivo debe estar codificado en UTF-8")
+    finally:
+        # No cerrar el stream del llamador al liberar el wrapper
+        text.detach()
+
+
+def _validation_message(error: Exception) -> str:
+    if isinstance(error, ValidationError):
+        return "; ".join(f"{'.'.join(map(str, e['loc'])) or 'fila'}: {e['msg']}" for e in error.errors())
+    return str(error)
+
+
+def _record_error(report: ImportReport, line: int, message: str):
+    if len(report.errors) < IMPORT_MAX_REPORTED_ERRORS:
+        report.errors.append(ImportRowError(line=line, error=message))
+
+
+def _copy_rows(session: Session, staging: Table, rows: List[dict]):
+    """Carga un lote en la tabla de staging: COPY en PostgreSQL, executemany en el resto."""
+    if not rows:
+        return
+    columns = [column.name for column in staging.columns]
+    if session.bind.dialect.name != "postgresql":
+        session.exec(insert(staging), params=rows)
+        return
+
+    buffer = io.StringIO()
+    # QUOTE_NONNUMERIC: "" es una cadena vacía y el campo sin comillas es NULL, como espera COPY ... CSV
+    writer = csv.writer(buffer, quoting=csv.QUOTE_NONNUMERIC)
+    writer.writerows([row[column] for column in columns] for row in rows)
+    buffer.seek(0)
+    cursor = session.connection().connection.driver_connection.cursor()
+    try:
+        cursor.copy_expert(f"COPY {staging.name} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)", buffer)
+    finally:
+        cursor.close()
+
+
+def _insert_by_natural_key(session: Session, staging: Table, table: Table, key: str) -> int:
+    # La primera aparición de cada clave en el archivo; las que ya existen en la tabla se omiten
+    first_lines = select(func.min(staging.c.line)).group_by(staging.c[key])
+    source = select(staging.c.id, staging.c[key], staging.c.created_at).where(staging.c.line.in_(first_lines))
+    statement = (
+        dialect_insert(session, table)
+        .from_select(["id", key, "created_at"], source)
+        .on_conflict_do_nothing(index_elements=[key])
+    )
+    return session.exec(statement).rowcount
+
+
+def _load_clientes(session: Session, staging: Table, report: ImportReport):
+    report.inserted = _insert_by_natural_key(session, staging, Cliente.__table__, "nombre")
+
+
+def _load_ubicaciones(session: Session, staging: Table, report: ImportReport):
+    report.inserted = _insert_by_natural_key(session, staging, Ubicacion.__table__, "ubicacion")
+
+
+def _load_mantenimientos(session: Session, staging: Table, report: ImportReport):
+    cliente, ubicacion, mantenimiento = Cliente.__table__, Ubicacion.__table__, MantenimientoGeneral.__table__
+    unresolved_rows = (
+        select(staging.c.line, staging.c.cliente, staging.c.ubicacion, cliente.c.id, ubicacion.c.id)
+        .select_from(staging)
+        .outerjoin(cliente, cliente.c.nombre == staging.c.cliente)
+        .outerjoin(ubicacion, ubicacion.c.ubicacion == staging.c.ubicacion)
+        .where(or_(cliente.c.id.is_(None), ubicacion.c.id.is_(None)))
+    )
+    report.unresolved = session.exec(select(func.count()).select_from(unresolved_rows.subquery())).scalar_one()
+
+    # La clave natural es (cliente, ubicación, periodo): la primera aparición en el archivo, y solo
+    # si no existe ya, para que reimportar el mismo archivo no duplique mantenimientos
+    first_lines = select(func.min(staging.c.line)).group_by(staging.c.cliente, staging.c.ubicacion, staging.c.periodo)
+    existing = (
+        select(mantenimiento.c.id)
+        .where(
+            mantenimiento.c.cliente_id == cliente.c.id,
+            mantenimiento.c.ubicacion_id == ubicacion.c.id,
+            mantenimiento.c.periodo == staging.c.periodo,
+        )
+        .exists()
+    )
+    source = (
+        select(staging.c.id, cliente.c.id, ubicacion.c.id, staging.c.periodo, staging.c.created_at)
+        .select_from(staging)
+        .join(cliente, cliente.c.nombre == staging.c.cliente)
+        .join(ubicacion, ubicacion.c.ubicacion == staging.c.ubicacion)
+        .where(staging.c.line.in_(first_lines), ~existing)
+    )
+    statement = insert(mantenimiento).from_select(
+        ["id", "cliente_id", "ubicacion_id", "periodo", "created_at"], source
+    )
+    report.inserted = session.exec(statement).rowcount
+
+    remaining = IMPORT_MAX_REPORTED_ERRORS - len(report.errors)
+    if remaining <= 0:
+        return
+    missing = session.exec(unresolved_rows.order_by(staging.c.line).limit(remaining)).all()
+    for line, cliente_nombre, ubicacion_nombre, cliente_id, ubicacion_id in missing:
+        message = f"el cliente '{cliente_nombre}' no existe" if cliente_id is None else f"la ubicación '{ubicacion_nombre}' no existe"
+        _record_error(report, line, message)
+
+
+@dataclass(frozen=True)
+class _ImportSpec:
+    schema: Type[BaseModel]
+    staging: Table
+    load: Callable[[Session, Table, ImportReport], None]
+
+
+_SPECS: Dict[ImportKind, _ImportSpec] = {
+    ImportKind.clientes: _ImportSpec(ClienteCreate, _staging_table("import_clientes", "nombre"), _load_clientes),
+    ImportKind.ubicaciones: _ImportSpec(UbicacionCreate, _staging_table("import_ubicaciones", "ubicacion"), _load_ubicaciones),
+    ImportKind.mantenimientos: _ImportSpec(
+        MantenimientoGeneralImport,
+        _staging_table("import_mantenimientos", "cliente", "ubicacion", "periodo"),
+        _load_mantenimientos,
+    ),
+}
+
+
+def import_records(stream: BinaryIO, kind: ImportKind, format: ImportFormat, progress: Optional[ProgressCallback] = None) -> ImportReport:
+    """
+    Importa un archivo CSV o NDJSON completo en una sola transacción. Las filas se validan por
+    lotes de IMPORT_BATCH_SIZE contra el esquema de creación y se cargan en una tabla temporal
+    (con COPY en PostgreSQL); al final un único INSERT ... SELECT pasa de staging a la tabla
+    real, omitiendo las claves naturales que ya existen (y las repetidas en el archivo). La memoria usada depende del tamaño
+    del lote, no del archivo.
+
+    Es síncrona (usa el motor sync y psycopg2 para COPY): desde el event loop hay que llamarla
+    con run_in_threadpool.
+    """
+    spec = _SPECS[kind]
+    report = ImportReport(kind=kind)
+    staging = spec.staging
+    rows = iter_rows(stream, format)
+
+    with Session(engine) as session:
+        connection = session.connection()
+        staging.drop(connection, checkfirst=True)
+        staging.create(connection)
+        valid = 0
+        while batch := list(islice(rows, IMPORT_BATCH_SIZE)):
+            staged = []
+            for line, row in batch:
+                report.rows_read += 1
+                try:
+                    if isinstance(row, str):
+                        raise ValueError(row)
+                    item = spec.schema.model_validate(row)
+                except ValueError as e:
+                    report.rows_invalid += 1
+                    _record_error(report, line, _validation_message(e))
+                    continue
+                staged.append({"line": line, "id": uuid4(), "created_at": datetime.now(), **item.model_dump()})
+            _copy_rows(session, staging, staged)
+            valid += len(staged)
+            if progress:
+                progress(report)
+
+        spec.load(session, staging, report)
+        report.skipped = valid - report.inserted - report.unresolved
+        staging.drop(connection)
+        session.commit()
+    return report
+
+
+def detect_format(filename: Optional[str], content_type: Optional[str] = None) -> ImportFormat:
+    """Formato por extensión o Content-Type; CSV si no se puede deducir."""
+    name = (filename or "").lower()
+    if name.endswith((".ndjson", ".jsonl")) or (content_type or "").startswith(("application/x-ndjson", "application/jsonl")):
+        return ImportFormat.ndjson
+    return ImportFormat.csv
@@ -1,47 +1,116 @@
-from sqlmodel import Session, select
+from sqlmodel import delete, select
+from sqlalchemy.orm import joinedload, selectinload
+from app.db.database import AnySession, maybe_await, run_transaction
 from app.models.mantenimiento_general import MantenimientoGeneral
-from app.schemas.mantenimiento_general import MantenimientoGeneralCreate, MantenimientoGeneralUpdate
+from app.models.equipo_mantenimiento import EquipoMantenimiento
+from app.models.foto_mantenimiento import FotoMantenimiento
+from app.models.cliente import Cliente
+from app.models.ubicacion import Ubicacion
+from app.schemas.mantenimiento_general import MantenimientoGeneralCreate, MantenimientoGeneralUpdate, MantenimientoGeneralFilter, MantenimientoGeneralBatchUpdate
 from uuid import UUID
-from typing import List, Optional
+from typing import Dict, List, Optional, Tuple
+from app.services.batch import batch_create, batch_delete, batch_update
+from app.services.foto_mantenimiento import delete_fotos_where
+from app.services.media_blob import commit_and_collect
+from app.services.returning import delete_returning, update_returning
+from app.utils.filters import apply_filters
+from app.utils.pagination import paginate
 from sqlalchemy.exc import IntegrityError
 
-async def get_mantenimiento_general(session: Session, skip: int = 0, limit: int = 100) -> List[MantenimientoGeneral]:
-    """Get a list of mantenimiento general records with pagination."""
-    return session.exec(select(MantenimientoGeneral).offset(skip).limit(limit)).all()
+MANTENIMIENTO_GENERAL_SORT_FIELDS = {"created_at": MantenimientoGeneral.created_at, "periodo": MantenimientoGeneral.periodo}
 
-async def get_mantenimiento_general_by_id(session: Session, id: UUID) -> Optional[MantenimientoGeneral]:
+async def get_mantenimiento_general(session: AnySession, skip: int = 0, limit: int = 100, cursor: Optional[str] = None,
+        filters: Optional[MantenimientoGeneralFilter] = None, sort: Optional[str] = None) -> List[MantenimientoGeneral]:
+    """Get a list of mantenimiento general records, filtered and sorted, with offset or keyset (cursor) pagination."""
+    statement = apply_filters(select(MantenimientoGeneral), MantenimientoGeneral, filters)
+    result = await maybe_await(session.exec(paginate(statement, MantenimientoGeneral, skip, limit, cursor, sort, MANTENIMIENTO_GENERAL_SORT_FIELDS)))
+    return result.all()
+
+def mantenimiento_general_export_statement(filters: Optional[MantenimientoGeneralFilter] = None):
+    """Columns for the streaming export: each mantenimiento with its cliente and ubicacion names, oldest first."""
+    statement = (
+        select(
+            MantenimientoGeneral.id,
+            MantenimientoGeneral.periodo,
+            MantenimientoGeneral.created_at,
+            MantenimientoGeneral.cliente_id,
+            Cliente.nombre.label("cliente"),
+            MantenimientoGeneral.ubicacion_id,
+            Ubicacion.ubicacion,
+        )
+        .join(Cliente, Cliente.id == MantenimientoGeneral.cliente_id)
+        .join(Ubicacion, Ubicacion.id == MantenimientoGeneral.ubicacion_id)
+    )
+    statement = apply_filters(statement, MantenimientoGeneral, filters)
+    return statement.order_by(MantenimientoGeneral.created_at, MantenimientoGeneral.id)
+
+async def get_mantenimiento_general_by_id(session: AnySession, id: UUID) -> Optional[MantenimientoGeneral]:
     """Get a single mantenimiento general record by ID."""
-    return session.get(MantenimientoGeneral, id)
+    return await maybe_await(session.get(MantenimientoGeneral, id))
+
+async def get_mantenimiento_general_report(session: AnySession, id: UUID) -> Optional[MantenimientoGeneral]:
+    """
+    Get a mantenimiento general record with its cliente, ubicacion, equipos and their fotos.
+    Uses a fixed number of queries regardless of how many equipos/fotos there are:
+    one joined SELECT for the record, cliente and ubicacion, one for equipos and one for fotos.
+    """
+    statement = (
+        select(MantenimientoGeneral)
+        .where(MantenimientoGeneral.id == id)
+        .options(
+            joinedload(MantenimientoGeneral.cliente),
+            joinedload(MantenimientoGeneral.ubicacion),
+            selectinload(MantenimientoGeneral.equipos).selectinload(EquipoMantenimiento.fotos),
+        )
+    )
+    result = await maybe_await(session.exec(statement))
+    return result.first()
 
-async def create_mantenimiento_general(session: Session, mantenimiento_create: MantenimientoGeneralCreate) -> MantenimientoGeneral:
+async def create_mantenimiento_general(session: AnySession, mantenimiento_create: MantenimientoGeneralCreate) -> MantenimientoGeneral:
     """Create a new mantenimiento general record."""
     db_mantenimiento = MantenimientoGeneral(**mantenimiento_create.model_dump())
     session.add(db_mantenimiento)
-    session.commit()
-    session.refresh(db_mantenimiento)
+    await maybe_await(session.commit())
+    await maybe_await(session.refresh(db_mantenimiento))
     return db_mantenimiento
 
-async def update_mantenimiento_general(session: Session, id: UUID, mantenimiento_update: MantenimientoGeneralUpdate) -> Optional[MantenimientoGeneral]:
-    """Update an existing mantenimiento general record."""
-    db_mantenimiento = await get_mantenimiento_general_by_id(session, id)
-    if not db_mantenimiento:
-        return None
+async def update_mantenimiento_general(session: AnySession, id: UUID, mantenimiento_update: MantenimientoGeneralUpdate) -> Optional[MantenimientoGeneral]:
+    """Update an existing mantenimiento general record with a single UPDATE ... RETURNING."""
+    return await update_returning(session, MantenimientoGeneral, id, mantenimiento_update.model_dump(exclude_unset=True))
 
-    update_data = mantenimiento_update.model_dump(exclude_unset=True)
-    for key, value in update_data.items():
-        setattr(db_mantenimiento, key, value)
+async def delete_mantenimientos_children(session: AnySession, ids: List[UUID]) -> List[str]:
+    """Delete the equipos and fotos of the given records in bulk (no commit); returns the media keys left unreferenced."""
+    equipos = select(EquipoMantenimiento.id).where(EquipoMantenimiento.mantenimiento_general_id.in_(ids))
+    _, keys = await delete_fotos_where(session, FotoMantenimiento.equipos_mantenimiento_id.in_(equipos))
+    await maybe_await(session.exec(delete(EquipoMantenimiento).where(EquipoMantenimiento.mantenimiento_general_id.in_(ids))))
+    return keys
 
-    session.add(db_mantenimiento)
-    session.commit()
-    session.refresh(db_mantenimiento)
-    return db_mantenimiento
+async def delete_mantenimiento_general(session: AnySession, id: UUID) -> Optional[MantenimientoGeneral]:
+    """
+    Delete a mantenimiento general record with all its equipos and fotos: one bulk DELETE per table,
+    whatever the size of the tree. Unreferenced media files are removed in the background.
+    """
+    return await run_transaction(session, _delete_mantenimiento, id)
 
-async def delete_mantenimiento_general(session: Session, id: UUID) -> Optional[MantenimientoGeneral]:
-    """Delete a mantenimiento general record by ID."""
-    db_mantenimiento = await get_mantenimiento_general_by_id(session, id)
-    if not db_mantenimiento:
+async def _delete_mantenimiento(session: AnySession, id: UUID) -> Optional[MantenimientoGeneral]:
+    keys = await delete_mantenimientos_children(session, [id])
+    db_mantenimiento = await delete_returning(session, MantenimientoGeneral, id, commit=False)
+    if db_mantenimiento is None:
+        await maybe_await(session.rollback())
         return None
+    await commit_and_collect(session, keys)
+    return db_mantenimiento
+
+MANTENIMIENTO_GENERAL_REFERENCES = {"cliente_id": Cliente.id, "ubicacion_id": Ubicacion.id}
+
+async def create_mantenimientos_general(session: AnySession, items: List[MantenimientoGeneralCreate], all_or_nothing: bool = False) -> Tuple[Dict[int, MantenimientoGeneral], Dict[int, str]]:
+    """Create many mantenimiento general records in one INSERT ... RETURNING; unknown cliente/ubicacion are reported per index."""
+    return await batch_create(session, MantenimientoGeneral, items, MANTENIMIENTO_GENERAL_REFERENCES, all_or_nothing)
+
+async def update_mantenimientos_general(session: AnySession, items: List[MantenimientoGeneralBatchUpdate], all_or_nothing: bool = False) -> Tuple[Dict[int, MantenimientoGeneral], Dict[int, str]]:
+    """Update many mantenimiento general records by ID in one transaction; errors are reported per index."""
+    return await batch_update(session, MantenimientoGeneral, items, MANTENIMIENTO_GENERAL_REFERENCES, all_or_nothing)
 
-    session.delete(db_mantenimiento)
-    session.commit()
-    return db_mantenimiento
\ No newline at end of file
+async def delete_mantenimientos_general(session: AnySession, ids: List[UUID], all_or_nothing: bool = False) -> Tuple[Dict[int, MantenimientoGeneral], Dict[int, str]]:
+    """Delete many mantenimiento general records with all their equipos and fotos, one bulk DELETE per table; missing records are reported per index."""
+    return await batch_delete(session, MantenimientoGeneral, ids, delete_mantenimientos_children, all_or_nothing)
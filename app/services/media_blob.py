@@ -0,0 +1,173 @@
+import asyncio
+from collections import Counter
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Set, Tuple
+from sqlalchemy import case
+from sqlmodel import delete, update
+from starlette.concurrency import run_in_threadpool
+from app.core.storage import media_key, storage
+from app.db.database import AnySession, dialect_insert, maybe_await
+from app.models.foto_mantenimiento import FotoMantenimiento
+from app.models.media_blob import MediaBlob
+from app.utils.save_file import StoredFile, discard_file
+from app.workers.media_collector import media_collector
+
+
+@dataclass
+class BlobRef:
+    checksum: str
+    url: str
+    created: bool  # True si esta referencia creó el blob
+    thumbnail_url: Optional[str] = None
+    medium_url: Optional[str] = None
+
+
+def blob_url(checksum: str, ext: str) -> str:
+    """/media/blobs/ab/<sha256>.<ext>: dos niveles para no acumular miles de archivos en un directorio."""
+    return f"/media/blobs/{checksum[:2]}/{checksum}.{ext}"
+
+
+async def _reference_blobs(session: AnySession, rows: Dict[str, dict]) -> Dict[str, BlobRef]:
+    """
+    Upsert multi-fila que suma `ref_count` referencias a cada blob de `rows` (por checksum),
+    creando los que no existan. Bloquea las filas de los blobs hasta el commit.
+    """
+    statement = dialect_insert(session, MediaBlob).values(list(rows.values()))
+    statement = statement.on_conflict_do_update(
+        index_elements=[MediaBlob.checksum],
+        set_={"ref_count": MediaBlob.ref_count + statement.excluded.ref_count},
+    ).returning(MediaBlob.checksum, MediaBlob.url, MediaBlob.ref_count, MediaBlob.thumbnail_url, MediaBlob.medium_url)
+
+    result = await maybe_await(session.exec(statement))
+    refs = {}
+    for checksum, url, ref_count, thumbnail_url, medium_url in result.all():
+        refs[checksum] = BlobRef(
+            checksum=checksum,
+            url=url,
+            created=ref_count == rows[checksum]["ref_count"],
+            thumbnail_url=thumbnail_url,
+            medium_url=medium_url,
+        )
+    return refs
+
+
+async def acquire_blobs(session: AnySession, files: List[Tuple[StoredFile, str]], promoted: Optional[List[str]] = None) -> List[BlobRef]:
+    """
+    Registra una referencia por cada (archivo temporal, extensión) con un único upsert
+    multi-fila, creando los blobs que no existan, y guarda en el almacenamiento solo el
+    contenido que no estaba. No hace commit. El upsert bloquea las filas de los blobs
+    hasta el commit, por eso los archivos se guardan después: un borrado concurrente
+    del mismo blob no puede intercalarse. Devuelve las referencias en el mismo orden.
+
+    Las claves de los blobs creados por esta llamada se añaden a `promoted` a medida que se
+    guardan, también si otra falla: son las que hay que borrar (antes del rollback, con las
+    filas aún bloqueadas) si la transacción no llega a confirmarse.
+    """
+    promoted = promoted if promoted is not None else []
+    counts = Counter(stored.checksum for stored, _ in files)
+    rows = {}
+    for stored, ext in files:
+        rows.setdefault(stored.checksum, {
+            "checksum": stored.checksum,
+            "url": blob_url(stored.checksum, ext),
+            "size": stored.size,
+            "ref_count": counts[stored.checksum],
+        })
+
+    async def promote(stored: StoredFile, ref: BlobRef):
+        key = media_key(ref.url)
+        await run_in_threadpool(storage.promote, stored.path, key)
+        if ref.created:
+            promoted.append(key)
+
+    try:
+        refs = await _reference_blobs(session, rows)
+
+        # Un archivo por checksum; los temporales repetidos dentro del lote se descartan.
+        # storage.promote no reescribe el contenido ya almacenado, solo lo toca (ver media_reconciler)
+        promotions = {}
+        for stored, _ in files:
+            if stored.checksum in promotions:
+                await run_in_threadpool(discard_file, stored.path)
+            else:
+                promotions[stored.checksum] = promote(stored, refs[stored.checksum])
+        # Se esperan todas antes de propagar un error: ninguna termina después de la limpieza
+        results = await asyncio.gather(*promotions.values(), return_exceptions=True)
+        errors = [r for r in results if isinstance(r, BaseException)]
+        if errors:
+            raise errors[0]
+    except BaseException:
+        for stored, _ in files:
+            discard_file(stored.path)
+        raise
+    return [refs[stored.checksum] for stored, _ in files]
+
+
+async def acquire_blob(session: AnySession, stored: StoredFile, ext: str) -> BlobRef:
+    """Versión de acquire_blobs para un solo archivo."""
+    refs = await acquire_blobs(session, [(stored, ext)])
+    return refs[0]
+
+
+async def register_blob(session: AnySession, checksum: str, ext: str, size: int) -> BlobRef:
+    """
+    Registra una referencia a un contenido que el cliente ya subió directamente al almacenamiento
+    (ver foto_mantenimiento.register_foto). No hace commit.
+    """
+    rows = {checksum: {"checksum": checksum, "url": blob_url(checksum, ext), "size": size, "ref_count": 1}}
+    refs = await _reference_blobs(session, rows)
+    return refs[checksum]
+
+
+async def release_blobs(session: AnySession, checksums: List[str]) -> Tuple[Set[str], List[str]]:
+    """
+    Quita una referencia a cada blob por cada aparición de su checksum, con un UPDATE y un
+    DELETE para todo el lote. Devuelve (checksums que existían, claves a borrar): las claves
+    (archivo y variantes) son las de los blobs que se quedaron sin referencias, cuyas filas
+    ya se eliminaron (sin commit).
+    """
+    counts = Counter(checksums)
+    if not counts:
+        return set(), []
+    # Un CASE por checksum solo si alguno se repite; lo habitual es una referencia por blob
+    decrement = case(counts, value=MediaBlob.checksum, else_=0) if max(counts.values()) > 1 else 1
+    result = await maybe_await(session.exec(
+        update(MediaBlob)
+        .where(MediaBlob.checksum.in_(counts))
+        .values(ref_count=MediaBlob.ref_count - decrement)
+        .returning(MediaBlob.checksum)
+    ))
+    existing = {checksum for checksum, in result.all()}
+    if not existing:
+        return existing, []
+    result = await maybe_await(session.exec(
+        delete(MediaBlob)
+        .where(MediaBlob.checksum.in_(existing), MediaBlob.ref_count <= 0)
+        .returning(MediaBlob.url, MediaBlob.thumbnail_url, MediaBlob.medium_url)
+    ))
+    return existing, [media_key(url) for urls in result.all() for url in urls if url]
+
+
+async def commit_and_collect(session: AnySession, keys: List[str]):
+    """
+    Hace commit y deja el borrado de `keys` al recolector en segundo plano. Antes del commit,
+    mientras las filas de los blobs siguen bloqueadas, los archivos se mueven a la papelera
+    (storage.stage_delete): una subida concurrente del mismo contenido ya no los encuentra y
+    escribe el suyo. Si el commit falla vuelven a su sitio.
+    """
+    staged = await run_in_threadpool(storage.stage_delete, keys)
+    try:
+        await maybe_await(session.commit())
+    except BaseException:
+        # Sin await: también debe ejecutarse si la tarea fue cancelada
+        storage.restore(staged)
+        raise
+    media_collector.submit(trash for _, trash in staged)
+
+
+async def set_blob_variants(session: AnySession, checksum: str, thumbnail_url: Optional[str], medium_url: Optional[str]):
+    """Guarda las URLs de las variantes en el blob y en todas las fotos que lo comparten."""
+    values = {"thumbnail_url": thumbnail_url, "medium_url": medium_url}
+    await maybe_await(session.exec(update(MediaBlob).where(MediaBlob.checksum == checksum).values(**values)))
+    await maybe_await(session.exec(update(FotoMantenimiento).where(FotoMantenimiento.checksum == checksum).values(**values)))
+    await maybe_await(session.commit())
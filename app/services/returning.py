@@ -0,0 +1,38 @@
+from typing import Any, Dict
+from uuid import UUID
+from sqlmodel import delete, select, update
+from app.db.database import AnySession, maybe_await
+
+
+async def update_returning(session: AnySession, model, id: UUID, values: Dict[str, Any]):
+    """
+    Actualiza la fila `id` con un único UPDATE ... RETURNING y hace commit; devuelve la fila
+    actualizada o None si no existe. Sin campos que cambiar es un SELECT por clave primaria.
+    Las restricciones violadas (unicidad, clave foránea) salen como IntegrityError del UPDATE.
+    """
+    if not values:
+        result = await maybe_await(session.exec(select(model).where(model.id == id)))
+        return result.first()
+
+    result = await maybe_await(session.exec(update(model).where(model.id == id).values(**values).returning(model)))
+    instance = result.scalars().first()
+    # RETURNING trae la fila completa; fuera de la sesión el commit no la expira ni hace falta refresh
+    if instance is not None:
+        session.expunge(instance)
+    await maybe_await(session.commit())
+    return instance
+
+
+async def delete_returning(session: AnySession, model, id: UUID, commit: bool = True):
+    """
+    Elimina la fila `id` con un único DELETE ... RETURNING; devuelve la fila eliminada o None si
+    no existía. Una clave foránea que lo impide sale como IntegrityError. Con commit=False la
+    transacción queda abierta para el llamador.
+    """
+    result = await maybe_await(session.exec(delete(model).where(model.id == id).returning(model)))
+    instance = result.scalars().first()
+    if instance is not None:
+        session.expunge(instance)
+    if commit:
+        await maybe_await(session.commit())
+    return instance
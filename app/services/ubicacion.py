@@ -1,46 +1,58 @@
-from sqlmodel import Session, select
+from sqlmodel import select
+from app.core.cache import catalog_cache
+from app.db.database import AnySession, maybe_await
 from app.models.ubicacion import Ubicacion
-from app.schemas.ubicacion import UbicacionCreate, UbicacionUpdate
+from app.schemas.ubicacion import UbicacionCreate, UbicacionUpdate, UbicacionFilter
 from uuid import UUID
 from typing import List, Optional
+from app.services.returning import delete_returning, update_returning
+from app.utils.filters import apply_filters
+from app.utils.pagination import paginate
+from app.utils.search import search_statement
+
+UBICACION_SORT_FIELDS = {"created_at": Ubicacion.created_at, "ubicacion": Ubicacion.ubicacion}
+
+async def get_ubicaciones(session: AnySession, skip: int = 0, limit: int = 100, cursor: Optional[str] = None,
+        filters: Optional[UbicacionFilter] = None, sort: Optional[str] = None) -> List[Ubicacion]:
+    """Get a list of locations, filtered and sorted, with offset or keyset (cursor) pagination."""
+    statement = apply_filters(select(Ubicacion), Ubicacion, filters)
+    result = await maybe_await(session.exec(paginate(statement, Ubicacion, skip, limit, cursor, sort, UBICACION_SORT_FIELDS)))
+    return result.all()
+
+async def suggest_ubicaciones(session: AnySession, q: str, limit: int = 10) -> List[Ubicacion]:
+    """Autocomplete locations by name, accent- and case-insensitive, best matches first."""
+    statement = search_statement(session.bind.dialect.name, Ubicacion, Ubicacion.ubicacion, q, limit)
+    result = await maybe_await(session.exec(statement))
+    return result.all()
+
+async def get_ubicacion(session: AnySession, id: UUID) -> Optional[Ubicacion]:
+    """Get a single location by ID, read through the catalog cache (returns a detached instance on a hit)."""
+    cached = await catalog_cache.get("ubicacion", id)
+    if cached is not None:
+        return Ubicacion.model_validate(cached)
+    db_ubicacion = await maybe_await(session.get(Ubicacion, id))
+    if db_ubicacion is not None:
+        await catalog_cache.set("ubicacion", id, db_ubicacion.model_dump(mode="json"))
+    return db_ubicacion
 
-async def get_ubicaciones(session: Session, skip: int = 0, limit: int = 100) -> List[Ubicacion]:
-    """Get a list of locations with pagination."""
-    return session.exec(select(Ubicacion).offset(skip).limit(limit)).all()
-
-async def get_ubicacion(session: Session, id: UUID) -> Optional[Ubicacion]:
-    """Get a single location by ID."""
-    return session.get(Ubicacion, id)
-
-async def create_ubicacion(session: Session, ubicacion_create: UbicacionCreate) -> Ubicacion:
+async def create_ubicacion(session: AnySession, ubicacion_create: UbicacionCreate) -> Ubicacion:
     """Create a new location."""
-    db_ubicacion = Ubicacion(**ubicacion_create.dict())
+    db_ubicacion = Ubicacion(**ubicacion_create.model_dump())
     session.add(db_ubicacion)
-    session.commit()
-    session.refresh(db_ubicacion)
+    await maybe_await(session.commit())
+    await maybe_await(session.refresh(db_ubicacion))
     return db_ubicacion
 
-async def update_ubicacion(session: Session, id: UUID, ubicacion_update: UbicacionUpdate) -> Optional[Ubicacion]:
-    """Update an existing location."""
-    db_ubicacion = await get_ubicacion(session, id)
-    if not db_ubicacion:
-        return None
-
-    update_data = ubicacion_update.dict(exclude_unset=True)
-    for key, value in update_data.items():
-        setattr(db_ubicacion, key, value)
-
-    session.add(db_ubicacion)
-    session.commit()
-    session.refresh(db_ubicacion)
+async def update_ubicacion(session: AnySession, id: UUID, ubicacion_update: UbicacionUpdate) -> Optional[Ubicacion]:
+    """Update an existing location with a single UPDATE ... RETURNING."""
+    db_ubicacion = await update_returning(session, Ubicacion, id, ubicacion_update.model_dump(exclude_unset=True))
+    if db_ubicacion is not None:
+        await catalog_cache.invalidate("ubicacion", id)
     return db_ubicacion
 
-async def delete_ubicacion(session: Session, id: UUID) -> Optional[Ubicacion]:
-    """Delete a location by ID."""
-    db_ubicacion = await get_ubicacion(session, id)
-    if not db_ubicacion:
-        return None
-
-    session.delete(db_ubicacion)
-    session.commit()
+async def delete_ubicacion(session: AnySession, id: UUID) -> Optional[Ubicacion]:
+    """Delete a location by ID with a single DELETE ... RETURNING."""
+    db_ubicacion = await delete_returning(session, Ubicacion, id)
+    if db_ubicacion is not None:
+        await catalog_cache.invalidate("ubicacion", id)
     return db_ubicacion
\ No newline at end of file
@@ -0,0 +1,79 @@
+import csv
+import io
+from datetime import datetime
+from typing import AsyncIterator, List, Sequence
+
+import orjson
+from sqlalchemy.engine import Row
+from sqlmodel.ext.asyncio.session import AsyncSession
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import StreamingResponse
+
+from app.core.config import EXPORT_CHUNK_SIZE
+from app.db.database import session_scope
+from app.schemas.common import ExportFormat
+
+MEDIA_TYPES = {ExportFormat.ndjson: "application/x-ndjson", ExportFormat.csv: "text/csv; charset=utf-8"}
+
+
+async def stream_rows(statement, chunk_size: int = EXPORT_CHUNK_SIZE) -> AsyncIterator[Sequence[Row]]:
+    """
+    Filas de `statement` en bloques de `chunk_size` usando un cursor del lado del servidor
+    (yield_per), así la memoria no depende del número de filas. Abre su propia sesión: la de
+    la petición se cierra antes de que StreamingResponse empiece a enviar el cuerpo.
+    """
+    statement = statement.execution_options(yield_per=chunk_size)
+    async with session_scope() as session:
+        if isinstance(session, AsyncSession):
+            result = await session.stream(statement)
+            async for rows in result.partitions():
+                yield rows
+        else:
+            # Con la sesión sync cada bloque se lee en un hilo para no bloquear el event loop
+            result = await run_in_threadpool(session.exec, statement)
+            partitions = result.partitions()
+            while rows := await run_in_threadpool(next, partitions, None):
+                yield rows
+
+
+def _csv_value(value):
+    if value is None:
+        return ""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, (dict, list)):
+        return orjson.dumps(value).decode()
+    return value
+
+
+async def _ndjson_lines(chunks: AsyncIterator[Sequence[Row]]) -> AsyncIterator[bytes]:
+    async for rows in chunks:
+        yield b"".join(orjson.dumps(row._asdict()) + b"\n" for row in rows)
+
+
+async def _csv_lines(chunks: AsyncIterator[Sequence[Row]], columns: List[str]) -> AsyncIterator[str]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    async for rows in chunks:
+        writer.writerows([_csv_value(value) for value in row] for row in rows)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    # Solo cabecera si no hubo filas
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def export_response(statement, format: ExportFormat, filename: str) -> StreamingResponse:
+    """StreamingResponse con las filas de `statement` en NDJSON (una fila JSON por línea) o CSV con cabecera."""
+    chunks = stream_rows(statement)
+    if format == ExportFormat.csv:
+        body = _csv_lines(chunks, list(statement.selected_columns.keys()))
+    else:
+        body = _ndjson_lines(chunks)
+    return StreamingResponse(
+        body,
+        media_type=MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{format.value}"'},
+    )
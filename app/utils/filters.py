@@ -0,0 +1,20 @@
+from typing import Optional
+from pydantic import BaseModel
+
+
+def apply_filters(statement, model, filters: Optional[BaseModel]):
+    """
+    Añade al WHERE los filtros recibidos. Cada campo del esquema de filtro es una
+    igualdad sobre la columna del mismo nombre, salvo created_from/created_to que
+    acotan created_at (desde inclusivo, hasta exclusivo). Los campos en None se ignoran.
+    """
+    if filters is None:
+        return statement
+    for name, value in filters.model_dump(exclude_none=True).items():
+        if name == "created_from":
+            statement = statement.where(model.created_at >= value)
+        elif name == "created_to":
+            statement = statement.where(model.created_at < value)
+        else:
+            statement = statement.where(getattr(model, name) == value)
+    return statement
@@ -0,0 +1,38 @@
+import os
+import tempfile
+from typing import Dict
+
+
+def variant_url(checksum: str, name: str) -> str:
+    return f"/media/variants/{checksum[:2]}/{checksum}_{name}.jpg"
+
+
+def generate_variants(source_path: str, checksum: str, media_root: str, sizes: Dict[str, int]) -> Dict[str, str]:
+    """
+    Genera una versión JPEG reducida por cada tamaño de `sizes` (lado mayor en píxeles)
+    y devuelve sus URLs públicas. Se ejecuta en un proceso del pool, por eso solo recibe
+    y devuelve datos serializables y no toca la base de datos.
+    """
+    from PIL import Image, ImageOps
+
+    urls = {}
+    with Image.open(source_path) as original:
+        image = ImageOps.exif_transpose(original).convert("RGB")
+        for name, size in sizes.items():
+            url = variant_url(checksum, name)
+            target = os.path.join(media_root, url[len("/media/"):])
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+
+            variant = image.copy()
+            variant.thumbnail((size, size))
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(target), prefix=".variant-", suffix=".part")
+            try:
+                with os.fdopen(fd, "wb") as buffer:
+                    variant.save(buffer, format="JPEG", quality=85, optimize=True)
+                os.replace(tmp_path, target)
+            except BaseException:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                raise
+            urls[name] = url
+    return urls
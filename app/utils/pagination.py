@@ -0,0 +1,90 @@
+import base64
+import json
+from datetime import datetime
+from typing import Any, Mapping, Optional, Sequence, Tuple
+from uuid import UUID
+from sqlalchemy import DateTime, tuple_
+
+DEFAULT_SORT = "created_at"
+
+
+class InvalidCursorError(ValueError):
+    """El cursor recibido no es válido o fue manipulado."""
+
+
+class InvalidSortError(ValueError):
+    """El campo de orden solicitado no está en la lista permitida."""
+
+
+def encode_cursor(value: Any, id: UUID, sort: str = DEFAULT_SORT) -> str:
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    payload = json.dumps([sort, value, str(id)], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[str, Any, UUID]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if len(data) == 2:
+            # Cursores emitidos antes de poder elegir el orden: siempre por created_at
+            data = [DEFAULT_SORT, *data]
+        sort, value, id = data
+        return sort, value, UUID(id)
+    except (ValueError, TypeError) as e:
+        raise InvalidCursorError("Cursor inválido") from e
+
+
+def resolve_sort(sort: Optional[str], fields: Mapping[str, Any]) -> Tuple[str, Any, bool]:
+    """
+    Traduce `sort` ("campo" o "-campo" para descendente) a la columna correspondiente.
+    Solo se aceptan los campos de `fields`, que deben estar indexados junto con id.
+    """
+    sort = sort or DEFAULT_SORT
+    descending = sort.startswith("-")
+    name = sort[1:] if descending else sort
+    if name not in fields:
+        raise InvalidSortError(f"No se puede ordenar por '{name}'. Campos permitidos: {', '.join(fields)}")
+    return sort, fields[name], descending
+
+
+def _cursor_value(column, value: Any) -> Any:
+    if not isinstance(column.type, DateTime):
+        return value
+    try:
+        return datetime.fromisoformat(value)
+    except (ValueError, TypeError) as e:
+        raise InvalidCursorError("Cursor inválido") from e
+
+
+def paginate(statement, model, skip: int = 0, limit: int = 100, cursor: Optional[str] = None,
+             sort: Optional[str] = None, sort_fields: Optional[Mapping[str, Any]] = None):
+    """
+    Ordena por (campo de orden, id) para que las páginas sean estables; por defecto created_at.
+    Con cursor se usa keyset (WHERE (campo, id) > cursor, o < en orden descendente) y se ignora skip;
+    sin cursor se mantiene offset/limit por compatibilidad.
+    """
+    sort, column, descending = resolve_sort(sort, sort_fields or {DEFAULT_SORT: model.created_at})
+    if descending:
+        statement = statement.order_by(column.desc(), model.id.desc())
+    else:
+        statement = statement.order_by(column, model.id)
+    if cursor:
+        cursor_sort, value, id = decode_cursor(cursor)
+        if cursor_sort != sort:
+            raise InvalidCursorError("El cursor no corresponde al orden solicitado")
+        key, bound = tuple_(column, model.id), tuple_(_cursor_value(column, value), id)
+        statement = statement.where(key < bound if descending else key > bound)
+    elif skip:
+        statement = statement.offset(skip)
+    return statement.limit(limit)
+
+
+def next_cursor(items: Sequence[Any], limit: int, sort: Optional[str] = None) -> Optional[str]:
+    """Cursor de la siguiente página, o None si ya no hay más resultados."""
+    if not items or len(items) < limit:
+        return None
+    sort = sort or DEFAULT_SORT
+    last = items[-1]
+    return encode_cursor(getattr(last, sort.lstrip("-")), last.id, sort)
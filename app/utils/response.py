@@ -1,15 +1,62 @@
-from typing import Any, Dict
+from functools import lru_cache
+from typing import Any, Dict, Optional
+import orjson
 from fastapi import HTTPException
+from fastapi.responses import ORJSONResponse, Response
+from pydantic import BaseModel, TypeAdapter
+from app.schemas.types import ResponseSuccess
 
-def response_success(data: Any = None, message: str = "Success") -> Dict[str, Any]:
-    return {
-        "status": "success",
-        "data": data,
-        "message": message
-    }
+
+@lru_cache(maxsize=None)
+def _envelope_adapter(model: Any) -> TypeAdapter:
+    # Construir el TypeAdapter compila el esquema; se hace una sola vez por tipo
+    return TypeAdapter(ResponseSuccess[model])
+
+
+def _orjson_default(value: Any) -> Any:
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json")
+    raise TypeError(f"Tipo no serializable: {type(value).__name__}")
+
+
+class ORJSONModelResponse(ORJSONResponse):
+    """ORJSONResponse que también acepta modelos pydantic/SQLModel dentro del contenido."""
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, default=_orjson_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+def response_success(data: Any = None, message: str = "Success", next_cursor: Optional[str] = None,
+                     *, model: Any = None, status_code: int = 200) -> Response:
+    """
+    Devuelve la respuesta ya serializada, así FastAPI no vuelve a validar el contenido
+    contra response_model (que se mantiene en el decorador para la documentación).
+
+    - Con `model` (p. ej. ClienteRead o List[ClienteRead]) los objetos ORM de `data` se validan
+      y serializan a JSON en una sola pasada con el TypeAdapter del sobre ResponseSuccess[model].
+    - Sin `model`, `data` debe ser serializable (dict, listas, modelos pydantic) y se usa orjson.
+
+    Al devolver un Response el status_code del decorador no se aplica: hay que pasarlo aquí.
+    """
+    envelope = {"status": "success", "data": data, "message": message, "next_cursor": next_cursor}
+    if model is None:
+        return ORJSONModelResponse(content=envelope, status_code=status_code)
+    adapter = _envelope_adapter(model)
+    body = adapter.dump_json(adapter.validate_python(envelope, from_attributes=True))
+    return Response(content=body, status_code=status_code, media_type="application/json")
 
 def response_error(status_code: int, detail: str):
     raise HTTPException(
         status_code=status_code,
         detail={"status": "error", "message": detail}
-    )
\ No newline at end of file
+    )
+
+def response_batch_aborted(errors: Dict[int, str]):
+    raise HTTPException(
+        status_code=409,
+        detail={
+            "status": "error",
+            "message": "El lote no se aplicó: hay elementos con error",
+            "errors": [{"index": index, "error": error} for index, error in sorted(errors.items())],
+        }
+    )
@@ -1,6 +1,30 @@
+import hashlib
 import os
+import tempfile
+import time
+from dataclasses import dataclass
+from typing import AsyncIterator
 from uuid import uuid4
 from fastapi import UploadFile
+from starlette.concurrency import run_in_threadpool
+from app.core.config import MEDIA_ROOT, UPLOAD_CHUNK_SIZE, UPLOAD_MAX_BYTES
+from app.core.metrics import UPLOAD_DURATION, UPLOAD_SIZE
+
+
+class UploadTooLargeError(Exception):
+    """El archivo supera el tamaño máximo permitido."""
+
+    def __init__(self, max_bytes: int):
+        super().__init__(f"El archivo supera el tamaño máximo de {max_bytes} bytes")
+        self.max_bytes = max_bytes
+
+
+@dataclass
+class StoredFile:
+    path: str
+    size: int
+    checksum: str
+
 
 def save_uploaded_file(file: UploadFile, categoria: str) -> str:
     ext = file.filename.split('.')[-1]
@@ -13,3 +37,77 @@ def save_uploaded_file(file: UploadFile, categoria: str) -> str:
         buffer.write(file.file.read())
 
     return f"/media/{categoria}/{filename}", filename
+
+
+def media_path_from_url(url: str) -> str:
+    """Convierte una URL pública /media/... en la ruta del archivo dentro de MEDIA_ROOT."""
+    relative = url.lstrip("/")
+    if relative.startswith("media/"):
+        relative = relative[len("media/"):]
+    return os.path.join(MEDIA_ROOT, relative)
+
+
+def _open_temp(directory: str):
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".upload-", suffix=".part")
+    return os.fdopen(fd, "wb"), tmp_path
+
+
+def _write_chunk(buffer, hasher, chunk: bytes):
+    hasher.update(chunk)
+    buffer.write(chunk)
+
+
+def discard_file(path: str):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+async def _read_chunks(file: UploadFile, chunk_size: int) -> AsyncIterator[bytes]:
+    while chunk := await file.read(chunk_size):
+        yield chunk
+
+
+async def stream_to_temp(chunks: AsyncIterator[bytes], directory: str, max_bytes: int = UPLOAD_MAX_BYTES) -> StoredFile:
+    """
+    Copia los bloques de `chunks` a un archivo temporal dentro de `directory`, calculando el
+    SHA-256 mientras escribe. La escritura ocurre en el threadpool, así la memoria usada por
+    subida no depende del tamaño del archivo. El temporal queda en el mismo sistema de archivos
+    para poder renombrarlo de forma atómica.
+    """
+    start = time.perf_counter()
+    buffer, tmp_path = await run_in_threadpool(_open_temp, directory)
+    hasher = hashlib.sha256()
+    size = 0
+    try:
+        try:
+            async for chunk in chunks:
+                size += len(chunk)
+                if size > max_bytes:
+                    raise UploadTooLargeError(max_bytes)
+                await run_in_threadpool(_write_chunk, buffer, hasher, chunk)
+        finally:
+            await run_in_threadpool(buffer.close)
+    except BaseException:
+        # Sin await: también debe ejecutarse si la tarea fue cancelada
+        discard_file(tmp_path)
+        raise
+
+    UPLOAD_SIZE.observe(size)
+    UPLOAD_DURATION.observe(time.perf_counter() - start)
+    return StoredFile(path=tmp_path, size=size, checksum=hasher.hexdigest())
+
+
+async def stream_upload_to_temp(
+    file: UploadFile,
+    directory: str,
+    max_bytes: int = UPLOAD_MAX_BYTES,
+    chunk_size: int = UPLOAD_CHUNK_SIZE,
+) -> StoredFile:
+    """stream_to_temp para un UploadFile, leído por bloques de `chunk_size`."""
+    if file.size is not None and file.size > max_bytes:
+        raise UploadTooLargeError(max_bytes)
+    return await stream_to_temp(_read_chunks(file, chunk_size), directory, max_bytes)
+
@@ -0,0 +1,48 @@
+import unicodedata
+from typing import Optional
+
+from sqlalchemy import Float, String, func, literal
+from sqlmodel import select
+
+# pg_trgm divide el texto en trigramas: con menos letras el índice GiST apenas filtra y se usa el de prefijo
+TRIGRAM_MIN_LENGTH = 3
+
+
+def unaccent_lower(value: Optional[str]) -> Optional[str]:
+    """Minúsculas sin tildes ni diéresis (á → a, ñ → n), igual que la función SQL unaccent_lower."""
+    if value is None:
+        return None
+    decomposed = unicodedata.normalize("NFKD", value)
+    return "".join(char for char in decomposed if not unicodedata.combining(char)).lower()
+
+
+def search_statement(dialect: str, model, column, term: str, limit: int):
+    """
+    Autocompletado sobre `column` sin distinguir tildes ni mayúsculas, ordenado por relevancia.
+
+    En PostgreSQL (migración 0006): con términos cortos, prefijo sobre el índice btree de
+    unaccent_lower(columna) COLLATE "C"; desde TRIGRAM_MIN_LENGTH letras, similitud de palabra
+    de pg_trgm (`<%`) ordenada por distancia (`<<->`) con el índice GiST, que devuelve los
+    `limit` más cercanos sin ordenar todas las coincidencias. Tolera errores de escritura.
+
+    En el resto de motores (SQLite en desarrollo) es una búsqueda por subcadena sin índice con
+    los prefijos primero.
+    """
+    normalized = func.unaccent_lower(column, type_=String)
+    term = unaccent_lower(term.strip())
+    statement = select(model)
+
+    if dialect == "postgresql" and len(term) >= TRIGRAM_MIN_LENGTH:
+        return (
+            statement.where(literal(term, String).op("<%", is_comparison=True)(normalized))
+            .order_by(literal(term, String).op("<<->", return_type=Float)(normalized))
+            .limit(limit)
+        )
+    if dialect == "postgresql":
+        prefix = normalized.collate("C")
+        return statement.where(prefix.startswith(term, autoescape=True)).order_by(prefix, model.id).limit(limit)
+    return (
+        statement.where(normalized.contains(term, autoescape=True))
+        .order_by(normalized.startswith(term, autoescape=True).desc(), func.length(column), normalized, model.id)
+        .limit(limit)
+    )
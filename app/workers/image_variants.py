@@ -0,0 +1,89 @@
+import asyncio
+import logging
+import multiprocessing
+import os
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Optional, Set
+
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import IMAGE_VARIANT_SIZES, IMAGE_VARIANT_WORKERS, MEDIA_ROOT
+from app.core.storage import media_key, storage
+from app.db.database import session_scope
+from app.services.media_blob import set_blob_variants
+from app.utils.images import generate_variants
+
+logger = logging.getLogger(__name__)
+
+
+class ImageVariantWorker:
+    """
+    Genera miniaturas y variantes medianas en un pool de procesos para no ocupar el
+    event loop ni el GIL del worker web. Las URLs se guardan en la base de datos al terminar.
+    Con un almacenamiento remoto el original se descarga a un directorio temporal y las
+    variantes se suben desde ahí.
+    """
+
+    def __init__(self, max_workers: int = IMAGE_VARIANT_WORKERS):
+        self.max_workers = max_workers
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._tasks: Set[asyncio.Task] = set()
+
+    def start(self):
+        if self.max_workers > 0 and self._executor is None:
+            # spawn: hacer fork de un proceso con event loop e hilos activos no es seguro
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers, mp_context=multiprocessing.get_context("spawn"))
+
+    async def shutdown(self):
+        for task in list(self._tasks):
+            task.cancel()
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def submit(self, checksum: str, key: str):
+        """Encola la generación de variantes del objeto `key`; no espera a que termine."""
+        if self._executor is None:
+            return
+        task = asyncio.create_task(self._run(checksum, key))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _generate(self, source_path: str, checksum: str, media_root: str) -> Dict[str, str]:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, generate_variants, source_path, checksum, media_root, IMAGE_VARIANT_SIZES)
+
+    async def _generate_remote(self, checksum: str, key: str) -> Dict[str, str]:
+        workdir = await run_in_threadpool(tempfile.mkdtemp, prefix="variants-")
+        try:
+            source_path = os.path.join(workdir, os.path.basename(key))
+            await run_in_threadpool(storage.download_file, key, source_path)
+            urls = await self._generate(source_path, checksum, workdir)
+            await asyncio.gather(*(
+                run_in_threadpool(storage.upload_file, os.path.join(workdir, media_key(url)), media_key(url))
+                for url in urls.values()
+            ))
+            return urls
+        finally:
+            await run_in_threadpool(shutil.rmtree, workdir, True)
+
+    async def _run(self, checksum: str, key: str):
+        try:
+            source_path = storage.local_path(key)
+            if source_path is not None:
+                urls = await self._generate(source_path, checksum, MEDIA_ROOT)
+            else:
+                urls = await self._generate_remote(checksum, key)
+            async with session_scope() as session:
+                await set_blob_variants(session, checksum, urls.get("thumbnail"), urls.get("medium"))
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("No se pudieron generar las variantes de %s", key)
+
+
+image_variant_worker = ImageVariantWorker()
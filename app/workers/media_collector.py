@@ -0,0 +1,76 @@
+import asyncio
+import logging
+from typing import Iterable, List, Optional
+
+from starlette.concurrency import run_in_threadpool
+
+from app.core.metrics import MEDIA_FILES_REMOVED
+from app.core.storage import storage
+
+logger = logging.getLogger(__name__)
+
+# Archivos borrados por cada llamada al threadpool
+REMOVE_BATCH_SIZE = 100
+
+
+class MediaCollector:
+    """
+    Borra en segundo plano los archivos que las peticiones dejan en la papelera, en lotes y en el
+    threadpool. Lo que quede pendiente al apagar (o si no se inició, como en scripts) lo recoge el
+    reconciliador (app.workers.media_reconciler) en su siguiente pasada por ese directorio. Con S3
+    no hay papelera (storage.S3Storage.stage_delete ya borra) y no recibe nada.
+    """
+
+    def __init__(self):
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def start(self):
+        if self._task is None:
+            self._loop = asyncio.get_running_loop()
+            self._queue = asyncio.Queue()
+            self._task = asyncio.create_task(self._run())
+
+    async def shutdown(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+        self._queue = None
+        self._loop = None
+
+    def submit(self, keys: Iterable[str]):
+        """
+        Encola las claves para borrarlas; no espera. Se puede llamar desde otro hilo (las
+        transacciones de database.run_transaction con Session sync).
+        """
+        queue, loop = self._queue, self._loop
+        if queue is None or loop is None:
+            return
+        keys = list(keys)
+        if keys:
+            loop.call_soon_threadsafe(self._enqueue, queue, keys)
+
+    @staticmethod
+    def _enqueue(queue: asyncio.Queue, keys: List[str]):
+        for key in keys:
+            queue.put_nowait(key)
+
+    async def _run(self):
+        while True:
+            batch = [await self._queue.get()]
+            while len(batch) < REMOVE_BATCH_SIZE and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            try:
+                removed = await run_in_threadpool(storage.delete, batch)
+                MEDIA_FILES_REMOVED.labels("collector").inc(removed)
+            except Exception:
+                logger.exception("Error borrando archivos de media")
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+
+media_collector = MediaCollector()
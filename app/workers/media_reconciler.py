@@ -0,0 +1,262 @@
+import asyncio
+import logging
+import os
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import func
+from sqlmodel import delete, select
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import MEDIA_RECONCILE_DELETE_ROWS, MEDIA_RECONCILE_GRACE_SECONDS, MEDIA_RECONCILE_INTERVAL_SECONDS
+from app.core.metrics import MEDIA_FILES_REMOVED, MEDIA_ORPHAN_ROWS_REMOVED
+from app.core.storage import TRASH_PREFIX, StoredObject, media_key, storage
+from app.db.database import AnySession, maybe_await, run_transaction, session_scope
+from app.models.foto_mantenimiento import FotoMantenimiento
+from app.models.media_blob import MediaBlob
+from app.workers.image_variants import image_variant_worker
+
+logger = logging.getLogger(__name__)
+
+# Temporales de una subida (save_file) o de una variante (images) en curso
+TEMP_PREFIXES = (".upload-", ".variant-")
+
+# Un directorio de prefijo por pasada (blobs/ab y variants/ab) y, al final del ciclo, las fotos
+# guardadas antes del almacenamiento por contenido (un archivo por foto, sin checksum)
+LEGACY_SHARD = "legacy"
+SHARDS = [f"{i:02x}" for i in range(256)] + [LEGACY_SHARD]
+
+# Clave del bloqueo asesor de PostgreSQL: con varios workers solo uno reconcilia cada pasada
+RECONCILE_LOCK_KEY = 0x6D656469
+
+
+@dataclass
+class ReconcileResult:
+    shard: str
+    files_removed: int = 0
+    rows_removed: int = 0
+    missing_variants: int = 0
+
+
+def _list(prefixes: List[str]) -> Dict[str, StoredObject]:
+    objects = {}
+    for prefix in prefixes:
+        objects.update(storage.list(prefix))
+    return objects
+
+
+def _legacy_prefixes() -> List[str]:
+    return [prefix for prefix in storage.top_level_prefixes() if prefix not in ("blobs/", "variants/")]
+
+
+def _name(key: str) -> str:
+    return key.rsplit("/", 1)[-1]
+
+
+def _garbage(objects: Dict[str, StoredObject], referenced, cutoff: float) -> List[Tuple[str, str]]:
+    """
+    Papelera, temporales abandonados y archivos sin fila, con la versión observada. Lo cambiado
+    después de `cutoff` se respeta (en local también los renombrados a la papelera aún sin commit).
+    """
+    garbage = []
+    for key, stored in objects.items():
+        if stored.modified > cutoff:
+            continue
+        name = _name(key)
+        if name.startswith(TRASH_PREFIX) or name.startswith(TEMP_PREFIXES) or key not in referenced:
+            garbage.append((key, stored.version))
+    return garbage
+
+
+def _remove_garbage(garbage: List[Tuple[str, str]]) -> int:
+    """
+    Papelera y temporales se borran directamente. Los archivos sin fila solo si su versión no
+    cambió (storage.delete_if_unchanged): una subida concurrente del mismo contenido los toca
+    (storage.promote / touch) y dejan de parecer abandonados.
+    """
+    direct, versions = [], {}
+    for key, version in garbage:
+        if _name(key).startswith((TRASH_PREFIX, *TEMP_PREFIXES)):
+            direct.append(key)
+        else:
+            versions[key] = version
+    removed = storage.delete(direct) + storage.delete_if_unchanged(versions)
+    MEDIA_FILES_REMOVED.labels("reconciler").inc(removed)
+    return removed
+
+
+def _remove_abandoned_temps(cutoff: float) -> int:
+    """
+    Temporales de subida abandonados (un proceso que murió a mitad) en la raíz de
+    storage.temp_directory, sin recorrer los subdirectorios: `_list` solo ve los directorios de
+    prefijo y, con S3, ese directorio es local a cada máquina.
+    """
+    removed = 0
+    try:
+        entries = list(os.scandir(storage.temp_directory))
+    except FileNotFoundError:
+        return 0
+    for entry in entries:
+        if not (entry.name.startswith(TEMP_PREFIXES) and entry.name.endswith(".part")):
+            continue
+        try:
+            if entry.is_file(follow_symlinks=False) and entry.stat(follow_symlinks=False).st_mtime <= cutoff:
+                os.remove(entry.path)
+                removed += 1
+        except FileNotFoundError:
+            # Otro worker lo borró, o la subida terminó y lo movió a su sitio
+            continue
+    MEDIA_FILES_REMOVED.labels("reconciler").inc(removed)
+    return removed
+
+
+def _missing(keys: List[str]) -> set:
+    return {key for key in keys if storage.stat(key) is None}
+
+
+async def _reconcile_blobs(session: AnySession, shard: str, cutoff: float, delete_rows: bool, result: ReconcileResult):
+    files = await run_in_threadpool(_list, [f"blobs/{shard}/", f"variants/{shard}/"])
+    # Los checksums son hexadecimales en minúsculas: los que empiezan por `shard` están en
+    # [shard, shard + "g"), un rango sobre la clave primaria
+    rows = (await maybe_await(session.exec(
+        select(MediaBlob.checksum, MediaBlob.url, MediaBlob.thumbnail_url, MediaBlob.medium_url, MediaBlob.created_at)
+        .where(MediaBlob.checksum >= shard, MediaBlob.checksum < shard + "g")
+    ))).all()
+
+    created_before = datetime.fromtimestamp(cutoff)
+    keys = {row.checksum: media_key(row.url) for row in rows}
+    missing = [row.checksum for row in rows if row.created_at < created_before and keys[row.checksum] not in files]
+    removed = set()
+    if missing and delete_rows:
+        # SKIP LOCKED: los blobs que otra transacción está borrando ya no son asunto del reconciliador.
+        # Con la fila bloqueada se comprueba otra vez el archivo: una subida del mismo contenido lo repone
+        locked = (await maybe_await(session.exec(
+            select(MediaBlob.checksum).where(MediaBlob.checksum.in_(missing)).with_for_update(skip_locked=True)
+        ))).all()
+        still_missing = await run_in_threadpool(_missing, [keys[checksum] for checksum in locked])
+        removed = {checksum for checksum in locked if keys[checksum] in still_missing}
+    if removed:
+        deleted = await maybe_await(session.exec(delete(FotoMantenimiento).where(FotoMantenimiento.checksum.in_(removed))))
+        await maybe_await(session.exec(delete(MediaBlob).where(MediaBlob.checksum.in_(removed))))
+        result.rows_removed = deleted.rowcount
+        logger.warning("Eliminadas %d fotos de %d blobs sin archivo en %s", deleted.rowcount, len(removed), shard)
+
+    referenced, regenerate = set(), []
+    for row in rows:
+        if row.checksum in removed:
+            continue
+        variants = [media_key(url) for url in (row.thumbnail_url, row.medium_url) if url]
+        referenced.update([keys[row.checksum], *variants])
+        if keys[row.checksum] in files and any(key not in files for key in variants):
+            regenerate.append((row.checksum, keys[row.checksum]))
+    result.missing_variants = len(regenerate)
+    return _garbage(files, referenced, cutoff), regenerate
+
+
+async def _reconcile_legacy(session: AnySession, cutoff: float, delete_rows: bool, result: ReconcileResult):
+    prefixes = await run_in_threadpool(_legacy_prefixes)
+    files = await run_in_threadpool(_list, prefixes)
+    # Conjunto cerrado: ya no se crean fotos sin checksum
+    rows = (await maybe_await(session.exec(
+        select(FotoMantenimiento.id, FotoMantenimiento.url, FotoMantenimiento.created_at).where(FotoMantenimiento.checksum.is_(None))
+    ))).all()
+
+    created_before = datetime.fromtimestamp(cutoff)
+    keys = {row.id: media_key(row.url) for row in rows}
+    candidates = [row.id for row in rows if row.created_at < created_before and keys[row.id] not in files]
+    if candidates and delete_rows:
+        still_missing = await run_in_threadpool(_missing, [keys[id] for id in candidates])
+        removed = [id for id in candidates if keys[id] in still_missing]
+        if removed:
+            deleted = await maybe_await(session.exec(delete(FotoMantenimiento).where(FotoMantenimiento.id.in_(removed))))
+            result.rows_removed = deleted.rowcount
+            logger.warning("Eliminadas %d fotos sin archivo anteriores al almacenamiento por contenido", deleted.rowcount)
+    return _garbage(files, set(keys.values()), cutoff), []
+
+
+async def _reconcile(session: AnySession, shard: str, cutoff: float, delete_rows: bool, result: ReconcileResult):
+    """
+    Transacción de una pasada (ver run_transaction). Devuelve la basura a borrar tras el commit y
+    los blobs cuyas variantes hay que regenerar, o None si otro worker tiene el bloqueo asesor.
+    """
+    if session.bind.dialect.name == "postgresql":
+        acquired = (await maybe_await(session.exec(select(func.pg_try_advisory_xact_lock(RECONCILE_LOCK_KEY))))).one()
+        if not acquired:
+            return None
+    if shard == LEGACY_SHARD:
+        found = await _reconcile_legacy(session, cutoff, delete_rows, result)
+    else:
+        found = await _reconcile_blobs(session, shard, cutoff, delete_rows, result)
+    await maybe_await(session.commit())
+    return found
+
+
+async def reconcile_shard(shard: str, grace: int = MEDIA_RECONCILE_GRACE_SECONDS, delete_rows: bool = MEDIA_RECONCILE_DELETE_ROWS) -> Optional[ReconcileResult]:
+    """
+    Compara un directorio de prefijo con las filas de su rango de checksums: borra los archivos sin
+    fila (más la papelera y los temporales abandonados, también los de la raíz del directorio
+    temporal), elimina las fotos cuyo archivo no existe y regenera las variantes perdidas.
+    Devuelve None si otro worker ya está en ello o si el almacenamiento no está disponible
+    (directorio sin montar, bucket inaccesible), para no tomar cada fila por huérfana.
+    """
+    if not await run_in_threadpool(storage.available):
+        logger.warning("Almacenamiento de media (%s) no disponible; se omite la reconciliación", storage.name)
+        return None
+    cutoff = time.time() - grace
+    result = ReconcileResult(shard=shard)
+    # En cada pasada y antes del bloqueo asesor: con S3 cada máquina tiene su directorio temporal
+    result.files_removed = await run_in_threadpool(_remove_abandoned_temps, cutoff)
+    async with session_scope() as session:
+        # Las filas quedan bloqueadas mientras se comprueban sus archivos
+        found = await run_transaction(session, _reconcile, shard, cutoff, delete_rows, result)
+    if found is None:
+        return None
+    garbage, regenerate = found
+    # En el loop principal, donde viven las tareas del generador de variantes
+    for checksum, key in regenerate:
+        image_variant_worker.submit(checksum, key)
+    MEDIA_ORPHAN_ROWS_REMOVED.inc(result.rows_removed)
+    # Después del commit: los archivos de las filas recién eliminadas ya no tienen referencia
+    result.files_removed += await run_in_threadpool(_remove_garbage, garbage)
+    return result
+
+
+class MediaReconciler:
+    """
+    Reconcilia el disco con la base de datos en segundo plano, un directorio de prefijo por
+    intervalo, de modo que ninguna pasada recorre todo el almacenamiento ni todas las filas.
+    """
+
+    def __init__(self, interval: int = MEDIA_RECONCILE_INTERVAL_SECONDS):
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        if self.interval > 0 and self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def shutdown(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+
+    async def _run(self):
+        while True:
+            # Alineado al reloj: todos los workers eligen el mismo directorio en cada intervalo
+            # y el bloqueo asesor deja trabajar solo a uno
+            await asyncio.sleep(self.interval - time.time() % self.interval)
+            shard = SHARDS[round(time.time() / self.interval) % len(SHARDS)]
+            try:
+                result = await reconcile_shard(shard)
+            except Exception:
+                logger.exception("Error reconciliando media en %s", shard)
+                continue
+            if result is not None and (result.files_removed or result.rows_removed or result.missing_variants):
+                logger.info("Media reconciliada en %s: %s", shard, result)
+
+
+media_reconciler = MediaReconciler()
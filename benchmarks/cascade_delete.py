@@ -0,0 +1,107 @@
+"""
+Borrado en cascada de un mantenimiento con sus equipos y fotos (DELETE /mantenimiento_general/{id}):
+sentencias SQL y latencia según el tamaño del árbol. Cada foto tiene su propio blob y archivo en un
+MEDIA_ROOT temporal; la petición solo los renombra a la papelera y el borrado real, que antes se hacía
+dentro de la petición, se mide aparte como el trabajo del recolector. Con STORAGE_BACKEND=s3 no hay
+papelera: el borrado entra en delete_ms y collector_files es 0.
+
+    DATABASE_URL=postgresql://... alembic upgrade head
+    DATABASE_URL=postgresql://... python -m benchmarks.cascade_delete --equipos 1 10 50 --fotos 20
+"""
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import time
+from uuid import uuid4
+
+os.environ.setdefault("MEDIA_ROOT", tempfile.mkdtemp(prefix="cascade-bench-"))
+
+from sqlmodel import Session, SQLModel, insert  # noqa: E402
+
+from app.db.database import engine  # noqa: E402
+from app.models.cliente import Cliente  # noqa: E402
+from app.models.equipo_mantenimiento import EquipoMantenimiento  # noqa: E402
+from app.models.foto_mantenimiento import FotoMantenimiento  # noqa: E402
+from app.models.mantenimiento_general import MantenimientoGeneral  # noqa: E402
+from app.models.media_blob import MediaBlob  # noqa: E402
+from app.models.ubicacion import Ubicacion  # noqa: E402
+from app.services.mantenimiento_general import delete_mantenimiento_general  # noqa: E402
+from app.core.storage import TRASH_PREFIX, media_key, storage  # noqa: E402
+from app.services.media_blob import blob_url  # noqa: E402
+from benchmarks.returning import RoundTrips  # noqa: E402
+
+
+def seed_tree(session: Session, cliente_id, ubicacion_id, equipos: int, fotos: int, source: str):
+    mantenimiento_id = uuid4()
+    session.exec(insert(MantenimientoGeneral), params=[{"id": mantenimiento_id, "cliente_id": cliente_id, "ubicacion_id": ubicacion_id, "periodo": "bench"}])
+    equipo_ids = [uuid4() for _ in range(equipos)]
+    session.exec(insert(EquipoMantenimiento), params=[{"id": id, "equipo": f"equipo-{i}", "mantenimiento_general_id": mantenimiento_id} for i, id in enumerate(equipo_ids)])
+    blobs, rows = [], []
+    for equipo_id in equipo_ids:
+        for _ in range(fotos):
+            checksum = uuid4().hex * 2
+            url = blob_url(checksum, "jpg")
+            storage.upload_file(source, media_key(url))
+            blobs.append({"checksum": checksum, "url": url, "size": 64 * 1024, "ref_count": 1})
+            rows.append({"id": uuid4(), "categoria": "bench", "url": url, "nombre": os.path.basename(url), "checksum": checksum, "equipos_mantenimiento_id": equipo_id})
+    if rows:
+        session.exec(insert(MediaBlob), params=blobs)
+        session.exec(insert(FotoMantenimiento), params=rows)
+    session.commit()
+    return mantenimiento_id
+
+
+def trash_keys():
+    return [key for key in storage.list("blobs/") if key.rsplit("/", 1)[-1].startswith(TRASH_PREFIX)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--equipos", type=int, nargs="+", default=[1, 10, 50])
+    parser.add_argument("--fotos", type=int, default=20, help="Fotos por equipo")
+    parser.add_argument("--output")
+    args = parser.parse_args()
+
+    SQLModel.metadata.create_all(engine)
+    source = os.path.join(tempfile.mkdtemp(prefix="cascade-bench-source-"), "foto.jpg")
+    with open(source, "wb") as f:
+        f.write(os.urandom(64 * 1024))
+    result = {"dialect": engine.dialect.name, "storage": storage.name, "fotos_por_equipo": args.fotos, "runs": []}
+    with Session(engine, expire_on_commit=False) as session:
+        cliente = Cliente(nombre=f"bench-cascade-{uuid4().hex[:8]}")
+        ubicacion = Ubicacion(ubicacion=f"bench-cascade-{uuid4().hex[:8]}")
+        session.add_all([cliente, ubicacion])
+        session.commit()
+        for equipos in args.equipos:
+            mantenimiento_id = seed_tree(session, cliente.id, ubicacion.id, equipos, args.fotos, source)
+            session.expunge_all()
+            with RoundTrips() as round_trips:
+                started = time.perf_counter()
+                asyncio.run(delete_mantenimiento_general(session, mantenimiento_id))
+                elapsed = time.perf_counter() - started
+            staged = trash_keys()
+            started = time.perf_counter()
+            removed = storage.delete(staged)
+            collector = time.perf_counter() - started
+            result["runs"].append({
+                "equipos": equipos,
+                "fotos": equipos * args.fotos,
+                "statements": round_trips.count,
+                "delete_ms": round(elapsed * 1000, 3),
+                "collector_files": removed,
+                "collector_ms": round(collector * 1000, 3),
+            })
+        session.delete(session.get(Cliente, cliente.id))
+        session.delete(session.get(Ubicacion, ubicacion.id))
+        session.commit()
+
+    print(json.dumps(result, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
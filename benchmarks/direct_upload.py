@@ -0,0 +1,117 @@
+"""
+Subida de fotos a través de la API (POST /foto_mantenimiento/upload) frente a la subida directa al
+almacenamiento (POST /upload-url, PUT a la URL firmada y POST /register), contra una instancia en
+ejecución. Por cada modo: latencia de extremo a extremo, tiempo ocupado en la API y bytes de foto que
+atraviesan la API. Con STORAGE_BACKEND=s3 el PUT va al bucket y la API solo ve metadatos; con local el
+PUT lo atiende la propia API (/api/v1/storage/upload) y los bytes se cuentan igual.
+
+    STORAGE_BACKEND=s3 S3_ENDPOINT_URL=http://localhost:9000 S3_ADDRESSING_STYLE=path uvicorn app.main:app
+    python -m benchmarks.direct_upload --size 2000000 --uploads 200 --concurrency 20
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import statistics
+import time
+from urllib.parse import urljoin, urlsplit
+
+import httpx
+
+from benchmarks.load_test import percentile
+
+
+async def create_equipo(client: httpx.AsyncClient) -> str:
+    suffix = os.urandom(4).hex()
+    cliente = (await client.post("/api/v1/cliente/", json={"nombre": f"Bench Directo {suffix}"})).json()["data"]["id"]
+    ubicacion = (await client.post("/api/v1/ubicacion/", json={"ubicacion": f"bench-direct-{suffix}"})).json()["data"]["id"]
+    mantenimiento = (await client.post("/api/v1/mantenimiento_general/", json={"cliente_id": cliente, "ubicacion_id": ubicacion, "periodo": "bench"})).json()["data"]["id"]
+    return (await client.post("/api/v1/equipo_mantenimiento/", json={"equipo": "bench", "mantenimiento_general_id": mantenimiento})).json()["data"]["id"]
+
+
+async def proxied(client: httpx.AsyncClient, equipo: str, body: bytes) -> dict:
+    started = time.perf_counter()
+    response = await client.post(
+        "/api/v1/foto_mantenimiento/upload",
+        data={"categoria": "bench", "equipos_mantenimiento_id": equipo},
+        files={"file": ("bench.jpg", body, "image/jpeg")},
+    )
+    response.raise_for_status()
+    elapsed = time.perf_counter() - started
+    return {"total": elapsed, "api": elapsed, "api_bytes": len(body)}
+
+
+async def direct(client: httpx.AsyncClient, equipo: str, body: bytes) -> dict:
+    checksum = hashlib.sha256(body).hexdigest()
+    started = time.perf_counter()
+    response = await client.post("/api/v1/foto_mantenimiento/upload-url", json={"checksum": checksum, "size": len(body), "extension": "jpg"})
+    response.raise_for_status()
+    api = time.perf_counter() - started
+    api_bytes = 0
+
+    upload = response.json()["data"]["upload"]
+    if upload is not None:
+        url = urljoin(str(client.base_url), upload["url"])
+        put = await client.request(upload["method"], url, content=body, headers=upload["headers"])
+        put.raise_for_status()
+        if urlsplit(url).netloc == client.base_url.netloc:
+            api_bytes = len(body)
+
+    registered = time.perf_counter()
+    response = await client.post("/api/v1/foto_mantenimiento/register", json={"categoria": "bench", "equipos_mantenimiento_id": equipo, "checksum": checksum, "extension": "jpg"})
+    response.raise_for_status()
+    finished = time.perf_counter()
+    return {"total": finished - started, "api": api + finished - registered, "api_bytes": api_bytes}
+
+
+async def run_mode(base_url: str, mode, size: int, uploads: int, concurrency: int) -> dict:
+    samples = []
+    counter = iter(range(uploads))
+    async with httpx.AsyncClient(base_url=base_url, timeout=120.0) as client:
+        equipo = await create_equipo(client)
+
+        async def worker():
+            for _ in counter:
+                # Contenido distinto en cada subida: sin deduplicación se mide la transferencia real
+                samples.append(await mode(client, equipo, os.urandom(size)))
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    totals = [sample["total"] for sample in samples]
+    return {
+        "uploads": uploads,
+        "elapsed_s": round(elapsed, 3),
+        "throughput_ups": round(uploads / elapsed, 2) if elapsed else 0.0,
+        "latency_ms": {
+            "mean": round(statistics.fmean(totals) * 1000, 2),
+            "p50": round(percentile(totals, 50) * 1000, 2),
+            "p95": round(percentile(totals, 95) * 1000, 2),
+        },
+        "api_ms_per_upload": round(statistics.fmean(sample["api"] for sample in samples) * 1000, 2),
+        "api_bytes": sum(sample["api_bytes"] for sample in samples),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--size", type=int, default=1_000_000, help="Bytes por foto")
+    parser.add_argument("--uploads", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--output")
+    args = parser.parse_args()
+
+    result = {"size": args.size}
+    for name, mode in (("proxied", proxied), ("direct", direct)):
+        result[name] = asyncio.run(run_mode(args.url, mode, args.size, args.uploads, args.concurrency))
+    print(json.dumps(result, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+Prueba de carga concurrente contra una instancia en ejecución de la API.
+
+Uso (levantar la API dos veces, una por modo, y comparar):
+
+    DB_ASYNC=false uvicorn app.main:app --port 8000
+    python -m benchmarks.load_test --label sync --output bench_sync.json
+
+    DB_ASYNC=true uvicorn app.main:app --port 8000
+    python -m benchmarks.load_test --label async --output bench_async.json
+
+    python -m benchmarks.load_test --compare bench_sync.json bench_async.json
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+
+import httpx
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def run_load(base_url: str, paths, concurrency: int, total_requests: int) -> dict:
+    latencies = []
+    errors = 0
+    counter = iter(range(total_requests))
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=30.0) as client:
+        async def worker():
+            nonlocal errors
+            for i in counter:
+                path = paths[i % len(paths)]
+                start = time.perf_counter()
+                try:
+                    response = await client.get(path)
+                    if response.status_code >= 400:
+                        errors += 1
+                except httpx.HTTPError:
+                    errors += 1
+                latencies.append(time.perf_counter() - start)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    return {
+        "requests": total_requests,
+        "concurrency": concurrency,
+        "errors": errors,
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(total_requests / elapsed, 2) if elapsed else 0.0,
+        "latency_ms": {
+            "mean": round(statistics.fmean(latencies) * 1000, 2) if latencies else 0.0,
+            "p50": round(percentile(latencies, 50) * 1000, 2),
+            "p95": round(percentile(latencies, 95) * 1000, 2),
+            "p99": round(percentile(latencies, 99) * 1000, 2),
+        },
+    }
+
+
+def compare(baseline_path: str, candidate_path: str):
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    with open(candidate_path) as f:
+        candidate = json.load(f)
+    ratio = candidate["throughput_rps"] / baseline["throughput_rps"] if baseline["throughput_rps"] else 0.0
+    print(f"{baseline.get('label', 'baseline')}: {baseline['throughput_rps']} req/s, p95 {baseline['latency_ms']['p95']} ms")
+    print(f"{candidate.get('label', 'candidate')}: {candidate['throughput_rps']} req/s, p95 {candidate['latency_ms']['p95']} ms")
+    print(f"throughput x{ratio:.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--path", action="append", dest="paths", help="Ruta a consultar (repetible)")
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--label", default="run")
+    parser.add_argument("--output")
+    parser.add_argument("--compare", nargs=2, metavar=("BASELINE", "CANDIDATE"))
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    paths = args.paths or [
+        "/api/v1/cliente/",
+        "/api/v1/ubicacion/",
+        "/api/v1/mantenimiento_general/",
+        "/api/v1/equipo_mantenimiento/",
+        "/api/v1/foto_mantenimiento/",
+    ]
+    result = asyncio.run(run_load(args.url, paths, args.concurrency, args.requests))
+    result["label"] = args.label
+    print(json.dumps(result, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
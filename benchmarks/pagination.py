@@ -0,0 +1,84 @@
+"""
+Compara la latencia de la página 1 frente a una página profunda (por defecto la 10.000)
+usando offset/limit y keyset (cursor) sobre la tabla de clientes.
+
+    DATABASE_URL=postgresql://... python -m benchmarks.pagination --rows 1000000 --page 10000
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from datetime import datetime, timedelta
+from uuid import uuid4
+
+from sqlmodel import Session, SQLModel, func, insert, select
+
+from app.db.database import engine
+from app.models.cliente import Cliente
+from app.services.cliente import get_clientes
+from app.utils.pagination import encode_cursor
+
+
+def seed(session: Session, rows: int, batch: int = 10000):
+    existing = session.exec(select(func.count()).select_from(Cliente)).one()
+    start = datetime(2020, 1, 1)
+    for offset in range(existing, rows, batch):
+        values = [
+            {"id": uuid4(), "nombre": f"bench-cliente-{i}", "created_at": start + timedelta(seconds=i)}
+            for i in range(offset, min(offset + batch, rows))
+        ]
+        session.exec(insert(Cliente), params=values)
+        session.commit()
+
+
+def time_call(fn, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    return round(statistics.median(samples) * 1000, 3)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--page", type=int, default=10_000)
+    parser.add_argument("--limit", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output")
+    args = parser.parse_args()
+
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        seed(session, args.rows)
+
+        deep_skip = (args.page - 1) * args.limit
+        # El cursor de la página profunda se obtiene una sola vez, fuera de la medición
+        anchor = session.exec(
+            select(Cliente).order_by(Cliente.created_at, Cliente.id).offset(deep_skip - 1).limit(1)
+        ).first()
+        deep_cursor = encode_cursor(anchor.created_at, anchor.id) if anchor else None
+
+        def run(**kwargs):
+            return lambda: asyncio.run(get_clientes(session, limit=args.limit, **kwargs))
+
+        result = {
+            "rows": args.rows,
+            "limit": args.limit,
+            "page": args.page,
+            "offset_page_1_ms": time_call(run(skip=0), args.repeat),
+            "offset_page_n_ms": time_call(run(skip=deep_skip), args.repeat),
+            "keyset_page_1_ms": time_call(run(), args.repeat),
+            "keyset_page_n_ms": time_call(run(cursor=deep_cursor), args.repeat),
+        }
+
+    print(json.dumps(result, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""
+Compara filtrar equipos por el contenido de `reporte` en Python (cargando todas las filas)
+frente a las consultas de contención y rango resueltas en SQL con el índice GIN.
+
+    DATABASE_URL=postgresql://... python -m benchmarks.reporte_jsonb --rows 300000
+"""
+import argparse
+import asyncio
+import json
+import random
+import re
+import statistics
+import time
+from datetime import datetime, timedelta
+from uuid import uuid4
+
+from sqlmodel import Session, SQLModel, func, insert, select, text
+
+from app.db.database import engine
+from app.models.cliente import Cliente
+from app.models.equipo_mantenimiento import EquipoMantenimiento
+from app.models.foto_mantenimiento import FotoMantenimiento  # noqa: F401  (registra la relación fotos)
+from app.models.mantenimiento_general import MantenimientoGeneral
+from app.models.ubicacion import Ubicacion
+from app.schemas.equipo_mantenimiento import EquipoMantenimientoReporteQuery
+from app.services.equipo_mantenimiento import get_equipos_mantenimiento
+
+ESTADOS = ["operativo", "falla", "mantenimiento", "fuera de servicio"]
+NUMBER = re.compile(r"^\s*(-?[0-9]+(?:\.[0-9]+)?)")
+
+
+def seed(session: Session, rows: int, batch: int = 10000):
+    existing = session.exec(select(func.count()).select_from(EquipoMantenimiento)).one()
+    if existing >= rows:
+        return
+    cliente = Cliente(nombre=f"bench-jsonb-{uuid4()}")
+    ubicacion = Ubicacion(ubicacion=f"bench-jsonb-{uuid4()}")
+    mantenimiento = MantenimientoGeneral(cliente_id=cliente.id, ubicacion_id=ubicacion.id, periodo="2025-01")
+    session.add_all([cliente, ubicacion, mantenimiento])
+    session.commit()
+
+    rng = random.Random(42)
+    start = datetime(2020, 1, 1)
+    for offset in range(existing, rows, batch):
+        values = [
+            {
+                "id": uuid4(),
+                "equipo": f"Bomba {i}",
+                "created_at": start + timedelta(seconds=i),
+                "mantenimiento_general_id": mantenimiento.id,
+                "reporte": {
+                    "presion": f"{rng.uniform(0.5, 5.0):.1f} bar",
+                    "temperatura": round(rng.uniform(20, 90), 1),
+                    "estado": rng.choice(ESTADOS),
+                },
+            }
+            for i in range(offset, min(offset + batch, rows))
+        ]
+        session.exec(insert(EquipoMantenimiento), params=values)
+        session.commit()
+    if session.bind.dialect.name == "postgresql":
+        session.exec(text("ANALYZE equipomantenimiento"))
+
+
+def python_filter(session: Session, estado: str, presion_min: float) -> int:
+    """Lo que hacía el cliente antes: traer todos los reportes y filtrar en memoria."""
+    matches = 0
+    for reporte in session.exec(select(EquipoMantenimiento.reporte)):
+        if not reporte or reporte.get("estado") != estado:
+            continue
+        number = NUMBER.match(str(reporte.get("presion", "")))
+        if number and float(number.group(1)) >= presion_min:
+            matches += 1
+    return matches
+
+
+def time_call(fn, repeat: int):
+    samples, result = [], None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        samples.append(time.perf_counter() - started)
+    return round(statistics.median(samples) * 1000, 3), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=300_000)
+    parser.add_argument("--estado", default="falla")
+    parser.add_argument("--presion-min", type=float, default=4.5)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output")
+    args = parser.parse_args()
+
+    SQLModel.metadata.create_all(engine)
+    containment = EquipoMantenimientoReporteQuery(contiene={"estado": args.estado})
+    combined = EquipoMantenimientoReporteQuery(contiene={"estado": args.estado}, rangos=[{"clave": "presion", "min": args.presion_min}])
+
+    with Session(engine) as session:
+        seed(session, args.rows)
+
+        def sql(query):
+            return lambda: len(asyncio.run(get_equipos_mantenimiento(session, limit=args.rows, reporte=query)))
+
+        python_ms, python_matches = time_call(lambda: python_filter(session, args.estado, args.presion_min), args.repeat)
+        containment_ms, containment_matches = time_call(sql(containment), args.repeat)
+        combined_ms, combined_matches = time_call(sql(combined), args.repeat)
+        result = {
+            "rows": args.rows,
+            "dialect": session.bind.dialect.name,
+            "python_filter_ms": python_ms,
+            "python_filter_matches": python_matches,
+            "sql_containment_ms": containment_ms,
+            "sql_containment_matches": containment_matches,
+            "sql_containment_range_ms": combined_ms,
+            "sql_containment_range_matches": combined_matches,
+        }
+        if session.bind.dialect.name == "postgresql":
+            plan = session.exec(
+                text("EXPLAIN SELECT count(*) FROM equipomantenimiento WHERE reporte @> CAST(:filtro AS jsonb)"),
+                params={"filtro": json.dumps({"estado": args.estado})},
+            )
+            result["containment_plan"] = [row[0] for row in plan]
+
+    print(json.dumps(result, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""
+Idas y vueltas a la base de datos por escritura: el patrón anterior de los servicios (get por clave,
+setattr, commit y refresh; get y delete para borrar) frente a UPDATE/DELETE ... RETURNING
+(app.services.returning). Cuenta las sentencias y los COMMIT que llegan al driver y mide la latencia.
+
+    DATABASE_URL=postgresql://... alembic upgrade head
+    DATABASE_URL=postgresql://... python -m benchmarks.returning --rows 2000
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from uuid import uuid4
+
+from sqlalchemy import event
+from sqlmodel import Session, SQLModel, delete, insert
+
+from app.db.database import engine
+from app.models.cliente import Cliente
+from app.services.returning import delete_returning, update_returning
+from benchmarks.load_test import percentile
+
+
+class RoundTrips:
+    """Cuenta las sentencias y los COMMIT enviados por el engine mientras está activo."""
+
+    def __init__(self):
+        self.count = 0
+
+    def _statement(self, *args):
+        self.count += 1
+
+    def _commit(self, *args):
+        self.count += 1
+
+    def __enter__(self):
+        event.listen(engine, "before_cursor_execute", self._statement)
+        event.listen(engine, "commit", self._commit)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(engine, "before_cursor_execute", self._statement)
+        event.remove(engine, "commit", self._commit)
+
+
+def legacy_update(session: Session, id, values):
+    cliente = session.get(Cliente, id)
+    if not cliente:
+        return None
+    for key, value in values.items():
+        setattr(cliente, key, value)
+    session.add(cliente)
+    session.commit()
+    session.refresh(cliente)
+    return cliente
+
+
+def legacy_delete(session: Session, id):
+    cliente = session.get(Cliente, id)
+    if not cliente:
+        return None
+    session.delete(cliente)
+    session.commit()
+    return cliente
+
+
+def measure(fn, ids):
+    samples = []
+    with RoundTrips() as round_trips:
+        for i, id in enumerate(ids):
+            started = time.perf_counter()
+            fn(i, id)
+            samples.append(time.perf_counter() - started)
+    return {
+        "round_trips": round(round_trips.count / len(ids), 2),
+        "median_ms": round(statistics.median(samples) * 1000, 3),
+        "p95_ms": round(percentile(samples, 95) * 1000, 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=2000, help="Filas creadas y borradas por cada variante")
+    parser.add_argument("--output")
+    args = parser.parse_args()
+
+    SQLModel.metadata.create_all(engine)
+    run = uuid4().hex[:8]
+    variants = {
+        "legacy": (
+            lambda session, i, id: legacy_update(session, id, {"nombre": f"bench-{run}-legacy-{i}-editado"}),
+            lambda session, i, id: legacy_delete(session, id),
+        ),
+        "returning": (
+            lambda session, i, id: asyncio.run(update_returning(session, Cliente, id, {"nombre": f"bench-{run}-returning-{i}-editado"})),
+            lambda session, i, id: asyncio.run(delete_returning(session, Cliente, id)),
+        ),
+    }
+
+    result = {"rows": args.rows, "dialect": engine.dialect.name}
+    with Session(engine) as session:
+        for name, (update_fn, delete_fn) in variants.items():
+            ids = [uuid4() for _ in range(args.rows)]
+            session.exec(insert(Cliente), params=[{"id": id, "nombre": f"bench-{run}-{name}-{i}"} for i, id in enumerate(ids)])
+            session.commit()
+            # Sesión vacía, como la de cada petición: el get no puede resolverse desde el identity map
+            session.expunge_all()
+            result[name] = {
+                "update": measure(lambda i, id: update_fn(session, i, id), ids),
+                "delete": measure(lambda i, id: (session.expunge_all(), delete_fn(session, i, id)), ids),
+            }
+            session.exec(delete(Cliente).where(Cliente.id.in_(ids)))
+            session.commit()
+
+    print(json.dumps(result, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""
+Latencia del autocompletado de clientes (GET /cliente/autocompletar) frente a lo que hacía la UI:
+descargar la lista completa y filtrar en el navegador. Las consultas son prefijos de nombres reales
+escritos sin tildes y, desde 4 letras, con una letra cambiada.
+
+    DATABASE_URL=postgresql://... alembic upgrade head
+    DATABASE_URL=postgresql://... python -m benchmarks.search --rows 100000
+"""
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import time
+from datetime import datetime, timedelta
+from uuid import uuid4
+
+from sqlmodel import Session, SQLModel, func, insert, select, text
+
+from app.db.database import engine
+from app.models.cliente import Cliente
+from app.services.cliente import suggest_clientes
+from app.utils.search import TRIGRAM_MIN_LENGTH, search_statement, unaccent_lower
+from benchmarks.load_test import percentile
+
+NOMBRES = ["José", "María", "Ángel", "Sofía", "Martín", "Lucía", "Andrés", "Inés", "Raúl", "Begoña",
+           "Jesús", "Mónica", "Ramón", "Verónica", "Iñigo", "Ana", "Luis", "Pilar", "Óscar", "Noemí"]
+APELLIDOS = ["Núñez", "Pérez", "Gómez", "Martínez", "Ibáñez", "Muñoz", "Sánchez", "Jiménez", "Fernández",
+             "López", "Hernández", "Castañeda", "Peña", "Ordóñez", "Gutiérrez", "Álvarez", "Díaz", "Rodríguez",
+             "Vázquez", "Suárez", "Mendoza", "Ruiz", "Beltrán", "Cortés", "Acuña", "Quiñones", "Salas", "Montaño"]
+
+
+def nombres(rows: int, rng: random.Random):
+    seen = set()
+    while len(seen) < rows:
+        nombre = f"{rng.choice(NOMBRES)} {rng.choice(NOMBRES)} {rng.choice(APELLIDOS)} {rng.choice(APELLIDOS)}"
+        if nombre not in seen:
+            seen.add(nombre)
+            yield nombre
+
+
+def seed(session: Session, rows: int, rng: random.Random, batch: int = 10000):
+    existing = session.exec(select(func.count()).select_from(Cliente)).one()
+    if existing >= rows:
+        return
+    start = datetime(2020, 1, 1)
+    pending = list(nombres(rows, rng))[existing:]
+    for offset in range(0, len(pending), batch):
+        session.exec(insert(Cliente), params=[
+            {"id": uuid4(), "nombre": nombre, "created_at": start + timedelta(seconds=offset + i)}
+            for i, nombre in enumerate(pending[offset:offset + batch])
+        ])
+        session.commit()
+    if session.bind.dialect.name == "postgresql":
+        session.exec(text("ANALYZE cliente"))
+
+
+def queries(session: Session, count: int, rng: random.Random):
+    sample = session.exec(select(Cliente.nombre).order_by(Cliente.id).limit(count)).all()
+    result = []
+    for i, nombre in enumerate(sample):
+        typed = unaccent_lower(nombre)[: 2 + i % 6]
+        if len(typed) >= 4 and i % 3 == 0:
+            position = rng.randrange(1, len(typed))
+            typed = typed[:position] + rng.choice("aeiou") + typed[position + 1:]
+        result.append(typed)
+    return result
+
+
+def explain(session: Session, term: str, limit: int):
+    compiled = search_statement("postgresql", Cliente, Cliente.nombre, term, limit).compile(dialect=session.bind.dialect)
+    return [row[0] for row in session.connection().exec_driver_sql(f"EXPLAIN ANALYZE {compiled}", compiled.params)]
+
+
+def time_queries(fn, terms):
+    samples = []
+    for term in terms:
+        started = time.perf_counter()
+        fn(term)
+        samples.append(time.perf_counter() - started)
+    return {
+        "median_ms": round(statistics.median(samples) * 1000, 3),
+        "p95_ms": round(percentile(samples, 95) * 1000, 3),
+        "max_ms": round(max(samples) * 1000, 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--limit", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output")
+    args = parser.parse_args()
+
+    SQLModel.metadata.create_all(engine)
+    rng = random.Random(args.seed)
+    with Session(engine) as session:
+        seed(session, args.rows, rng)
+        terms = queries(session, args.queries, rng)
+        # Calentar la caché de páginas para medir la consulta y no la lectura del disco
+        asyncio.run(suggest_clientes(session, terms[0], args.limit))
+
+        def client_side(term):
+            return [nombre for nombre in session.exec(select(Cliente.nombre)) if term in unaccent_lower(nombre)][: args.limit]
+
+        result = {
+            "rows": args.rows,
+            "dialect": session.bind.dialect.name,
+            "limit": args.limit,
+            "server_side": time_queries(lambda term: asyncio.run(suggest_clientes(session, term, args.limit)), terms),
+            "download_and_filter": time_queries(client_side, terms[:10]),
+            "examples": {term: [cliente.nombre for cliente in asyncio.run(suggest_clientes(session, term, 3))] for term in terms[:6]},
+        }
+        if session.bind.dialect.name == "postgresql":
+            short = next(term for term in terms if len(term) < TRIGRAM_MIN_LENGTH)
+            long = next(term for term in terms if len(term) >= TRIGRAM_MIN_LENGTH)
+            result["plans"] = {term: explain(session, term, args.limit) for term in (short, long)}
+
+    print(json.dumps(result, indent=2, ensure_ascii=False))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2, ensure_ascii=False)
+
+
+if __name__ == "__main__":
+    main()
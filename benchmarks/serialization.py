@@ -0,0 +1,97 @@
+"""
+Coste de serializar una página de resultados: el camino anterior (model_validate por fila,
+sobre en dict, validación de FastAPI contra response_model y JSONResponse con json estándar)
+frente a response_success con TypeAdapter y una sola pasada de validación.
+
+No necesita base de datos: los objetos ORM se construyen en memoria.
+
+    python -m benchmarks.serialization --rows 100 --repeat 2000
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from datetime import datetime, timedelta
+from typing import List
+from uuid import uuid4
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+
+from app.models import cliente, equipo_mantenimiento, mantenimiento_general, ubicacion  # noqa: F401  (relaciones)
+from app.models.foto_mantenimiento import FotoMantenimiento
+from app.schemas.foto_mantenimiento import FotoMantenimientoRead
+from app.schemas.types import ResponseSuccess
+from app.utils.response import response_success
+
+
+def build_rows(count: int) -> List[FotoMantenimiento]:
+    start = datetime(2025, 1, 1)
+    return [
+        FotoMantenimiento(
+            id=uuid4(),
+            created_at=start + timedelta(seconds=i),
+            categoria="antes",
+            url=f"/media/blobs/ab/{i:064d}.jpg",
+            nombre=f"{i:064d}.jpg",
+            checksum=f"{i:064d}",
+            thumbnail_url=f"/media/variants/ab/{i:064d}_thumbnail.jpg",
+            medium_url=f"/media/variants/ab/{i:064d}_medium.jpg",
+            equipos_mantenimiento_id=uuid4(),
+        )
+        for i in range(count)
+    ]
+
+
+def legacy_response(rows, field) -> bytes:
+    data = [FotoMantenimientoRead.model_validate(f, from_attributes=True) for f in rows]
+    content = {"status": "success", "data": data, "message": "Success", "next_cursor": None}
+    serialized = asyncio.run(serialize_response(field=field, response_content=content))
+    return JSONResponse(serialized).body
+
+
+def fast_response(rows) -> bytes:
+    return response_success(data=rows, model=List[FotoMantenimientoRead]).body
+
+
+def time_call(fn, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    return round(statistics.median(samples) * 1_000_000, 1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=2000)
+    parser.add_argument("--output")
+    args = parser.parse_args()
+
+    rows = build_rows(args.rows)
+    field = create_model_field(name="Response", type_=ResponseSuccess[List[FotoMantenimientoRead]], mode="serialization")
+    assert json.loads(legacy_response(rows, field)) == json.loads(fast_response(rows)), "Las dos rutas deben producir el mismo JSON"
+
+    # asyncio.run tiene un coste fijo propio; se mide aparte y se descuenta del camino anterior
+    overhead = time_call(lambda: asyncio.run(asyncio.sleep(0)), args.repeat)
+    legacy = time_call(lambda: legacy_response(rows, field), args.repeat)
+    fast = time_call(lambda: fast_response(rows), args.repeat)
+    result = {
+        "rows": args.rows,
+        "legacy_us": round(legacy - overhead, 1),
+        "fast_us": fast,
+        "speedup": round((legacy - overhead) / fast, 2) if fast else None,
+    }
+
+    print(json.dumps(result, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,300 @@
+"""
+Escenarios de carga sobre todos los routers (incluidas la subida de fotos y las descargas de
+/media) con latencia p50/p95/p99 y throughput por escenario. Los resultados se guardan en JSON
+para comparar versiones.
+
+    DATABASE_URL=sqlite:///bench.db python -m benchmarks.seed --scale small --reset
+    DATABASE_URL=sqlite:///bench.db python -m benchmarks.suite --spawn --label v1.2
+
+    # o contra una instancia ya levantada
+    python -m benchmarks.suite --url http://localhost:8000 --label v1.3
+
+    python -m benchmarks.suite --compare benchmarks/results/v1.2.json benchmarks/results/v1.3.json
+
+--spawn levanta uvicorn con el entorno actual (DATABASE_URL, DB_ASYNC, ...) y lo detiene al
+terminar. --compare termina con código 1 si el p95 de algún escenario empeora más de --threshold.
+"""
+import argparse
+import asyncio
+import io
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+import httpx
+from PIL import Image
+
+from benchmarks.load_test import percentile
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+
+
+@dataclass
+class Context:
+    run_id: str
+    clientes: List[str]
+    ubicaciones: List[str]
+    mantenimientos: List[str]
+    equipos: List[str]
+    fotos: List[str]
+    media_urls: List[str]
+    image: bytes
+
+
+@dataclass
+class Scenario:
+    name: str
+    # Devuelve los argumentos de client.request para la iteración i
+    build: Callable[[Context, int], dict]
+
+
+def _pick(values: List[str], i: int) -> str:
+    return values[i % len(values)]
+
+
+def _csv(ctx: Context, i: int) -> bytes:
+    return ("nombre\n" + "\n".join(f"bench-import-{ctx.run_id}-{i}-{j}" for j in range(100))).encode()
+
+
+SCENARIOS = [
+    Scenario("cliente.list", lambda ctx, i: {"method": "GET", "url": "/api/v1/cliente/", "params": {"limit": 100}}),
+    Scenario("cliente.get", lambda ctx, i: {"method": "GET", "url": f"/api/v1/cliente/{_pick(ctx.clientes, i)}"}),
+    Scenario("cliente.create", lambda ctx, i: {"method": "POST", "url": "/api/v1/cliente/", "json": {"nombre": f"bench-{ctx.run_id}-{i}"}}),
+    Scenario("cliente.autocompletar", lambda ctx, i: {"method": "GET", "url": "/api/v1/cliente/autocompletar", "params": {"q": ("cl", "clie", "cliente 00")[i % 3]}}),
+    Scenario("ubicacion.list", lambda ctx, i: {"method": "GET", "url": "/api/v1/ubicacion/", "params": {"limit": 100}}),
+    Scenario("ubicacion.get", lambda ctx, i: {"method": "GET", "url": f"/api/v1/ubicacion/{_pick(ctx.ubicaciones, i)}"}),
+    Scenario("ubicacion.autocompletar", lambda ctx, i: {"method": "GET", "url": "/api/v1/ubicacion/autocompletar", "params": {"q": ("ub", "ubica", "ubicacion 00")[i % 3]}}),
+    Scenario("mantenimiento.list_by_cliente", lambda ctx, i: {
+        "method": "GET", "url": "/api/v1/mantenimiento_general/", "params": {"cliente_id": _pick(ctx.clientes, i), "limit": 100},
+    }),
+    Scenario("mantenimiento.get", lambda ctx, i: {"method": "GET", "url": f"/api/v1/mantenimiento_general/{_pick(ctx.mantenimientos, i)}"}),
+    Scenario("mantenimiento.reporte", lambda ctx, i: {"method": "GET", "url": f"/api/v1/mantenimiento_general/{_pick(ctx.mantenimientos, i)}/reporte"}),
+    Scenario("mantenimiento.export_by_cliente", lambda ctx, i: {
+        "method": "GET", "url": "/api/v1/mantenimiento_general/export", "params": {"cliente_id": _pick(ctx.clientes, i)},
+    }),
+    Scenario("equipo.list", lambda ctx, i: {"method": "GET", "url": "/api/v1/equipo_mantenimiento/", "params": {"limit": 100}}),
+    Scenario("equipo.get", lambda ctx, i: {"method": "GET", "url": f"/api/v1/equipo_mantenimiento/{_pick(ctx.equipos, i)}"}),
+    Scenario("equipo.buscar", lambda ctx, i: {
+        "method": "POST", "url": "/api/v1/equipo_mantenimiento/buscar", "params": {"limit": 100},
+        "json": {"contiene": {"estado": "fuera de servicio"}},
+    }),
+    Scenario("equipo.autocompletar", lambda ctx, i: {"method": "GET", "url": "/api/v1/equipo_mantenimiento/autocompletar", "params": {"q": ("bo", "bomb", "compresr")[i % 3]}}),
+    Scenario("foto.list", lambda ctx, i: {"method": "GET", "url": "/api/v1/foto_mantenimiento/", "params": {"limit": 100}}),
+    Scenario("foto.get", lambda ctx, i: {"method": "GET", "url": f"/api/v1/foto_mantenimiento/{_pick(ctx.fotos, i)}"}),
+    Scenario("foto.upload", lambda ctx, i: {
+        "method": "POST", "url": "/api/v1/foto_mantenimiento/upload",
+        "data": {"categoria": "antes", "equipos_mantenimiento_id": _pick(ctx.equipos, i)},
+        # Bytes extra tras la imagen: cada subida es un blob nuevo y se mide la escritura real
+        "files": {"file": ("bench.jpg", ctx.image + f"{ctx.run_id}-{i}".encode(), "image/jpeg")},
+    }),
+    Scenario("media.download", lambda ctx, i: {"method": "GET", "url": _pick(ctx.media_urls, i)}),
+    Scenario("import.clientes_100", lambda ctx, i: {
+        "method": "POST", "url": "/api/v1/import/clientes", "files": {"file": ("clientes.csv", _csv(ctx, i), "text/csv")},
+    }),
+    Scenario("health.pool", lambda ctx, i: {"method": "GET", "url": "/api/v1/health/pool"}),
+]
+
+
+def _jpeg() -> bytes:
+    buffer = io.BytesIO()
+    Image.new("RGB", (1280, 960), (120, 140, 160)).save(buffer, "JPEG", quality=85)
+    return buffer.getvalue()
+
+
+async def _ids(client: httpx.AsyncClient, path: str, key: str = "id") -> List[str]:
+    response = await client.get(path, params={"limit": 100})
+    response.raise_for_status()
+    return [item[key] for item in response.json()["data"]]
+
+
+async def build_context(client: httpx.AsyncClient) -> Context:
+    fotos = (await client.get("/api/v1/foto_mantenimiento/", params={"limit": 100})).json()["data"]
+    ctx = Context(
+        run_id=datetime.now().strftime("%Y%m%d%H%M%S"),
+        clientes=await _ids(client, "/api/v1/cliente/"),
+        ubicaciones=await _ids(client, "/api/v1/ubicacion/"),
+        mantenimientos=await _ids(client, "/api/v1/mantenimiento_general/"),
+        equipos=await _ids(client, "/api/v1/equipo_mantenimiento/"),
+        fotos=[foto["id"] for foto in fotos],
+        media_urls=sorted({foto["url"] for foto in fotos}),
+        image=_jpeg(),
+    )
+    empty = [name for name in ("clientes", "ubicaciones", "mantenimientos", "equipos", "fotos") if not getattr(ctx, name)]
+    if empty:
+        sys.exit(f"No hay {', '.join(empty)} en la base de datos; ejecuta antes python -m benchmarks.seed")
+    return ctx
+
+
+async def run_scenario(client: httpx.AsyncClient, ctx: Context, scenario: Scenario, requests: int, concurrency: int, first: int = 0) -> dict:
+    latencies, errors = [], 0
+    # Iteraciones desde `first`: las medidas no repiten las del calentamiento (nombres únicos en los create)
+    counter = iter(range(first, first + requests))
+
+    async def worker():
+        nonlocal errors
+        for i in counter:
+            kwargs = scenario.build(ctx, i)
+            start = time.perf_counter()
+            try:
+                response = await client.request(**kwargs)
+                await response.aread()
+                if response.status_code >= 400:
+                    errors += 1
+            except httpx.HTTPError:
+                errors += 1
+            latencies.append(time.perf_counter() - start)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    return {
+        "requests": requests,
+        "concurrency": concurrency,
+        "errors": errors,
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(requests / elapsed, 2) if elapsed else 0.0,
+        "latency_ms": {
+            "mean": round(statistics.fmean(latencies) * 1000, 2) if latencies else 0.0,
+            "p50": round(percentile(latencies, 50) * 1000, 2),
+            "p95": round(percentile(latencies, 95) * 1000, 2),
+            "p99": round(percentile(latencies, 99) * 1000, 2),
+        },
+    }
+
+
+async def run_suite(base_url: str, scenarios: List[Scenario], requests: int, concurrency: int, warmup: int) -> Dict[str, dict]:
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, timeout=60.0, limits=limits) as client:
+        ctx = await build_context(client)
+        results = {}
+        for scenario in scenarios:
+            if warmup:
+                await run_scenario(client, ctx, scenario, warmup, min(concurrency, warmup))
+            results[scenario.name] = await run_scenario(client, ctx, scenario, requests, concurrency, first=warmup)
+            summary = results[scenario.name]
+            print(f"{scenario.name:34} {summary['throughput_rps']:>9} req/s  p50 {summary['latency_ms']['p50']:>8} ms  "
+                  f"p95 {summary['latency_ms']['p95']:>8} ms  p99 {summary['latency_ms']['p99']:>8} ms  errores {summary['errors']}", file=sys.stderr)
+    return results
+
+
+def _git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "describe", "--always", "--dirty"], cwd=os.path.dirname(os.path.abspath(__file__)),
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def spawn_server(port: int, workers: int, gunicorn: bool = False) -> subprocess.Popen:
+    """
+    Levanta la API con el entorno actual: uvicorn --workers o, con `gunicorn`, el modo de
+    producción de gunicorn.conf.py (sin tareas de arranque: la base de datos ya viene de benchmarks.seed).
+    """
+    env = os.environ.copy()
+    if gunicorn:
+        name = "gunicorn"
+        config = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "gunicorn.conf.py")
+        command = [sys.executable, "-m", "gunicorn", "-c", config, "--access-logfile", "/dev/null", "app.main:app"]
+        env.update(WEB_CONCURRENCY=str(workers), SERVER_BIND=f"127.0.0.1:{port}", SERVER_PRESTART="false")
+    else:
+        name = "uvicorn"
+        command = [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--workers", str(workers), "--log-level", "warning"]
+    process = subprocess.Popen(command, env=env)
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            sys.exit(f"{name} terminó con código {process.returncode}")
+        try:
+            if httpx.get(f"http://127.0.0.1:{port}/api/v1/health/pool", timeout=1.0).status_code == 200:
+                return process
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.5)
+    process.terminate()
+    sys.exit(f"{name} no respondió en 60 s")
+
+
+def compare(baseline_path: str, candidate_path: str, threshold: float) -> int:
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    with open(candidate_path) as f:
+        candidate = json.load(f)
+    print(f"{'escenario':34} {'p95 ' + baseline['label']:>16} {'p95 ' + candidate['label']:>16} {'cambio':>9}")
+    regressions = 0
+    for name, result in candidate["scenarios"].items():
+        before = baseline["scenarios"].get(name)
+        if before is None:
+            print(f"{name:34} {'-':>16} {result['latency_ms']['p95']:>16}")
+            continue
+        old, new = before["latency_ms"]["p95"], result["latency_ms"]["p95"]
+        change = (new - old) / old if old else 0.0
+        flag = ""
+        if change > threshold:
+            regressions += 1
+            flag = "  <- regresión"
+        print(f"{name:34} {old:>16} {new:>16} {change:>+8.1%}{flag}")
+    return 1 if regressions else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--spawn", action="store_true", help="Levantar uvicorn con el entorno actual en --port")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--requests", type=int, default=500, help="Peticiones medidas por escenario")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--warmup", type=int, default=20, help="Peticiones sin medir antes de cada escenario")
+    parser.add_argument("--scenario", action="append", dest="scenarios", help="Ejecutar solo estos escenarios (repetible)")
+    parser.add_argument("--label", default=datetime.now().strftime("%Y%m%d-%H%M%S"))
+    parser.add_argument("--output", help=f"Archivo JSON de resultados (por defecto {RESULTS_DIR}/<label>.json)")
+    parser.add_argument("--compare", nargs=2, metavar=("BASELINE", "CANDIDATE"))
+    parser.add_argument("--threshold", type=float, default=0.10, help="Empeoramiento del p95 que cuenta como regresión")
+    args = parser.parse_args()
+
+    if args.compare:
+        sys.exit(compare(*args.compare, args.threshold))
+
+    scenarios = SCENARIOS
+    if args.scenarios:
+        unknown = set(args.scenarios) - {scenario.name for scenario in SCENARIOS}
+        if unknown:
+            parser.error(f"escenarios desconocidos: {', '.join(sorted(unknown))}")
+        scenarios = [scenario for scenario in SCENARIOS if scenario.name in args.scenarios]
+
+    server = spawn_server(args.port, args.workers) if args.spawn else None
+    base_url = f"http://127.0.0.1:{args.port}" if server else args.url
+    try:
+        results = asyncio.run(run_suite(base_url, scenarios, args.requests, args.concurrency, args.warmup))
+    finally:
+        if server:
+            server.terminate()
+            server.wait()
+
+    report = {
+        "label": args.label,
+        "revision": _git_revision(),
+        "created_at": datetime.now().isoformat(),
+        "base_url": base_url,
+        "database": os.getenv("DATABASE_URL", "").split("://", 1)[0] or None,
+        "db_async": os.getenv("DB_ASYNC", "false"),
+        "workers": args.workers if server else None,
+        "scenarios": results,
+    }
+    output = args.output or os.path.join(RESULTS_DIR, f"{args.label}.json")
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Modo de producción multiproceso: gunicorn como gestor de procesos con workers uvicorn.
+
+    gunicorn -c gunicorn.conf.py app.main:app
+
+El maestro ejecuta una vez las tareas de arranque (app.commands.prestart) y precarga la app;
+los workers se crean por fork. `kill -HUP` reinicia los workers de forma ordenada (cada uno
+termina sus peticiones en curso durante SERVER_GRACEFUL_TIMEOUT) sin repetir esas tareas.
+"""
+import os
+import tempfile
+
+# Este archivo se carga antes que la app, también con preload: los valores que se leen al importar
+# app.core.config o prometheus_client tienen que estar en el entorno aquí
+os.environ["LIFESPAN_STARTUP_TASKS"] = "false"
+
+from app.core.config import (  # noqa: E402
+    METRICS_ENABLED,
+    SERVER_BIND,
+    SERVER_GRACEFUL_TIMEOUT,
+    SERVER_KEEPALIVE,
+    SERVER_MAX_REQUESTS,
+    SERVER_MAX_REQUESTS_JITTER,
+    SERVER_PRELOAD,
+    SERVER_PRESTART,
+    SERVER_TIMEOUT,
+    WEB_CONCURRENCY,
+)
+
+if METRICS_ENABLED:
+    # Cada worker escribe sus métricas en archivos compartidos; /metrics las agrega
+    os.environ.setdefault("PROMETHEUS_MULTIPROC_DIR", os.path.join(tempfile.gettempdir(), "prometheus-multiproc"))
+    os.makedirs(os.environ["PROMETHEUS_MULTIPROC_DIR"], exist_ok=True)
+
+bind = SERVER_BIND
+workers = WEB_CONCURRENCY
+worker_class = "uvicorn_worker.UvicornWorker"
+preload_app = SERVER_PRELOAD
+max_requests = SERVER_MAX_REQUESTS
+max_requests_jitter = SERVER_MAX_REQUESTS_JITTER
+timeout = SERVER_TIMEOUT
+graceful_timeout = SERVER_GRACEFUL_TIMEOUT
+keepalive = SERVER_KEEPALIVE
+accesslog = "-"
+
+
+def on_starting(server):
+    if SERVER_PRESTART:
+        from app.commands.prestart import run_prestart
+
+        server.log.info("Ejecutando tareas de arranque")
+        run_prestart()
+    elif METRICS_ENABLED:
+        from app.commands.prestart import reset_multiprocess_metrics
+
+        reset_multiprocess_metrics()
+
+
+def post_fork(server, worker):
+    # Con preload el motor se creó en el maestro: descartar su pool sin cerrar conexiones ajenas
+    from app.db.database import engine
+
+    engine.dispose(close=False)
+
+
+def child_exit(server, worker):
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        from prometheus_client import multiprocess
+
+        multiprocess.mark_process_dead(worker.pid)
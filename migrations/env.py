@@ -0,0 +1,57 @@
+from logging.config import fileConfig
+
+from alembic import context
+from sqlalchemy import engine_from_config, pool
+from sqlmodel import SQLModel
+
+from app.core.config import SQLMODEL_DATABASE_URL
+
+# Importar los modelos para registrar sus tablas en SQLModel.metadata
+from app.models import cliente, equipo_mantenimiento, foto_mantenimiento, mantenimiento_general, media_blob, ubicacion  # noqa: F401
+
+config = context.config
+config.set_main_option("sqlalchemy.url", SQLMODEL_DATABASE_URL.replace("%", "%%"))
+
+# app.commands.prestart ejecuta Alembic desde su propio proceso (p. ej. el maestro de gunicorn) y no
+# debe reemplazar su configuración de logging
+if config.config_file_name is not None and config.attributes.get("configure_logger", True):
+    fileConfig(config.config_file_name)
+
+target_metadata = SQLModel.metadata
+
+
+def run_migrations_offline() -> None:
+    context.configure(
+        url=config.get_main_option("sqlalchemy.url"),
+        target_metadata=target_metadata,
+        literal_binds=True,
+        dialect_opts={"paramstyle": "named"},
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online() -> None:
+    # Conexión ya abierta por app.commands.prestart (con el bloqueo de migraciones tomado)
+    connection = config.attributes.get("connection")
+    if connection is not None:
+        context.configure(connection=connection, target_metadata=target_metadata)
+        with context.begin_transaction():
+            context.run_migrations()
+        return
+
+    connectable = engine_from_config(
+        config.get_section(config.config_ini_section, {}),
+        prefix="sqlalchemy.",
+        poolclass=pool.NullPool,
+    )
+    with connectable.connect() as connection:
+        context.configure(connection=connection, target_metadata=target_metadata)
+        with context.begin_transaction():
+            context.run_migrations()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
@@ -0,0 +1,85 @@
+"""Esquema inicial, tal como lo creaba SQLModel.metadata.create_all
+
+Revision ID: 0001_baseline
+Revises:
+Create Date: 2025-06-02 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision: str = "0001_baseline"
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "cliente",
+        sa.Column("id", sa.Uuid(), nullable=False),
+        sa.Column("nombre", sa.String(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("nombre"),
+    )
+    op.create_index("ix_cliente_id", "cliente", ["id"])
+
+    op.create_table(
+        "ubicacion",
+        sa.Column("id", sa.Uuid(), nullable=False),
+        sa.Column("ubicacion", sa.String(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_ubicacion_id", "ubicacion", ["id"])
+    op.create_index("ix_ubicacion_ubicacion", "ubicacion", ["ubicacion"], unique=True)
+
+    op.create_table(
+        "mantenimientogeneral",
+        sa.Column("id", sa.Uuid(), nullable=False),
+        sa.Column("cliente_id", sa.Uuid(), nullable=False),
+        sa.Column("ubicacion_id", sa.Uuid(), nullable=False),
+        sa.Column("periodo", sa.String(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(["cliente_id"], ["cliente.id"]),
+        sa.ForeignKeyConstraint(["ubicacion_id"], ["ubicacion.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_mantenimientogeneral_id", "mantenimientogeneral", ["id"])
+
+    op.create_table(
+        "equipomantenimiento",
+        sa.Column("id", sa.Uuid(), nullable=False),
+        sa.Column("equipo", sa.String(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("mantenimiento_general_id", sa.Uuid(), nullable=False),
+        sa.Column("reporte", postgresql.JSON(), nullable=True),
+        sa.ForeignKeyConstraint(["mantenimiento_general_id"], ["mantenimientogeneral.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_equipomantenimiento_id", "equipomantenimiento", ["id"])
+
+    op.create_table(
+        "fotomantenimiento",
+        sa.Column("id", sa.Uuid(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("categoria", sa.String(), nullable=False),
+        sa.Column("url", sa.String(), nullable=False),
+        sa.Column("nombre", sa.String(), nullable=False),
+        sa.Column("equipos_mantenimiento_id", sa.Uuid(), nullable=False),
+        sa.ForeignKeyConstraint(["equipos_mantenimiento_id"], ["equipomantenimiento.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_fotomantenimiento_id", "fotomantenimiento", ["id"])
+
+
+def downgrade() -> None:
+    op.drop_table("fotomantenimiento")
+    op.drop_table("equipomantenimiento")
+    op.drop_table("mantenimientogeneral")
+    op.drop_table("ubicacion")
+    op.drop_table("cliente")
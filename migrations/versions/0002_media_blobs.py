@@ -0,0 +1,40 @@
+"""Almacenamiento por contenido: tabla mediablob, checksum y variantes en fotomantenimiento
+
+Revision ID: 0002_media_blobs
+Revises: 0001_baseline
+Create Date: 2025-06-10 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = "0002_media_blobs"
+down_revision: Union[str, None] = "0001_baseline"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "mediablob",
+        sa.Column("checksum", sa.String(), nullable=False),
+        sa.Column("url", sa.String(), nullable=False),
+        sa.Column("size", sa.Integer(), nullable=False),
+        sa.Column("ref_count", sa.Integer(), nullable=False),
+        sa.Column("thumbnail_url", sa.String(), nullable=True),
+        sa.Column("medium_url", sa.String(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint("checksum"),
+    )
+    op.add_column("fotomantenimiento", sa.Column("checksum", sa.String(), nullable=True))
+    op.add_column("fotomantenimiento", sa.Column("thumbnail_url", sa.String(), nullable=True))
+    op.add_column("fotomantenimiento", sa.Column("medium_url", sa.String(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("fotomantenimiento", "medium_url")
+    op.drop_column("fotomantenimiento", "thumbnail_url")
+    op.drop_column("fotomantenimiento", "checksum")
+    op.drop_table("mediablob")
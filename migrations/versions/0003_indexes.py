@@ -0,0 +1,43 @@
+"""Índices para claves foráneas, orden por created_at y búsqueda por checksum
+
+Revision ID: 0003_indexes
+Revises: 0002_media_blobs
+Create Date: 2025-06-12 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+revision: str = "0003_indexes"
+down_revision: Union[str, None] = "0002_media_blobs"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (nombre, tabla, columnas). Los compuestos que empiezan por la FK cubren también
+# las búsquedas solo por esa FK, por eso no se crea un índice aparte para cada una.
+INDEXES = [
+    ("ix_cliente_created_at_id", "cliente", ["created_at", "id"]),
+    ("ix_ubicacion_created_at_id", "ubicacion", ["created_at", "id"]),
+    ("ix_mantenimientogeneral_cliente_id_created_at", "mantenimientogeneral", ["cliente_id", "created_at"]),
+    ("ix_mantenimientogeneral_ubicacion_id_created_at", "mantenimientogeneral", ["ubicacion_id", "created_at"]),
+    ("ix_mantenimientogeneral_created_at_id", "mantenimientogeneral", ["created_at", "id"]),
+    ("ix_equipomantenimiento_mantenimiento_general_id_created_at", "equipomantenimiento", ["mantenimiento_general_id", "created_at"]),
+    ("ix_equipomantenimiento_created_at_id", "equipomantenimiento", ["created_at", "id"]),
+    ("ix_fotomantenimiento_equipos_mantenimiento_id_created_at", "fotomantenimiento", ["equipos_mantenimiento_id", "created_at"]),
+    ("ix_fotomantenimiento_created_at_id", "fotomantenimiento", ["created_at", "id"]),
+    ("ix_fotomantenimiento_checksum", "fotomantenimiento", ["checksum"]),
+]
+
+
+def upgrade() -> None:
+    # CONCURRENTLY evita bloquear las escrituras en tablas grandes; no puede ir dentro de una transacción
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(name, table, columns, postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
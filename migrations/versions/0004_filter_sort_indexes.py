@@ -0,0 +1,33 @@
+"""Índices (campo, id) para filtrar y ordenar por periodo, equipo y categoría
+
+Revision ID: 0004_filter_sort_indexes
+Revises: 0003_indexes
+Create Date: 2025-06-16 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+revision: str = "0004_filter_sort_indexes"
+down_revision: Union[str, None] = "0003_indexes"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEXES = [
+    ("ix_mantenimientogeneral_periodo_id", "mantenimientogeneral", ["periodo", "id"]),
+    ("ix_equipomantenimiento_equipo_id", "equipomantenimiento", ["equipo", "id"]),
+    ("ix_fotomantenimiento_categoria_id", "fotomantenimiento", ["categoria", "id"]),
+]
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(name, table, columns, postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
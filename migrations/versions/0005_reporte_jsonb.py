@@ -0,0 +1,40 @@
+"""equipomantenimiento.reporte como JSONB con índice GIN
+
+Revision ID: 0005_reporte_jsonb
+Revises: 0004_filter_sort_indexes
+Create Date: 2025-06-18 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+revision: str = "0005_reporte_jsonb"
+down_revision: Union[str, None] = "0004_filter_sort_indexes"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name == "postgresql":
+        # Reescribe la tabla con bloqueo exclusivo; en tablas grandes conviene una ventana de mantenimiento
+        op.alter_column(
+            "equipomantenimiento", "reporte",
+            type_=postgresql.JSONB(), existing_type=postgresql.JSON(), postgresql_using="reporte::jsonb",
+        )
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_equipomantenimiento_reporte", "equipomantenimiento", ["reporte"],
+            postgresql_using="gin", postgresql_concurrently=True, if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index("ix_equipomantenimiento_reporte", table_name="equipomantenimiento", postgresql_concurrently=True, if_exists=True)
+    if op.get_bind().dialect.name == "postgresql":
+        op.alter_column(
+            "equipomantenimiento", "reporte",
+            type_=postgresql.JSON(), existing_type=postgresql.JSONB(), postgresql_using="reporte::json",
+        )
@@ -0,0 +1,56 @@
+"""Búsqueda sin tildes con pg_trgm: función unaccent_lower e índices de trigramas y de prefijo
+
+Revision ID: 0006_search_indexes
+Revises: 0005_reporte_jsonb
+Create Date: 2025-06-24 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+revision: str = "0006_search_indexes"
+down_revision: Union[str, None] = "0005_reporte_jsonb"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+SEARCH_COLUMNS = [("cliente", "nombre"), ("ubicacion", "ubicacion"), ("equipomantenimiento", "equipo")]
+
+
+def upgrade() -> None:
+    # En SQLite la función se registra en cada conexión (app.db.database) y la búsqueda no usa índice
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.execute("CREATE EXTENSION IF NOT EXISTS unaccent")
+    # unaccent() es STABLE (depende del diccionario configurado); fijando el diccionario se puede
+    # declarar IMMUTABLE y usar en índices de expresión
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION unaccent_lower(text) RETURNS text
+        LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT
+        AS $$ SELECT lower(public.unaccent('public.unaccent'::regdictionary, $1)) $$
+        """
+    )
+    with op.get_context().autocommit_block():
+        for table, column in SEARCH_COLUMNS:
+            # GiST y no GIN: permite ORDER BY distancia (<<->) con LIMIT directamente desde el índice
+            op.execute(
+                f"CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_{table}_{column}_trgm "
+                f"ON {table} USING gist (unaccent_lower({column}) gist_trgm_ops)"
+            )
+            # Orden binario ("C"): sirve a la vez para LIKE 'prefijo%' y para ORDER BY sin ordenar en memoria
+            op.execute(
+                f"CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_{table}_{column}_prefix "
+                f'ON {table} ((unaccent_lower({column}) COLLATE "C"))'
+            )
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    with op.get_context().autocommit_block():
+        for table, column in SEARCH_COLUMNS:
+            op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS ix_{table}_{column}_prefix")
+            op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS ix_{table}_{column}_trgm")
+    op.execute("DROP FUNCTION IF EXISTS unaccent_lower(text)")
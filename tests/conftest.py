@@ -0,0 +1,89 @@
+"""
+Configuración común de las pruebas: base de datos SQLite y MEDIA_ROOT en un directorio temporal,
+almacenamiento local y sin tareas en segundo plano. La configuración se lee al importar app, por eso
+las variables se fijan aquí antes de cualquier import de la aplicación.
+
+Se importa con DB_ASYNC=true para que existan los dos motores (el async sobre aiosqlite); el fixture
+`client` se parametriza y cada prueba HTTP corre contra los dos modos de sesión. `session` es siempre
+una sesión sync sobre la misma base, para preparar datos y comprobar resultados.
+
+    python -m pytest
+"""
+import asyncio
+import os
+import tempfile
+
+_TMP = tempfile.mkdtemp(prefix="mantenimiento-tests-")
+os.environ.update(
+    DATABASE_URL=f"sqlite:///{_TMP}/test.db",
+    DB_ASYNC="true",
+    DB_PROFILE="dev",
+    MEDIA_ROOT=os.path.join(_TMP, "media"),
+    STORAGE_BACKEND="local",
+    CACHE_BACKEND="memory",
+    IMAGE_VARIANT_WORKERS="0",
+    MEDIA_RECONCILE_INTERVAL_SECONDS="0",
+    METRICS_ENABLED="false",
+    PROFILING_ENABLED="false",
+)
+os.makedirs(os.path.join(_TMP, "media", "blobs"), exist_ok=True)
+
+import pytest  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+from sqlmodel import Session, SQLModel  # noqa: E402
+
+from app.db import database  # noqa: E402
+from app.db.database import engine as app_engine  # noqa: E402
+from app.main import app  # noqa: E402
+from app.models.cliente import Cliente  # noqa: E402
+from app.models.equipo_mantenimiento import EquipoMantenimiento  # noqa: E402
+from app.models.mantenimiento_general import MantenimientoGeneral  # noqa: E402
+from app.models.ubicacion import Ubicacion  # noqa: E402
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture(scope="session")
+def engine():
+    SQLModel.metadata.create_all(app_engine)
+    yield app_engine
+    # Las pruebas de servicios que pasan por session_scope dejan conexiones de aiosqlite en el
+    # pool; su hilo no es daemon y, sin cerrarlas, el proceso no termina
+    asyncio.run(database.async_engine.dispose())
+
+
+@pytest.fixture
+def session(engine):
+    with Session(engine, expire_on_commit=False) as session:
+        yield session
+
+
+@pytest.fixture(params=["sync", "async"])
+def db_mode(request, monkeypatch) -> str:
+    """Modo de sesión de la API: sin motor async, las dependencias y session_scope usan el sync."""
+    if request.param == "sync":
+        monkeypatch.setitem(app.dependency_overrides, database.get_session, database.get_sync_session)
+        monkeypatch.setattr(database, "async_engine", None)
+    return request.param
+
+
+@pytest.fixture
+def client(engine, db_mode):
+    with TestClient(app) as client:
+        yield client
+
+
+@pytest.fixture
+def equipo(session) -> EquipoMantenimiento:
+    """Un equipo con su mantenimiento, cliente y ubicación, para colgar fotos."""
+    suffix = os.urandom(4).hex()
+    cliente = Cliente(nombre=f"Cliente {suffix}")
+    ubicacion = Ubicacion(ubicacion=f"Ubicación {suffix}")
+    mantenimiento = MantenimientoGeneral(cliente_id=cliente.id, ubicacion_id=ubicacion.id, periodo="2025-01")
+    equipo = EquipoMantenimiento(equipo=f"Equipo {suffix}", mantenimiento_general_id=mantenimiento.id)
+    session.add_all([cliente, ubicacion, mantenimiento, equipo])
+    session.commit()
+    return equipo
@@ -0,0 +1,78 @@
+import uuid
+
+from sqlmodel import select
+
+from app.models.equipo_mantenimiento import EquipoMantenimiento
+from app.models.mantenimiento_general import MantenimientoGeneral
+
+
+def items_of(response):
+    return [(item["ok"], item["error"]) for item in response.json()["data"]["items"]]
+
+
+def test_batch_create_reports_missing_references_per_item(client, session, equipo):
+    mantenimiento = session.get(MantenimientoGeneral, equipo.mantenimiento_general_id)
+    response = client.post("/api/v1/mantenimiento_general/batch", json={"items": [
+        {"cliente_id": str(mantenimiento.cliente_id), "ubicacion_id": str(mantenimiento.ubicacion_id), "periodo": "2025-02"},
+        {"cliente_id": str(uuid.uuid4()), "ubicacion_id": str(mantenimiento.ubicacion_id), "periodo": "2025-03"},
+    ]})
+
+    assert response.status_code == 207
+    assert items_of(response) == [(True, None), (False, "cliente_id no existe")]
+    created = response.json()["data"]["items"][0]["data"]
+    assert session.get(MantenimientoGeneral, uuid.UUID(created["id"])).periodo == "2025-02"
+
+
+def test_batch_create_all_or_nothing_creates_nothing(client, session, equipo):
+    name = f"Lote {uuid.uuid4().hex[:8]}"
+    response = client.post("/api/v1/equipo_mantenimiento/batch", json={"all_or_nothing": True, "items": [
+        {"equipo": name, "mantenimiento_general_id": str(equipo.mantenimiento_general_id)},
+        {"equipo": name, "mantenimiento_general_id": str(uuid.uuid4())},
+    ]})
+
+    assert response.status_code == 409
+    assert response.json()["details"]["errors"] == [{"index": 1, "error": "mantenimiento_general_id no existe"}]
+    assert session.exec(select(EquipoMantenimiento).where(EquipoMantenimiento.equipo == name)).all() == []
+
+
+def test_batch_update_reports_missing_and_duplicate_ids(client, session, equipo):
+    response = client.patch("/api/v1/equipo_mantenimiento/batch", json={"items": [
+        {"id": str(equipo.id), "equipo": "Bomba revisada"},
+        {"id": str(uuid.uuid4()), "equipo": "No existe"},
+        {"id": str(equipo.id), "equipo": "Repetido"},
+    ]})
+
+    assert response.status_code == 207
+    assert items_of(response) == [(True, None), (False, "no encontrado"), (False, "id repetido en el lote")]
+    session.expire_all()
+    assert session.get(EquipoMantenimiento, equipo.id).equipo == "Bomba revisada"
+
+
+def test_batch_update_rejects_null_for_required_columns_per_item(client, session, equipo):
+    other = EquipoMantenimiento(equipo="Otro equipo", mantenimiento_general_id=equipo.mantenimiento_general_id)
+    session.add(other)
+    session.commit()
+
+    response = client.patch("/api/v1/equipo_mantenimiento/batch", json={"items": [
+        {"id": str(equipo.id), "equipo": None},
+        {"id": str(other.id), "reporte": None, "equipo": "Otro revisado"},
+    ]})
+
+    # reporte admite null; equipo no, y solo falla ese elemento
+    assert response.status_code == 207
+    assert items_of(response) == [(False, "equipo no puede ser null"), (True, None)]
+    session.expire_all()
+    assert session.get(EquipoMantenimiento, equipo.id).equipo == equipo.equipo
+    assert session.get(EquipoMantenimiento, other.id).equipo == "Otro revisado"
+
+
+def test_batch_update_all_or_nothing_updates_nothing(client, session, equipo):
+    response = client.patch("/api/v1/mantenimiento_general/batch", json={"all_or_nothing": True, "items": [
+        {"id": str(equipo.mantenimiento_general_id), "periodo": "2030-01"},
+        {"id": str(equipo.mantenimiento_general_id), "ubicacion_id": str(uuid.uuid4())},
+    ]})
+
+    assert response.status_code == 409
+    assert response.json()["details"]["errors"] == [{"index": 1, "error": "id repetido en el lote"}]
+    session.expire_all()
+    assert session.get(MantenimientoGeneral, equipo.mantenimiento_general_id).periodo == "2025-01"
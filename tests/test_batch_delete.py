@@ -0,0 +1,78 @@
+import io
+import os
+import uuid
+
+import pytest
+from fastapi import UploadFile
+from sqlmodel import select
+
+from app.core.storage import media_key, storage
+from app.models.equipo_mantenimiento import EquipoMantenimiento
+from app.models.foto_mantenimiento import FotoMantenimiento
+from app.models.mantenimiento_general import MantenimientoGeneral
+from app.models.media_blob import MediaBlob
+from app.services.foto_mantenimiento import save_and_register_fotos
+
+pytestmark = pytest.mark.anyio
+
+
+async def add_fotos(session, equipo_id, *contents):
+    files = [UploadFile(io.BytesIO(content), filename="foto.jpg") for content in contents]
+    return await save_and_register_fotos(session, "antes", equipo_id, files)
+
+
+def fotos_of(session, equipo_id):
+    return session.exec(select(FotoMantenimiento).where(FotoMantenimiento.equipos_mantenimiento_id == equipo_id)).all()
+
+
+async def test_batch_delete_equipos_removes_fotos_and_releases_blobs(client, session, equipo):
+    other = EquipoMantenimiento(equipo="Otro", mantenimiento_general_id=equipo.mantenimiento_general_id)
+    session.add(other)
+    session.commit()
+    shared, own = os.urandom(64), os.urandom(64)
+    fotos = await add_fotos(session, equipo.id, shared, own)
+    await add_fotos(session, other.id, shared)
+    equipo_id, missing = equipo.id, uuid.uuid4()
+
+    response = client.post("/api/v1/equipo_mantenimiento/batch/delete", json={"ids": [str(equipo.id), str(missing)]})
+
+    assert response.status_code == 207
+    items = response.json()["data"]["items"]
+    assert [item["ok"] for item in items] == [True, False]
+    assert items[1]["error"] == "no encontrado"
+    session.expire_all()
+    assert session.get(EquipoMantenimiento, equipo_id) is None
+    assert fotos_of(session, equipo_id) == []
+    # El contenido compartido con otro equipo se conserva; el propio se libera
+    assert session.get(MediaBlob, fotos[0].checksum).ref_count == 1
+    assert storage.stat(media_key(fotos[0].url)) is not None
+    assert session.get(MediaBlob, fotos[1].checksum) is None
+    assert storage.stat(media_key(fotos[1].url)) is None
+
+
+async def test_batch_delete_mantenimientos_cascades_to_equipos_and_fotos(client, session, equipo):
+    fotos = await add_fotos(session, equipo.id, os.urandom(64))
+    equipo_id, mantenimiento_id = equipo.id, equipo.mantenimiento_general_id
+
+    response = client.post("/api/v1/mantenimiento_general/batch/delete", json={"ids": [str(mantenimiento_id)]})
+
+    assert response.status_code == 200
+    assert response.json()["data"]["succeeded"] == 1
+    session.expire_all()
+    assert session.get(MantenimientoGeneral, mantenimiento_id) is None
+    assert session.get(EquipoMantenimiento, equipo_id) is None
+    assert fotos_of(session, equipo_id) == []
+    assert session.get(MediaBlob, fotos[0].checksum) is None
+    assert storage.stat(media_key(fotos[0].url)) is None
+
+
+async def test_batch_delete_all_or_nothing_keeps_everything(client, session, equipo):
+    fotos = await add_fotos(session, equipo.id, os.urandom(64))
+
+    response = client.post("/api/v1/equipo_mantenimiento/batch/delete", json={"ids": [str(equipo.id), str(uuid.uuid4())], "all_or_nothing": True})
+
+    assert response.status_code == 409
+    session.expire_all()
+    assert session.get(EquipoMantenimiento, equipo.id) is not None
+    assert len(fotos_of(session, equipo.id)) == 1
+    assert storage.stat(media_key(fotos[0].url)) is not None
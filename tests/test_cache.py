@@ -0,0 +1,153 @@
+import os
+
+import pytest
+from sqlmodel import Session
+
+from app.core import cache as cache_module
+from app.core.cache import Cache, MemoryBackend, RedisBackend
+from app.schemas.cliente import ClienteCreate, ClienteUpdate
+from app.schemas.ubicacion import UbicacionCreate, UbicacionUpdate
+from app.services import cliente as cliente_service
+from app.services import ubicacion as ubicacion_service
+
+pytestmark = pytest.mark.anyio
+
+
+class Clock:
+    """Sustituye a time.monotonic en app.core.cache para hacer caducar entradas sin esperar."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(cache_module.time, "monotonic", clock)
+    return clock
+
+
+@pytest.fixture
+def redis_client():
+    fakeredis = pytest.importorskip("fakeredis")
+    return fakeredis.FakeAsyncRedis()
+
+
+@pytest.fixture(params=["memory", "redis"])
+def cache(request):
+    if request.param == "memory":
+        return Cache(MemoryBackend(max_entries=16), ttl=60, tombstone_ttl=5)
+    return Cache(RedisBackend(request.getfixturevalue("redis_client")), ttl=60, tombstone_ttl=5)
+
+
+async def test_memory_backend_evicts_least_recently_used():
+    backend = MemoryBackend(max_entries=2)
+    await backend.set("a", 1, 60)
+    await backend.set("b", 2, 60)
+    assert await backend.get("a") == 1  # "b" pasa a ser la menos usada
+    await backend.set("c", 3, 60)
+
+    assert await backend.get("b") is None
+    assert await backend.get("a") == 1
+    assert await backend.get("c") == 3
+    assert backend.size() == 2
+
+
+async def test_memory_backend_expires_entries(clock):
+    backend = MemoryBackend()
+    await backend.set("a", 1, 10)
+    clock.now += 9
+    assert await backend.get("a") == 1
+    clock.now += 1
+    assert await backend.get("a") is None
+    assert backend.size() == 0
+
+
+async def test_redis_backend_sets_ttl_and_clears_only_its_prefix(redis_client):
+    backend = RedisBackend(redis_client)
+    await backend.set("cliente:1", {"nombre": "A"}, 30)
+    await redis_client.set("otra:clave", "x")
+
+    assert await backend.get("cliente:1") == {"nombre": "A"}
+    assert 0 < await redis_client.ttl("cache:cliente:1") <= 30
+    await backend.clear()
+    assert await backend.get("cliente:1") is None
+    assert await redis_client.get("otra:clave") == b"x"
+
+
+async def test_hit_and_miss_counters(cache):
+    assert await cache.get("cliente", 1) is None
+    assert await cache.set("cliente", 1, {"nombre": "A"})
+    assert await cache.get("cliente", 1) == {"nombre": "A"}
+    assert await cache.get("cliente", 1) == {"nombre": "A"}
+    assert await cache.get("ubicacion", 1) is None
+
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["hit_ratio"]) == (2, 2, 0.5)
+    assert stats["namespaces"] == {"cliente": {"hits": 2, "misses": 1}, "ubicacion": {"hits": 0, "misses": 1}}
+
+
+async def test_set_after_invalidate_does_not_store_stale_value(cache):
+    # Una lectura leyó el valor antiguo de la base de datos; una escritura confirma e invalida antes de su set
+    await cache.invalidate("cliente", 1)
+    assert not await cache.set("cliente", 1, {"nombre": "antiguo"})
+    assert await cache.get("cliente", 1) is None
+
+
+async def test_tombstone_expires(clock):
+    cache = Cache(MemoryBackend(), ttl=60, tombstone_ttl=5)
+    await cache.invalidate("cliente", 1)
+    clock.now += 5
+    assert await cache.set("cliente", 1, {"nombre": "nuevo"})
+    assert await cache.get("cliente", 1) == {"nombre": "nuevo"}
+
+
+CATALOGOS = [
+    pytest.param(cliente_service, "cliente", "nombre", ClienteCreate, ClienteUpdate, id="cliente"),
+    pytest.param(ubicacion_service, "ubicacion", "ubicacion", UbicacionCreate, UbicacionUpdate, id="ubicacion"),
+]
+
+
+@pytest.mark.parametrize("service, namespace, field, create_schema, update_schema", CATALOGOS)
+async def test_update_and_delete_invalidate(session, cache, monkeypatch, service, namespace, field, create_schema, update_schema):
+    monkeypatch.setattr(service, "catalog_cache", cache)
+    get, create, update, delete = (getattr(service, f"{action}_{namespace}") for action in ("get", "create", "update", "delete"))
+    created = await create(session, create_schema(**{field: f"Original {os.urandom(4).hex()}"}))
+
+    await get(session, created.id)
+    assert (await cache.get(namespace, created.id))[field] == getattr(created, field)
+
+    nuevo = f"Actualizado {os.urandom(4).hex()}"
+    await update(session, created.id, update_schema(**{field: nuevo}))
+    assert await cache.get(namespace, created.id) is None
+    assert getattr(await get(session, created.id), field) == nuevo
+
+    await delete(session, created.id)
+    assert await cache.get(namespace, created.id) is None
+    assert await get(session, created.id) is None
+
+
+async def test_read_through_does_not_cache_value_read_before_concurrent_update(engine, session, monkeypatch):
+    cache = Cache(MemoryBackend(), ttl=60, tombstone_ttl=5)
+    monkeypatch.setattr(cliente_service, "catalog_cache", cache)
+    created = await cliente_service.create_cliente(session, ClienteCreate(nombre=f"Original {os.urandom(4).hex()}"))
+    nuevo = f"Actualizado {os.urandom(4).hex()}"
+    add = cache.backend.add
+
+    async def add_after_concurrent_update(key, value, ttl):
+        # La actualización confirma e invalida entre la lectura de la base de datos y el set
+        with Session(engine, expire_on_commit=False) as writer:
+            await cliente_service.update_cliente(writer, created.id, ClienteUpdate(nombre=nuevo))
+        return await add(key, value, ttl)
+
+    monkeypatch.setattr(cache.backend, "add", add_after_concurrent_update)
+    with Session(engine, expire_on_commit=False) as reader:
+        assert (await cliente_service.get_cliente(reader, created.id)).nombre == created.nombre
+    monkeypatch.setattr(cache.backend, "add", add)
+
+    assert await cache.get("cliente", created.id) is None
+    with Session(engine, expire_on_commit=False) as reader:
+        assert (await cliente_service.get_cliente(reader, created.id)).nombre == nuevo
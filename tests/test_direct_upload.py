@@ -0,0 +1,149 @@
+import hashlib
+import os
+import sys
+from urllib.parse import parse_qs, urlsplit
+
+import httpx
+import pytest
+
+from app.core import storage as storage_module
+from app.core.storage import S3Storage
+from app.models.media_blob import MediaBlob
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture(scope="module")
+def moto_endpoint():
+    """Servidor de moto en un hilo: las URLs firmadas se usan con HTTP real, como con S3 o MinIO."""
+    pytest.importorskip("boto3")
+    server_module = pytest.importorskip("moto.server")
+    server = server_module.ThreadedMotoServer(ip_address="127.0.0.1", port=0, verbose=False)
+    server.start()
+    host, port = server.get_host_and_port()
+    yield f"http://{host}:{port}"
+    server.stop()
+
+
+@pytest.fixture(params=["local", "s3"])
+def storage(request, monkeypatch):
+    """El almacenamiento de la aplicación: el local de conftest o un bucket de moto en su lugar."""
+    if request.param == "local":
+        return storage_module.storage
+    import boto3
+    from botocore.config import Config
+
+    client = boto3.client(
+        "s3",
+        endpoint_url=request.getfixturevalue("moto_endpoint"),
+        region_name="us-east-1",
+        aws_access_key_id="test",
+        aws_secret_access_key="test",
+        config=Config(signature_version="s3v4", s3={"addressing_style": "path"}),
+    )
+    bucket = f"media-{os.urandom(4).hex()}"
+    client.create_bucket(Bucket=bucket)
+    s3, local = S3Storage(client, bucket=bucket), storage_module.storage
+    # Los módulos importan `storage` por nombre: se sustituye en cada uno
+    for module in list(sys.modules.values()):
+        if module is not None and module.__name__.startswith("app.") and getattr(module, "storage", None) is local:
+            monkeypatch.setattr(module, "storage", s3)
+    return s3
+
+
+def upload_url(client, body: bytes, extension: str = "jpg") -> dict:
+    response = client.post("/api/v1/foto_mantenimiento/upload-url", json={"checksum": hashlib.sha256(body).hexdigest(), "size": len(body), "extension": extension})
+    assert response.status_code == 200
+    return response.json()["data"]
+
+
+def put(client, upload: dict, body: bytes) -> httpx.Response:
+    # En local la URL es relativa y la atiende la API; con S3 apunta al bucket
+    if upload["url"].startswith("/"):
+        return client.request(upload["method"], upload["url"], content=body, headers=upload["headers"])
+    return httpx.request(upload["method"], upload["url"], content=body, headers=upload["headers"])
+
+
+def register(client, equipo, body: bytes, extension: str = "jpg") -> httpx.Response:
+    return client.post("/api/v1/foto_mantenimiento/register", json={
+        "categoria": "antes",
+        "equipos_mantenimiento_id": str(equipo.id),
+        "checksum": hashlib.sha256(body).hexdigest(),
+        "extension": extension,
+    })
+
+
+async def test_presigned_put_and_register(client, session, equipo, storage):
+    body = os.urandom(512)
+    data = upload_url(client, body)
+    assert data["exists"] is False
+
+    assert put(client, data["upload"], body).status_code in (200, 201)
+    response = register(client, equipo, body)
+
+    assert response.status_code == 201
+    foto = response.json()["data"]
+    assert foto["url"] == f"/media/{data['key']}"
+    assert foto["checksum"] == hashlib.sha256(body).hexdigest()
+    assert storage.stat(data["key"]).size == len(body)
+    assert session.get(MediaBlob, foto["checksum"]).ref_count == 1
+    # El mismo contenido ya no se vuelve a subir
+    assert upload_url(client, body) == {"key": data["key"], "exists": True, "upload": None}
+
+
+async def test_register_without_upload_is_409(client, equipo, storage):
+    response = register(client, equipo, os.urandom(128))
+    assert response.status_code == 409
+
+
+@pytest.mark.parametrize("storage", ["s3"], indirect=True)
+async def test_register_with_other_content_under_the_key_is_409(client, equipo, storage, tmp_path):
+    # En local el PUT firmado comprueba el contenido antes de guardarlo (test_local_put_rejects_other_content);
+    # con S3 el bucket calcula el checksum del objeto y el registro lo compara con el declarado
+    declared, stored = os.urandom(128), os.urandom(128)
+    key = upload_url(client, declared)["key"]
+    path = tmp_path / "otro.jpg"
+    path.write_bytes(stored)
+    storage.upload_file(str(path), key)
+
+    response = register(client, equipo, declared)
+
+    assert response.status_code == 409
+    assert "checksum" in response.json()["details"]
+
+
+async def test_delete_releases_the_blob(client, session, equipo, storage):
+    body = os.urandom(256)
+    data = upload_url(client, body)
+    put(client, data["upload"], body)
+    foto = register(client, equipo, body).json()["data"]
+
+    assert client.delete(f"/api/v1/foto_mantenimiento/{foto['id']}").status_code == 200
+    session.expire_all()
+    assert session.get(MediaBlob, foto["checksum"]) is None
+    assert storage.stat(data["key"]) is None
+
+
+def test_local_put_rejects_other_content(client):
+    body = os.urandom(128)
+    upload = upload_url(client, body)["upload"]
+
+    response = put(client, upload, os.urandom(128))
+
+    assert response.status_code == 400
+    assert storage_module.storage.stat(upload_url(client, body)["key"]) is None
+
+
+def test_local_put_rejects_expired_or_tampered_signature(client):
+    body = os.urandom(128)
+    key = upload_url(client, body)["key"]
+    expired = storage_module.storage.presign_upload(key, hashlib.sha256(body).hexdigest(), len(body), expires_in=-1)
+
+    response = client.put(expired.url, content=body, headers=expired.headers)
+    assert response.status_code == 403
+
+    upload = upload_url(client, body)["upload"]
+    query = parse_qs(urlsplit(upload["url"]).query)
+    tampered = upload["url"].replace(f"size={query['size'][0]}", f"size={len(body) + 1}")
+    assert client.put(tampered, content=body + b"x", headers=upload["headers"]).status_code == 403
+    assert storage_module.storage.stat(key) is None
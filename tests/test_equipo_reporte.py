@@ -0,0 +1,49 @@
+import os
+
+import pytest
+
+from app.models.equipo_mantenimiento import EquipoMantenimiento
+from app.schemas.equipo_mantenimiento import EquipoMantenimientoReporteQuery, ReporteRango
+from app.services.equipo_mantenimiento import get_equipos_mantenimiento
+
+pytestmark = pytest.mark.anyio
+
+VALORES = {
+    "prefijo": "2.5 bar",
+    "negativo": "-10 C",
+    "espacios": "  7",
+    "numero": 3,
+    "cero": 0,
+    "texto": "n/a",
+    "vacio": "",
+    "booleano": True,
+    "decimal_sin_entero": ".5",
+}
+
+
+@pytest.fixture
+def clave(session, equipo):
+    """Una clave propia por test: la base de datos se comparte entre tests."""
+    clave = f"lectura_{os.urandom(4).hex()}"
+    for nombre, valor in VALORES.items():
+        session.add(EquipoMantenimiento(equipo=nombre, mantenimiento_general_id=equipo.mantenimiento_general_id, reporte={clave: valor}))
+    session.add(EquipoMantenimiento(equipo="sin_clave", mantenimiento_general_id=equipo.mantenimiento_general_id, reporte={}))
+    session.commit()
+    return clave
+
+
+async def buscar(session, clave, min=None, max=None):
+    query = EquipoMantenimientoReporteQuery(rangos=[ReporteRango(clave=clave, min=min, max=max)])
+    return {e.equipo for e in await get_equipos_mantenimiento(session, limit=100, reporte=query)}
+
+
+async def test_rango_usa_el_numero_al_inicio_del_valor(session, clave):
+    assert await buscar(session, clave, min=2, max=3) == {"prefijo", "numero"}
+    assert await buscar(session, clave, max=-5) == {"negativo"}
+    assert await buscar(session, clave, min=5) == {"espacios"}
+
+
+async def test_valores_no_numericos_no_entran_en_rangos_que_incluyen_cero(session, clave):
+    # Igual que NUMERIC_PREFIX en PostgreSQL: "n/a", "", booleanos y ".5" no tienen número al inicio
+    assert await buscar(session, clave, min=-1, max=1) == {"cero"}
+    assert await buscar(session, clave) == {"prefijo", "negativo", "espacios", "numero", "cero"}
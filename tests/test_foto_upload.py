@@ -0,0 +1,154 @@
+import asyncio
+import io
+import os
+import time
+
+import pytest
+from fastapi import UploadFile
+from sqlmodel import Session, select
+from starlette.datastructures import Headers
+
+from app.core.storage import storage
+from app.models.foto_mantenimiento import FotoMantenimiento
+from app.models.media_blob import MediaBlob
+from app.services import foto_mantenimiento as foto_service
+from app.services.foto_mantenimiento import InvalidUploadError, save_and_register_fotos
+
+pytestmark = pytest.mark.anyio
+
+
+def upload(content: bytes, filename: str = "foto.jpg", content_type: str = None) -> UploadFile:
+    headers = Headers({"content-type": content_type}) if content_type else None
+    return UploadFile(io.BytesIO(content), filename=filename, headers=headers)
+
+
+def temp_files():
+    return [name for name in os.listdir(storage.temp_directory) if name.startswith(".upload-")]
+
+
+def blob_keys(session):
+    return {url[len("/media/"):] for url in session.exec(select(MediaBlob.url)).all()}
+
+
+async def test_bulk_upload_deduplicates_content(session, equipo):
+    content = os.urandom(256)
+    fotos = await save_and_register_fotos(session, "antes", equipo.id, [upload(content), upload(content)])
+
+    assert fotos[0].checksum == fotos[1].checksum
+    blob = session.get(MediaBlob, fotos[0].checksum)
+    assert blob.ref_count == 2
+    assert storage.stat(blob.url[len("/media/"):]).size == 256
+
+
+async def test_failed_promotion_removes_blobs_promoted_by_the_same_call(session, equipo, monkeypatch):
+    existing = (await save_and_register_fotos(session, "antes", equipo.id, [upload(b"ya almacenado")]))[0]
+    before = blob_keys(session)
+    # La base de datos se comparte entre tests: solo cuentan los blobs de este almacenamiento
+    stored_before = {key for key in before if storage.stat(key) is not None}
+    listed_before = set(storage.list("blobs/"))
+    fresh, failing = os.urandom(64), os.urandom(64)
+
+    promote = storage.promote
+
+    def fail_for_one(tmp_path, key):
+        with open(tmp_path, "rb") as f:
+            if f.read() == failing:
+                raise OSError("disco lleno")
+        promote(tmp_path, key)
+
+    monkeypatch.setattr(storage, "promote", fail_for_one)
+    with pytest.raises(OSError):
+        await save_and_register_fotos(session, "antes", equipo.id, [upload(b"ya almacenado"), upload(fresh), upload(failing)])
+
+    # Solo queda lo que había: el blob nuevo que sí se guardó se borró y el existente sigue igual
+    assert blob_keys(session) == before
+    assert storage.stat(existing.url[len("/media/"):]) is not None
+    assert session.get(MediaBlob, existing.checksum).ref_count == 1
+    assert all(storage.stat(key) is not None for key in stored_before)
+    assert not [key for key in storage.list("blobs/") if key not in listed_before]
+    assert temp_files() == []
+
+
+async def test_failed_commit_removes_new_blobs_and_keeps_counts(session, equipo, monkeypatch):
+    existing = (await save_and_register_fotos(session, "antes", equipo.id, [upload(b"compartido")]))[0]
+    fotos_before = len(session.exec(select(FotoMantenimiento)).all())
+    before = blob_keys(session)
+    listed_before = set(storage.list("blobs/"))
+
+    def failing_commit():
+        raise RuntimeError("conexión perdida")
+
+    monkeypatch.setattr(session, "commit", failing_commit)
+    with pytest.raises(RuntimeError):
+        await save_and_register_fotos(session, "antes", equipo.id, [upload(b"compartido"), upload(os.urandom(64))])
+    monkeypatch.undo()
+
+    assert blob_keys(session) == before
+    assert session.get(MediaBlob, existing.checksum).ref_count == 1
+    assert storage.stat(existing.url[len("/media/"):]) is not None
+    assert not [key for key in storage.list("blobs/") if key not in listed_before]
+    assert len(session.exec(select(FotoMantenimiento)).all()) == fotos_before
+
+
+async def test_failed_insert_does_not_leak_blobs(session, equipo, monkeypatch):
+    before = blob_keys(session)
+    listed_before = set(storage.list("blobs/"))
+    monkeypatch.setattr(foto_service, "FotoMantenimientoCreate", None)
+    with pytest.raises(TypeError):
+        await save_and_register_fotos(session, "antes", equipo.id, [upload(os.urandom(64))])
+
+    assert blob_keys(session) == before
+    assert not [key for key in storage.list("blobs/") if key not in listed_before]
+
+
+@pytest.mark.parametrize("filename, content_type, ext", [
+    ("foto.PNG", None, "PNG"),
+    ("sin_extension", "image/jpeg", "jpg"),
+    ("x.jpg/../z", "image/png", "png"),
+    ("foto.tar.gz/..", "image/jpeg", "jpg"),
+])
+async def test_key_extension_comes_from_a_valid_suffix_or_the_content_type(session, equipo, filename, content_type, ext):
+    (foto,) = await save_and_register_fotos(session, "antes", equipo.id, [upload(os.urandom(64), filename, content_type)])
+
+    assert foto.url == f"/media/blobs/{foto.checksum[:2]}/{foto.checksum}.{ext}"
+    assert storage.stat(foto.url[len("/media/"):]) is not None
+
+
+async def test_upload_without_a_usable_extension_is_rejected_before_writing(session, equipo):
+    before = temp_files()
+    with pytest.raises(InvalidUploadError):
+        await save_and_register_fotos(session, "antes", equipo.id, [upload(os.urandom(64), "x.jpg/../z")])
+    assert temp_files() == before
+
+
+def test_upload_endpoint_returns_400_for_unusable_extension(client, equipo):
+    response = client.post(
+        "/api/v1/foto_mantenimiento/upload",
+        data={"categoria": "antes", "equipos_mantenimiento_id": str(equipo.id)},
+        files={"file": ("x.jpg/../z", b"contenido", "")},
+    )
+    assert response.status_code == 400
+
+
+async def test_concurrent_uploads_of_the_same_content_with_sync_sessions(engine, equipo, monkeypatch):
+    # La primera subida bloquea la fila del blob mientras mueve su archivo; la segunda espera ese
+    # bloqueo. Con Session sync en el event loop esa espera lo detenía y la primera no llegaba al commit
+    content = os.urandom(128)
+    promote = storage.promote
+
+    def slow_promote(tmp_path, key):
+        time.sleep(0.2)
+        promote(tmp_path, key)
+
+    monkeypatch.setattr(storage, "promote", slow_promote)
+
+    async def upload_with_own_session():
+        with Session(engine, expire_on_commit=False) as session:
+            return await save_and_register_fotos(session, "antes", equipo.id, [upload(content)])
+
+    results = await asyncio.gather(upload_with_own_session(), upload_with_own_session())
+
+    (first,), (second,) = results
+    assert first.checksum == second.checksum
+    with Session(engine) as session:
+        assert session.get(MediaBlob, first.checksum).ref_count == 2
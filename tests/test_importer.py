@@ -0,0 +1,37 @@
+import io
+import os
+
+from sqlmodel import select
+
+from app.models.mantenimiento_general import MantenimientoGeneral
+from app.models.ubicacion import Ubicacion
+from app.schemas.importer import ImportFormat, ImportKind
+from app.services.importer import import_records
+
+
+def import_csv(kind: ImportKind, text: str):
+    return import_records(io.BytesIO(text.encode()), kind, ImportFormat.csv)
+
+
+def test_reimporting_mantenimientos_skips_existing_rows(session):
+    suffix = os.urandom(4).hex()
+    cliente, ubicacion = f"Cliente import {suffix}", f"Planta import {suffix}"
+    import_csv(ImportKind.clientes, f"nombre\n{cliente}\n")
+    import_csv(ImportKind.ubicaciones, f"ubicacion\n{ubicacion}\n")
+    data = (
+        "cliente,ubicacion,periodo\n"
+        f"{cliente},{ubicacion},2024-01\n"
+        f"{cliente},{ubicacion},2024-02\n"
+        f"{cliente},{ubicacion},2024-01\n"
+        f"{cliente},Planta inexistente {suffix},2024-03\n"
+    )
+
+    first = import_csv(ImportKind.mantenimientos, data)
+    again = import_csv(ImportKind.mantenimientos, data)
+
+    # La fila repetida en el archivo se omite ya en la primera importación
+    assert (first.inserted, first.skipped, first.unresolved) == (2, 1, 1)
+    assert (again.inserted, again.skipped, again.unresolved) == (0, 3, 1)
+    ubicacion_id = session.exec(select(Ubicacion.id).where(Ubicacion.ubicacion == ubicacion)).one()
+    periodos = session.exec(select(MantenimientoGeneral.periodo).where(MantenimientoGeneral.ubicacion_id == ubicacion_id)).all()
+    assert sorted(periodos) == ["2024-01", "2024-02"]
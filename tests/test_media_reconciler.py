@@ -0,0 +1,46 @@
+import os
+import time
+
+import pytest
+
+from app.core.storage import storage
+from app.workers.media_reconciler import LEGACY_SHARD, reconcile_shard
+
+pytestmark = pytest.mark.anyio
+
+GRACE = 600
+
+
+def create_file(path: str, age: float = 0) -> str:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(b"parcial")
+    modified = time.time() - age
+    os.utime(path, (modified, modified))
+    return path
+
+
+@pytest.mark.parametrize("shard", ["00", LEGACY_SHARD])
+async def test_every_pass_removes_abandoned_uploads_in_temp_directory_root(engine, shard):
+    root = storage.temp_directory
+    abandoned = create_file(os.path.join(root, f".upload-abandonada-{shard}.part"), age=GRACE + 60)
+    in_progress = create_file(os.path.join(root, f".upload-en-curso-{shard}.part"))
+    unrelated = create_file(os.path.join(root, f"notas-{shard}.txt"), age=GRACE + 60)
+
+    result = await reconcile_shard(shard, grace=GRACE)
+
+    assert result is not None and result.files_removed >= 1
+    assert not os.path.exists(abandoned)
+    assert os.path.exists(in_progress)
+    assert os.path.exists(unrelated)
+    for path in (in_progress, unrelated):
+        os.remove(path)
+
+
+async def test_temp_sweep_does_not_descend_into_shard_directories(engine):
+    # Los temporales dentro de blobs/ab/ son cosa de la pasada de ese directorio
+    nested = create_file(os.path.join(storage.temp_directory, "fe", ".upload-anidada.part"), age=GRACE + 60)
+
+    await reconcile_shard("01", grace=GRACE)
+    assert os.path.exists(nested)
+    os.remove(nested)
@@ -0,0 +1,48 @@
+import json
+import os
+
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.responses import PlainTextResponse
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+from app.core.middleware import ProfilingMiddleware, RequestContextMiddleware
+from app.core.profiling import PROFILE_ID_PATTERN, ProfileStore
+
+
+def profiled_client(store: ProfileStore) -> TestClient:
+    app = Starlette(
+        routes=[Route("/ping", lambda request: PlainTextResponse("pong"))],
+        middleware=[Middleware(RequestContextMiddleware), Middleware(ProfilingMiddleware, sample_rate=0, token=None, store=store)],
+    )
+    return TestClient(app)
+
+
+def test_repeated_request_id_does_not_overwrite_profiles(tmp_path):
+    store = ProfileStore(directory=str(tmp_path), max_stored=10)
+    client = profiled_client(store)
+
+    responses = [client.get("/ping", headers={"X-Profile": "1", "X-Request-ID": "repetido"}) for _ in range(2)]
+
+    profile_ids = [response.headers["X-Profile-URL"].rsplit("/", 1)[1] for response in responses]
+    assert len(set(profile_ids)) == 2
+    assert all(PROFILE_ID_PATTERN.match(profile_id) for profile_id in profile_ids)
+    assert sorted(os.listdir(tmp_path)) == sorted(f"{profile_id}.{ext}" for profile_id in profile_ids for ext in ("prof", "json"))
+    assert [item["request_id"] for item in store.list()] == ["repetido", "repetido"]
+    assert all(store.report(profile_id) for profile_id in profile_ids)
+
+
+def test_client_request_id_is_never_used_as_a_path(tmp_path):
+    store = ProfileStore(directory=str(tmp_path / "profiles"), max_stored=10)
+    client = profiled_client(store)
+
+    response = client.get("/ping", headers={"X-Profile": "1", "X-Request-ID": "../fuera"})
+
+    assert response.status_code == 200
+    assert os.listdir(tmp_path) == ["profiles"]
+    (item,) = store.list()
+    assert PROFILE_ID_PATTERN.match(item["profile_id"])
+    with open(tmp_path / "profiles" / f"{item['profile_id']}.json") as f:
+        assert json.load(f)["path"] == "/ping"
+    assert store.raw_path("../fuera") is None
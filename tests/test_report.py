@@ -0,0 +1,65 @@
+from contextlib import contextmanager
+from uuid import uuid4
+
+import pytest
+from sqlalchemy import event
+from sqlmodel import Session
+
+from app.models.cliente import Cliente
+from app.models.equipo_mantenimiento import EquipoMantenimiento
+from app.models.foto_mantenimiento import FotoMantenimiento
+from app.models.mantenimiento_general import MantenimientoGeneral
+from app.models.ubicacion import Ubicacion
+from app.schemas.mantenimiento_general import MantenimientoGeneralReport
+from app.services.mantenimiento_general import get_mantenimiento_general_report
+
+pytestmark = pytest.mark.anyio
+
+# Mantenimiento con cliente y ubicación, equipos y fotos: una consulta por nivel
+MAX_QUERIES = 3
+
+
+def seed(session: Session, equipos: int, fotos: int):
+    cliente = Cliente(nombre=f"Reporte {uuid4().hex[:8]}")
+    ubicacion = Ubicacion(ubicacion=f"reporte-{uuid4()}")
+    mantenimiento = MantenimientoGeneral(cliente_id=cliente.id, ubicacion_id=ubicacion.id, periodo="2025-01")
+    session.add_all([cliente, ubicacion, mantenimiento])
+    for i in range(equipos):
+        equipo = EquipoMantenimiento(equipo=f"Equipo {i}", mantenimiento_general_id=mantenimiento.id, reporte={"i": i})
+        session.add(equipo)
+        session.add_all(
+            FotoMantenimiento(categoria="antes", url=f"/media/x/{i}-{j}.jpg", nombre=f"{i}-{j}.jpg", equipos_mantenimiento_id=equipo.id)
+            for j in range(fotos)
+        )
+    session.commit()
+    return mantenimiento.id
+
+
+@contextmanager
+def count_statements(engine):
+    statements = []
+
+    def listener(conn, cursor, statement, *rest):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+
+
+@pytest.mark.parametrize("equipos, fotos", [(1, 1), (20, 5)])
+async def test_report_uses_a_fixed_number_of_queries(engine, equipos, fotos):
+    with Session(engine) as session:
+        mantenimiento_id = seed(session, equipos, fotos)
+
+    with Session(engine) as session, count_statements(engine) as statements:
+        mantenimiento = await get_mantenimiento_general_report(session, mantenimiento_id)
+        # Serializar recorre todas las relaciones: una carga perezosa aparecería aquí como consulta extra
+        report = MantenimientoGeneralReport.model_validate(mantenimiento, from_attributes=True)
+
+    assert len(report.equipos) == equipos
+    assert sum(len(equipo.fotos) for equipo in report.equipos) == equipos * fotos
+    assert report.cliente is not None and report.ubicacion is not None
+    assert len(statements) <= MAX_QUERIES, "\n\n".join(statements)